@@ -111,11 +111,12 @@ def api_list_segments(
 def api_list_transcripts(
     channel_id: Optional[str] = Query(None),
     since: Optional[datetime] = Query(None),
+    q: Optional[str] = Query(None, description="Full-text search: transcripts containing all words"),
     limit: int = Query(100, ge=1, le=500),
     offset: int = Query(0, ge=0),
     db: Session = Depends(get_db),
 ) -> PaginatedTranscripts:
-    pairs = list_recent_transcripts(db, channel_id=channel_id, since=since, limit=limit, offset=offset)
+    pairs = list_recent_transcripts(db, channel_id=channel_id, since=since, q=q, limit=limit, offset=offset)
     items = [SegmentWithTranscript(segment=p[0], transcript=p[1]) for p in pairs]
     next_offset = offset + len(items) if len(items) == limit else None
     return PaginatedTranscripts(items=items, meta=PageMeta(limit=limit, offset=offset, next_offset=next_offset))
@@ -146,9 +147,8 @@ def api_list_visual_events(
     if until:
         query = query.filter(VisualEvent.created_at < until)
     if region:
-        from sqlalchemy import cast
-        from sqlalchemy.dialects.postgresql import JSONB
-        query = query.filter(cast(VisualEvent.data, JSONB)["region"].astext == region)
+        # Containment (@>) is served by idx_visual_events_data_gin
+        query = query.filter(VisualEvent.data.contains({"region": region}))
     if q:
         from sqlalchemy import func
         query = query.filter(func.lower((VisualEvent.data["text"].astext))).like(f"%{q.lower()}%")
@@ -101,15 +101,14 @@ def ping() -> str:
 def transcribe_segment(self, segment_id: str, segment_started_at_iso: str) -> dict:
     start = perf_counter()
     # Lazy import heavy deps inside task
-    from datetime import datetime
-    from uuid import UUID
     from mobasher.storage.db import get_session, init_engine
-    from mobasher.storage.repositories import upsert_transcript
+    from mobasher.storage.repositories import replace_transcript_words, seg_key, upsert_transcript
     from mobasher.storage.models import Segment
+    key = seg_key(segment_id, segment_started_at_iso)
     try:
         init_engine()
         with next(get_session()) as db:  # type: ignore
-            seg = db.get(Segment, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
+            seg = db.get(Segment, key)
             if seg is None or not seg.audio_path:
                 try:
                     raise RuntimeError("segment_missing_or_no_audio")
@@ -149,10 +148,18 @@ def transcribe_segment(self, segment_id: str, segment_started_at_iso: str) -> di
             # Collect text and compute a simple average confidence if present
             texts = []
             confidences = []
+            words = []
             for s in segments:
                 texts.append(s.text)
                 if getattr(s, "avg_logprob", None) is not None:
                     confidences.append(float(s.avg_logprob))
+                for w in getattr(s, "words", None) or ():
+                    words.append({
+                        "word": w.word.strip(),
+                        "start_ms": int(w.start * 1000) if w.start is not None else None,
+                        "end_ms": int(w.end * 1000) if w.end is not None else None,
+                        "confidence": float(w.probability) if w.probability is not None else None,
+                    })
             text = " ".join(t.strip() for t in texts).strip()
             confidence: Optional[float] = (sum(confidences) / len(confidences)) if confidences else None
 
@@ -167,56 +174,37 @@ def transcribe_segment(self, segment_id: str, segment_started_at_iso: str) -> di
 
             elapsed_ms = int((perf_counter() - start) * 1000)
 
+            # Transcript, its word rows and the segment status go out in one transaction
+            from mobasher.nlp.normalize import normalize_arabic as _norm
+
             upsert_transcript(
                 db,
-                segment_id=UUID(segment_id),
-                segment_started_at=datetime.fromisoformat(segment_started_at_iso),
+                segment_id=key.id,
+                segment_started_at=key.started_at,
                 text=text,
+                text_norm=_norm(text),
                 language="ar",
                 confidence=confidence,
                 model_name=settings.model_name,
                 model_version=model_version,
                 processing_time_ms=elapsed_ms,
                 engine_time_ms=engine_time_ms,
-                words=[{
-                    "start": getattr(s, "start", None),
-                    "end": getattr(s, "end", None),
-                    "text": s.text,
-                } for s in segments] if settings.word_timestamps else None,
-                # text_norm computed below
+                autocommit=False,
             )
-
-            # Normalize Arabic text optionally and persist
-            try:
-                from camel_tools.utils.normalize import normalize_arabic  # type: ignore
-                def _norm(t: str) -> str:
-                    return normalize_arabic(t, alef=True, yah=True, ta=True)
-            except Exception:
-                def _norm(t: str) -> str:
-                    return t
-
-            from mobasher.storage.models import Transcript
-            tr = db.get(Transcript, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
-            if tr is not None:
-                tr.text_norm = _norm(text)
-                tr.engine_time_ms = engine_time_ms
-                db.add(tr)
-                db.commit()
+            # Row-per-word table (indexable) instead of the legacy Transcript.words JSON;
+            # always replaced so a re-transcription without words clears the old rows
+            replace_transcript_words(
+                db,
+                segment_id=key.id,
+                segment_started_at=key.started_at,
+                words=words,
+                autocommit=False,
+            )
+            seg.asr_status = "completed"
+            db.commit()
 
         # success metrics
         ASR_TASK_OUTCOMES.labels(task="transcribe_segment", outcome="success", channel_id=seg.channel_id).inc()
-        # mark completed
-        try:
-            from mobasher.storage.db import get_session as _gs
-            from mobasher.storage.models import Segment as _Seg
-            with next(_gs()) as db2:  # type: ignore
-                s2 = db2.get(_Seg, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
-                if s2 is not None:
-                    s2.asr_status = "completed"
-                    db2.add(s2)
-                    db2.commit()
-        except Exception:
-            pass
         ASR_TASK_DURATION.labels(task="transcribe_segment", channel_id=seg.channel_id).observe(elapsed_ms / 1000.0)
         return {"ok": True, "elapsed_ms": elapsed_ms}
     except Exception:
@@ -231,9 +219,7 @@ def transcribe_segment(self, segment_id: str, segment_started_at_iso: str) -> di
             from mobasher.storage.db import get_session as _gs
             from mobasher.storage.models import Segment as _Seg
             with next(_gs()) as db2:  # type: ignore
-                from datetime import datetime as _dt
-                from uuid import UUID as _UUID
-                s2 = db2.get(_Seg, (_UUID(segment_id), _dt.fromisoformat(segment_started_at_iso)))
+                s2 = db2.get(_Seg, key)
                 if s2 is not None:
                     s2.asr_status = "failed"
                     db2.add(s2)
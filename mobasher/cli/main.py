@@ -301,10 +301,15 @@ app.add_typer(nlp_app, name="nlp")
 
 
 @nlp_app.command("worker")
-def nlp_worker(metrics_port: int = typer.Option(9112, help="Prometheus metrics port"), pool: str = typer.Option("solo"), concurrency: int = typer.Option(1)) -> None:
+def nlp_worker(
+    metrics_port: int = typer.Option(9112, help="Prometheus metrics port"),
+    pool: str = typer.Option("solo"),
+    concurrency: int = typer.Option(1),
+    queues: str = typer.Option("nlp", help="Comma-separated queues, e.g. nlp,nlp.aljazeera (NLP_PER_CHANNEL_QUEUES)"),
+) -> None:
     import sys
     env_prefix = f"NLP_METRICS_PORT={metrics_port} " if metrics_port else ""
-    cmd = f"{env_prefix}{sys.executable} -m celery -A mobasher.nlp.worker.app worker --loglevel=INFO -P {pool} -c {concurrency}"
+    cmd = f"{env_prefix}{sys.executable} -m celery -A mobasher.nlp.worker.app worker --loglevel=INFO -P {pool} -c {concurrency} -Q {queues}"
     code = _run(cmd, cwd=_repo_root())
     raise typer.Exit(code)
 
@@ -610,9 +615,15 @@ def asr_bench(
 
 
 @vision_app.command("worker")
-def vision_worker(concurrency: int = typer.Option(2, help="Celery worker concurrency")) -> None:
+def vision_worker(
+    concurrency: int = typer.Option(2, help="Celery worker concurrency"),
+    queues: str = typer.Option(
+        "vision,vision.ocr,vision.objects,vision.faces",
+        help="Comma-separated queues; run e.g. vision.ocr and vision.objects,vision.faces as separate workers",
+    ),
+) -> None:
     import sys
-    cmd = f"{sys.executable} -m celery -A mobasher.vision.worker.app worker --loglevel=INFO -c {concurrency}"
+    cmd = f"{sys.executable} -m celery -A mobasher.vision.worker.app worker --loglevel=INFO -c {concurrency} -Q {queues}"
     code = _run(cmd, cwd=_repo_root())
     raise typer.Exit(code)
 
@@ -738,7 +749,7 @@ def _wipe_data_roots(extra_root: Optional[str], today_only: bool) -> None:
                         if channel_like.match(p.name) or p.name in {"audio", "video", "screenshots", "gallery"} or _re.match(r"^\d{4}-\d{2}-\d{2}$", p.name):
                             shutil.rmtree(p, ignore_errors=True)
                 else:
-                    if not today_only and p.suffix.lower() in {".wav", ".mp4", ".mkv", ".jpg", ".jpeg", ".json", ".jsonl"}:
+                    if not today_only and p.suffix.lower() in {".wav", ".flac", ".opus", ".mp4", ".mkv", ".jpg", ".jpeg", ".json", ".jsonl"}:
                         try:
                             p.unlink()
                         except Exception:
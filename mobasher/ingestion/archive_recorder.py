@@ -13,17 +13,19 @@ from __future__ import annotations
 import argparse
 import asyncio
 import logging
+import mmap
 import os
+import re
+import struct
 import sys
 import time
 from contextlib import asynccontextmanager
 from dataclasses import dataclass
 from datetime import datetime, timezone, timedelta
 from pathlib import Path
-from typing import Dict, Optional
-from uuid import uuid4
-
+from typing import Any, Dict, Optional
 import yaml
+from uuid_utils.compat import uuid7
 
 try:
     from prometheus_client import Counter, Gauge, Histogram, start_http_server
@@ -45,6 +47,48 @@ except Exception:  # pragma: no cover - metrics are optional
 
 logger = logging.getLogger(__name__)
 
+# ffmpeg stderr patterns of interest (progress lines are '\r'-terminated)
+_FFMPEG_DROP_RE = re.compile(r"frame=.*?drop=\s*(\d+)")
+_FFMPEG_RECONNECT_RE = re.compile(r"Reconnecting|Will reconnect")
+_FFMPEG_LINE_SPLIT_RE = re.compile(rb"[\r\n]")
+
+
+async def pump_ffmpeg_stderr(stream: Optional[asyncio.StreamReader], drops: Any, reconnects: Any, label: str) -> None:
+    """Forward ffmpeg warnings to DEBUG logs and count drops/reconnects.
+
+    Also keeps the pipe drained so ffmpeg never blocks on a full stderr buffer.
+    ``drops``/``reconnects`` are labelled Prometheus counters.
+    """
+    if stream is None:
+        return
+    last_drop = 0
+    pending = b""
+    try:
+        while True:
+            chunk = await stream.read(4096)
+            if not chunk:
+                break
+            *lines, pending = _FFMPEG_LINE_SPLIT_RE.split(pending + chunk)
+            if len(pending) > 65536:
+                pending = b""
+            for raw in lines:
+                line = raw.decode("utf-8", errors="replace").strip()
+                if not line:
+                    continue
+                m = _FFMPEG_DROP_RE.search(line)
+                if m:
+                    # drop= is cumulative for the lifetime of the process
+                    n = int(m.group(1))
+                    if n > last_drop:
+                        drops.inc(n - last_drop)
+                    last_drop = n
+                    continue
+                logger.debug("ffmpeg[%s]: %s", label, line)
+                if _FFMPEG_RECONNECT_RE.search(line):
+                    reconnects.inc()
+    except Exception as e:
+        logger.debug("ffmpeg[%s] stderr pump stopped: %s", label, e)
+
 
 def _build_header_string(headers: Dict[str, str]) -> str:
     if not headers:
@@ -52,6 +96,40 @@ def _build_header_string(headers: Dict[str, str]) -> str:
     return "\r\n".join([f"{k}: {v}" for k, v in headers.items()]) + "\r\n"
 
 
+def _fast_start_args(stream_url: str) -> list[str]:
+    """Input options that shorten stream probing before the first segment is written."""
+    args = ["-analyzeduration", "2000000", "-probesize", "500000", "-fflags", "+nobuffer"]
+    if stream_url.startswith(("rtmp://", "rtmps://", "udp://", "srt://")) or stream_url.endswith(".ts"):
+        args += ["-rtbufsize", "16M"]
+    return args
+
+
+def _has_moov_atom(path: str | Path) -> bool:
+    """True once the MP4 carries a top-level ``moov`` box, i.e. the muxer has finalized it.
+
+    Walks top-level box headers through a read-only mmap, so only the pages
+    holding the headers are touched (the first 64 KB when faststart moved
+    ``moov`` to the front).
+    """
+    try:
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            pos, end = 0, len(mm)
+            while pos + 8 <= end:
+                size, box = struct.unpack_from(">I4s", mm, pos)
+                if box == b"moov":
+                    return True
+                if size == 1 and pos + 16 <= end:
+                    size = struct.unpack_from(">Q", mm, pos + 8)[0]
+                if size < 8:
+                    # size 0 means "until EOF": the box is still being written
+                    return False
+                pos += size
+    except (OSError, ValueError):
+        # ValueError: empty file cannot be mapped
+        return False
+    return False
+
+
 def _today_folder() -> str:
     return datetime.now(timezone.utc).strftime("%Y-%m-%d")
 
@@ -86,14 +164,21 @@ class ArchiveRecorder:
         self.metrics_errors = Counter("mobasher_archive_errors_total", "Archive errors", ["channel_id"])  # type: ignore
         self.metrics_last_cut = Gauge("mobasher_archive_last_cut_timestamp", "Unix ts of last archive cut", ["channel_id"])  # type: ignore
         self.metrics_restarts = Counter("mobasher_archive_restarts_total", "Archive process restarts", ["channel_id"])  # type: ignore
-
-        try:
-            self.metrics_running.labels(channel_id=self.channel_id).set(0)
-        except Exception:
-            pass
+        self.metrics_ffmpeg_drops = Counter("mobasher_ffmpeg_drops_total", "Frames dropped as reported by ffmpeg progress output", ["channel_id", "media_type"])  # type: ignore
+        self.metrics_reconnects = Counter("mobasher_reconnects_total", "Input reconnects reported by ffmpeg", ["channel_id", "media_type"])  # type: ignore
+
+        # Bind per-channel children once; labels() is a locked dict lookup per call
+        self._running_gauge = self.metrics_running.labels(channel_id=self.channel_id)
+        self._thumbs_counter = self.metrics_thumbs.labels(channel_id=self.channel_id)
+        self._errors_counter = self.metrics_errors.labels(channel_id=self.channel_id)
+        self._restarts_counter = self.metrics_restarts.labels(channel_id=self.channel_id)
+        self._drops_counter = self.metrics_ffmpeg_drops.labels(channel_id=self.channel_id, media_type="archive")
+        self._reconnects_counter = self.metrics_reconnects.labels(channel_id=self.channel_id, media_type="archive")
+        self._running_gauge.set(0)
         
         # Process monitoring
         self.process: Optional[asyncio.subprocess.Process] = None
+        self._stderr_task: Optional[asyncio.Task] = None
         self.restart_count = 0
         self.last_restart = datetime.now(timezone.utc)
         self.max_restarts_per_hour = 5
@@ -108,13 +193,15 @@ class ArchiveRecorder:
         header_string = _build_header_string(headers)
         cmd: list[str] = [
             "ffmpeg", "-nostdin", "-loglevel", "warning",  # More verbose for debugging
+            # Progress lines (frame=... drop=N) are INFO-level; -stats writes them anyway
+            "-stats", "-stats_period", "5",
             "-reconnect", "1", "-reconnect_streamed", "1", "-reconnect_delay_max", "30",
             "-reconnect_at_eof", "1", "-timeout", "10000000",  # 10 second timeout
             "-user_agent", headers.get("User-Agent", "Mobasher/1.0"),
         ]
         if header_string:
             cmd += ["-headers", header_string]
-        cmd += ["-i", stream_url]
+        cmd += _fast_start_args(stream_url) + ["-i", stream_url]
         return cmd
 
     def _ffmpeg_output_pattern(self) -> str:
@@ -161,13 +248,18 @@ class ArchiveRecorder:
         logger.info("Starting archive ffmpeg | %s", " ".join(cmd))
         proc = await asyncio.create_subprocess_exec(
             *cmd,
-            stdout=asyncio.subprocess.PIPE,  # Capture for debugging
+            stdout=asyncio.subprocess.DEVNULL,
             stderr=asyncio.subprocess.PIPE,
             preexec_fn=os.setsid if hasattr(os, "setsid") else None,
         )
         self.process = proc  # Store for monitoring
+        if self._stderr_task is not None and not self._stderr_task.done():
+            self._stderr_task.cancel()
+        self._stderr_task = asyncio.create_task(
+            pump_ffmpeg_stderr(proc.stderr, self._drops_counter, self._reconnects_counter, "archive")
+        )
         return proc
-    
+
     async def _monitor_process(self) -> None:
         """Monitor FFmpeg process and restart if it fails."""
         if not self.process:
@@ -185,7 +277,7 @@ class ArchiveRecorder:
             logger.warning(f"Archive process terminated with code {self.process.returncode}")
             
             try:
-                self.metrics_errors.labels(channel_id=self.channel_id).inc()
+                self._errors_counter.inc()
             except Exception:
                 pass
             
@@ -216,7 +308,7 @@ class ArchiveRecorder:
             self.restart_count += 1
             
             try:
-                self.metrics_restarts.labels(channel_id=self.channel_id).inc()
+                self._restarts_counter.inc()
             except Exception:
                 pass
             
@@ -225,7 +317,7 @@ class ArchiveRecorder:
         except Exception as e:
             logger.error(f"Failed to restart archive process: {e}")
             try:
-                self.metrics_errors.labels(channel_id=self.channel_id).inc()
+                self._errors_counter.inc()
             except Exception:
                 pass
 
@@ -234,20 +326,21 @@ class ArchiveRecorder:
         while True:
             try:
                 await self._ensure_today_dir()
-                for mp4 in sorted(self.current_date_dir.glob("*.mp4")):
-                    thumb = mp4.with_name(mp4.stem + "-thumb." + self.opts.thumb_format)
-                    if thumb.exists():
-                        continue
-                    # Heuristic: only thumb files older than 30s to avoid partials
-                    try:
-                        age = time.time() - mp4.stat().st_mtime
-                    except FileNotFoundError:
+                # One directory listing per pass; thumbnail existence becomes a set lookup
+                day_dir = str(self.current_date_dir)
+                with os.scandir(day_dir) as it:
+                    names = {e.name for e in it}
+                for name in sorted(n for n in names if n.endswith(".mp4")):
+                    thumb_name = f"{name[:-4]}-thumb.{self.opts.thumb_format}"
+                    if thumb_name in names:
                         continue
-                    if age < 30:
+                    mp4 = os.path.join(day_dir, name)
+                    # Only thumb finalized files: no moov box yet means still writing or truncated
+                    if not _has_moov_atom(mp4):
                         continue
-                    await self._extract_thumbnail(mp4, thumb)
+                    await self._extract_thumbnail(Path(mp4), Path(day_dir, thumb_name))
                     try:
-                        self.metrics_thumbs.labels(channel_id=self.channel_id).inc()  # type: ignore
+                        self._thumbs_counter.inc()
                     except Exception:
                         pass
             except Exception as e:  # pragma: no cover
@@ -339,9 +432,10 @@ class ArchiveRecorder:
         """Create a database entry for the archive file."""
         try:
             from mobasher.storage.models import Recording, Channel
+            from mobasher.storage.repositories import get_cached_channel
             
             # Generate recording ID
-            recording_id = str(uuid4())
+            recording_id = str(uuid7())
             
             # Get file info
             file_size = mp4_path.stat().st_size if mp4_path.exists() else 0
@@ -367,7 +461,7 @@ class ArchiveRecorder:
                     return
                     
                 # Ensure channel exists
-                channel = session.get(Channel, self.channel_id)
+                channel = get_cached_channel(session, self.channel_id)
                 if channel is None:
                     input_cfg = self.cfg.get('input', {})
                     channel = Channel(
@@ -455,7 +549,7 @@ class ArchiveRecorder:
 
     async def run(self) -> None:
         try:
-            self.metrics_running.labels(channel_id=self.channel_id).set(1)  # type: ignore
+            self._running_gauge.set(1)
         except Exception:
             pass
         
@@ -492,7 +586,7 @@ class ArchiveRecorder:
             
         finally:
             try:
-                self.metrics_running.labels(channel_id=self.channel_id).set(0)  # type: ignore
+                self._running_gauge.set(0)
             except Exception:
                 pass
             if thumb_task:
@@ -501,6 +595,8 @@ class ArchiveRecorder:
                 monitor_task.cancel()
             if db_task:
                 db_task.cancel()
+            if self._stderr_task:
+                self._stderr_task.cancel()
 
 
 def load_channel_config(path: str) -> Dict:
@@ -3,7 +3,7 @@ Mobasher Dual HLS Recorder (start-only filenames)
 
 - 60s processing segments for audio + video
 - 1h archive segments for viewing
-- Start-only filenames: <channel_id>-YYYYMMDD-HHMMSS.{wav|mp4}
+- Start-only filenames: <channel_id>-YYYYMMDD-HHMMSS.{wav|flac|opus|mp4}
 - Zero-duration/partial file guard
 """
 
@@ -14,24 +14,194 @@ import yaml
 from pathlib import Path
 from datetime import datetime, timezone, timedelta
 import argparse
+import heapq
+import operator
 from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
 import time
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set
 import uuid
 import os
+import struct
 import sys
 from pathlib import Path as _Path
 import platform
 from prometheus_client import Counter, Gauge, Histogram, start_http_server
+from uuid_utils.compat import uuid7
 
 # Ensure project root is on sys.path when running from within the package directory
 _project_root = str(_Path(__file__).resolve().parents[2])
 if _project_root not in sys.path:
     sys.path.append(_project_root)
 
+from mobasher.ingestion.archive_recorder import _has_moov_atom, pump_ffmpeg_stderr
+
 logger = logging.getLogger(__name__)
 
 
+def _fast_start_args(stream_url: str) -> List[str]:
+    """Input options that shorten stream probing before the first segment is written."""
+    args = ['-analyzeduration', '2000000', '-probesize', '500000', '-fflags', '+nobuffer']
+    if stream_url.startswith(('rtmp://', 'rtmps://', 'udp://', 'srt://')) or stream_url.endswith('.ts'):
+        args += ['-rtbufsize', '16M']
+    return args
+
+
+# audio.codec -> (segment file extension, ffmpeg encoder args)
+_AUDIO_CODECS: Dict[str, tuple[str, List[str]]] = {
+    'pcm_s16le': ('wav', ['-c:a', 'pcm_s16le']),
+    'flac': ('flac', ['-c:a', 'flac', '-compression_level', '0']),
+    'opus': ('opus', ['-c:a', 'libopus', '-b:a', '24k', '-application', 'voip']),
+}
+
+
+def _wav_duration(path: str) -> Optional[float]:
+    """Duration of a PCM WAV from its RIFF header (fmt byte rate + data size), no subprocess.
+
+    A data size of 0/0xFFFFFFFF (header not finalized, e.g. killed writer) falls
+    back to the bytes actually present after the data chunk header.
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(4096)
+            file_size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+    if len(head) < 12 or head[:4] != b'RIFF' or head[8:12] != b'WAVE':
+        return None
+    byte_rate = 0
+    pos = 12
+    while pos + 8 <= len(head):
+        cid, csize = struct.unpack_from('<4sI', head, pos)
+        body = pos + 8
+        if cid == b'fmt ' and body + 12 <= len(head):
+            byte_rate = struct.unpack_from('<I', head, body + 8)[0]
+        elif cid == b'data':
+            if not byte_rate:
+                return None
+            available = file_size - body
+            if csize == 0 or csize == 0xFFFFFFFF or csize > available:
+                csize = available
+            return max(0, csize) / byte_rate
+        pos = body + csize + (csize & 1)
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_filename_cached(name: str, segment_seconds: int) -> Optional[tuple[datetime, datetime]]:
+    """(start, end) from a '<prefix>-YYYYMMDD-HHMMSS.ext' segment name; filenames are unique."""
+    try:
+        stem = name.rsplit('.', 1)[0]
+        parts = stem.split('-')
+        d, t = parts[-2], parts[-1]
+        if len(d) != 8 or len(t) != 6:
+            return None
+        start_dt = datetime(int(d[0:4]), int(d[4:6]), int(d[6:8]),
+                            int(t[0:2]), int(t[2:4]), int(t[4:6]), tzinfo=timezone.utc)
+    except (IndexError, ValueError):
+        return None
+    return start_dt, start_dt + timedelta(seconds=segment_seconds)
+
+
+def _flac_duration(path: str) -> Optional[float]:
+    """Duration of a FLAC file from STREAMINFO (sample rate + total samples).
+
+    ffmpeg fills in the sample count when it closes the file; 0 means unknown.
+    """
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(26)
+    except OSError:
+        return None
+    # 'fLaC', 4-byte block header, STREAMINFO with rate/channels/bps/total packed at offset 10
+    if len(head) < 26 or head[:4] != b'fLaC' or (head[4] & 0x7F) != 0:
+        return None
+    packed = int.from_bytes(head[18:26], 'big')
+    rate = packed >> 44
+    total = packed & ((1 << 36) - 1)
+    return total / rate if rate and total else None
+
+
+def _opus_duration(path: str) -> Optional[float]:
+    """Duration of an Ogg Opus file from the last page granule position minus pre-skip."""
+    try:
+        with open(path, 'rb') as f:
+            head = f.read(512)
+            size = os.fstat(f.fileno()).st_size
+            f.seek(max(0, size - 65536))
+            tail = f.read()
+    except OSError:
+        return None
+    i = head.find(b'OpusHead')
+    j = tail.rfind(b'OggS')
+    if i < 0 or j < 0 or len(tail) < j + 14 or len(head) < i + 12:
+        return None
+    pre_skip = struct.unpack_from('<H', head, i + 10)[0]
+    granule = struct.unpack_from('<q', tail, j + 6)[0]
+    if granule <= pre_skip:
+        return None
+    # Opus granule positions always count 48 kHz samples
+    return (granule - pre_skip) / 48000.0
+
+
+def _bulk_unlink(paths: List[str]) -> None:
+    for path in paths:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+
+
+def _mp4_duration(path: str) -> Optional[float]:
+    """Duration of an MP4 from moov/mvhd (timescale + duration), no subprocess.
+
+    Returns None while the file has no moov box yet (still being written).
+    """
+    try:
+        with open(path, 'rb') as f:
+            file_size = os.fstat(f.fileno()).st_size
+            pos, end = 0, file_size
+            while pos + 8 <= end:
+                f.seek(pos)
+                hdr = f.read(16)
+                size, box = struct.unpack_from('>I4s', hdr)
+                hlen = 8
+                if size == 1 and len(hdr) >= 16:
+                    size, hlen = struct.unpack_from('>Q', hdr, 8)[0], 16
+                if size < hlen:
+                    return None
+                if box == b'moov':
+                    # mvhd is the first child of moov in practice; scan the first 64 KB for it
+                    f.seek(pos + hlen)
+                    body = f.read(min(size - hlen, 65536))
+                    i = body.find(b'mvhd')
+                    if i < 4:
+                        return None
+                    p = i + 4
+                    version = body[p]
+                    if version == 1:
+                        timescale, duration = struct.unpack_from('>IQ', body, p + 20)
+                    else:
+                        timescale, duration = struct.unpack_from('>II', body, p + 12)
+                    return duration / timescale if timescale else None
+                pos += size
+    except (OSError, struct.error, IndexError):
+        return None
+    return None
+
+
+@dataclass
+class SegmentBatch:
+    """Column-wise view of the segment files found in one media folder."""
+    directory: Path
+    kind: str  # 'audio' | 'video'
+    names: List[str] = field(default_factory=list)
+    starts: List[Optional[datetime]] = field(default_factory=list)
+    durations: List[Optional[float]] = field(default_factory=list)
+    sizes: List[int] = field(default_factory=list)
+
+
 class DualHLSRecorder:
     def __init__(self, channel_config: Dict[str, Any], data_root: Path):
         self.config = channel_config
@@ -42,6 +212,18 @@ class DualHLSRecorder:
         self.process_audio_recorder: Optional[asyncio.subprocess.Process] = None
         self.process_video_recorder: Optional[asyncio.subprocess.Process] = None
         self.archive_recorder: Optional[asyncio.subprocess.Process] = None
+        self._stderr_tasks: Dict[str, asyncio.Task] = {}
+        # Segment index for today's folders, keyed by file path (fed by watcher or polling)
+        self._segments_today: Dict[str, Dict[str, Any]] = {}
+        # (path, row) pairs awaiting one batched upsert, and WAVs already persisted at full size
+        self._pending_rows: List[tuple[str, Dict[str, Any]]] = []
+        self._finalized_paths: Set[str] = set()
+        # Newest file per watched folder -> media type; still being written by ffmpeg
+        self._open_files: Dict[str, tuple[str, str]] = {}
+        self._watch_task: Optional[asyncio.Task] = None
+        self._watch_stop_evt: Optional[asyncio.Event] = None
+        # UTC day (days since epoch) the current folder paths were computed for
+        self._today_epoch_day: int = -1
         self.running = False
         self._parse_config()
         self._create_directories()
@@ -77,26 +259,44 @@ class DualHLSRecorder:
             "Heartbeat counter",
             ["channel_id"],
         )
-        # Ensure time series is created for this channel_id
-        try:
-            self.metrics_heartbeat.labels(channel_id=self.channel_id).inc(0)
-        except Exception:
-            pass
         self.metrics_segment_collect_latency = Histogram(
             "mobasher_recorder_collect_duration_seconds",
             "Time to collect segments from disk",
             ["channel_id"],
-            buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2, 5),
+            # Few coarse buckets: each one is a series per channel on every scrape
+            buckets=(0.01, 0.05, 0.25, 1.0, 5.0),
         )
         self.metrics_last_hb = Gauge(
             "mobasher_recorder_last_heartbeat_seconds",
             "Unix time of last heartbeat",
             ["channel_id"],
         )
-
-        
+        self.metrics_ffmpeg_drops = Counter(
+            "mobasher_ffmpeg_drops_total",
+            "Frames dropped as reported by ffmpeg progress output",
+            ["channel_id", "media_type"],
+        )
+        self.metrics_reconnects = Counter(
+            "mobasher_reconnects_total",
+            "Input reconnects reported by ffmpeg",
+            ["channel_id", "media_type"],
+        )
+        # Bind labelled children once so hot paths skip the per-call label lookup
+        cid = self.channel_id
+        self._m_running = self.metrics_started.labels(channel_id=cid)
+        self._m_seg = {
+            'audio': self.metrics_segments_total.labels(channel_id=cid, media_type='audio'),
+            'video': self.metrics_segments_total.labels(channel_id=cid, media_type='video'),
+        }
+        self._m_hb = self.metrics_heartbeat.labels(channel_id=cid)
+        self._m_last_hb = self.metrics_last_hb.labels(channel_id=cid)
+        self._m_collect = self.metrics_segment_collect_latency.labels(channel_id=cid)
+        # Ensure time series is created for this channel_id
+        self._m_hb.inc(0)
 
     def _parse_config(self):
+        # Short validation runs: stop also prunes every full segment but the earliest
+        self.test_mode = bool(self.config.get('test_mode', False))
         rec = self.config.get('recording', {})
         storage = self.config.get('storage', {})
         audio = self.config.get('audio', {})
@@ -106,6 +306,8 @@ class DualHLSRecorder:
         self.video_enabled = bool(rec.get('video_enabled', True))
         self.audio_enabled = bool(rec.get('audio_enabled', True))
         self.video_quality = rec.get('video_quality', '720p')
+        # Discover segments via filesystem events; set false to fall back to per-heartbeat polling
+        self.watch_files = bool(rec.get('watch_files', True))
 
         # Temporarily disable archive in this recorder; a dedicated archiver will be built separately
         self.archive_enabled = False
@@ -116,8 +318,31 @@ class DualHLSRecorder:
         self.channel_subdir = bool(storage.get('channel_subdir', True))
         self.directories = storage.get('directories', {'audio': 'audio', 'video': 'video', 'archive': 'archive'})
 
+        # Input headers are fixed per config; every ffmpeg/ffprobe launch reuses them
+        headers = self.config.get('input', {}).get('headers', {}) or {}
+        self._header_string = self._build_header_string(headers)
+        self._user_agent = headers.get('User-Agent', 'Mobasher/1.0')
+
         self.sample_rate = int(audio.get('sample_rate', 16000))
         self.channels = int(audio.get('channels', 1))
+        self.audio_codec = str(audio.get('codec', 'pcm_s16le')).lower()
+        if self.audio_codec not in _AUDIO_CODECS:
+            logger.warning(f"Unknown audio.codec {self.audio_codec!r}; using pcm_s16le")
+            self.audio_codec = 'pcm_s16le'
+        self.audio_ext = _AUDIO_CODECS[self.audio_codec][0]
+        # Size/duration thresholds used per file on every poll and at stop cleanup
+        pcm_bytes = self.sample_rate * self.channels * 2 * self.segment_seconds
+        if self.audio_codec == 'pcm_s16le':
+            self._expected_audio_bytes: Optional[int] = pcm_bytes
+            self._min_audio_bytes = int(pcm_bytes * 0.85)
+        else:
+            # Compressed sizes vary with content: only a sanity floor, and no
+            # size-based "complete" mark (those files are re-statted each poll)
+            nominal = pcm_bytes // 2 if self.audio_codec == 'flac' else 3000 * self.segment_seconds
+            self._expected_audio_bytes = None
+            self._min_audio_bytes = nominal // 4
+        self._min_video_bytes = 500_000
+        self._min_full_duration = max(10.0, self.segment_seconds * 0.92)  # ~55s for 60s segments
 
         self.video_qualities = video.get('qualities', {
             '720p': {'resolution': '1280x720', 'bitrate': '2500k', 'fps': 25},
@@ -132,7 +357,13 @@ class DualHLSRecorder:
 
     def _create_directories(self):
         """Compute folder paths and ensure they exist."""
-        today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+        self._compute_directories()
+        self._ensure_dirs()
+
+    def _compute_directories(self):
+        """Compute today's folder paths (no filesystem access)."""
+        self._today_epoch_day = int(time.time() // 86400)
+        today = datetime.fromtimestamp(self._today_epoch_day * 86400, tz=timezone.utc).strftime('%Y-%m-%d')
         base = self.data_root / self.channel_id if self.channel_subdir else self.data_root
         if self.date_folders:
             self.audio_dir = base / self.directories['audio'] / today
@@ -142,7 +373,14 @@ class DualHLSRecorder:
             self.audio_dir = base / self.directories['audio']
             self.video_dir = base / self.directories['video']
             self.archive_dir = base / self.directories['archive']
-        self._ensure_dirs()
+
+    def _maybe_roll_dirs(self) -> bool:
+        """Recompute folder paths only when the UTC day changes; True if they moved."""
+        if int(time.time() // 86400) == self._today_epoch_day:
+            return False
+        prev_dirs = (self.audio_dir, self.video_dir)
+        self._compute_directories()
+        return (self.audio_dir, self.video_dir) != prev_dirs
 
     def _ensure_dirs(self):
         for d in (self.audio_dir, self.video_dir, self.archive_dir):
@@ -159,43 +397,35 @@ class DualHLSRecorder:
             return ''
         return '\r\n'.join([f"{k}: {v}" for k, v in headers.items()]) + '\r\n'
 
-    def _build_audio_command(self) -> List[str]:
+    def _build_input_args(self) -> List[str]:
+        """ffmpeg binary, reconnect/header options and ``-i`` for the live stream."""
         stream_url = self.config['input']['url']
-        headers = self.config['input'].get('headers', {})
-        header_string = self._build_header_string(headers)
-        audio_pattern = str(self.audio_dir / f"{self.channel_id}-%Y%m%d-%H%M%S.wav")
         cmd: List[str] = [
             'ffmpeg', '-nostdin', '-loglevel', 'warning',  # More verbose for debugging
+            # Progress lines (frame=... drop=N) are INFO-level; -stats writes them anyway
+            '-stats', '-stats_period', '5',
             '-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '30',
             '-reconnect_at_eof', '1', '-timeout', '10000000',  # 10 second timeout
-            '-user_agent', headers.get('User-Agent', 'Mobasher/1.0'),
+            '-user_agent', self._user_agent,
         ]
-        if header_string:
-            cmd += ['-headers', header_string]
-        cmd += [
-            '-i', stream_url,
+        if self._header_string:
+            cmd += ['-headers', self._header_string]
+        cmd += _fast_start_args(stream_url) + ['-i', stream_url]
+        return cmd
+
+    def _build_audio_output_args(self) -> List[str]:
+        audio_pattern = str(self.audio_dir / f"{self.channel_id}-%Y%m%d-%H%M%S.{self.audio_ext}")
+        return [
             '-vn',
-            '-ac', str(self.channels), '-ar', str(self.sample_rate), '-c:a', 'pcm_s16le',
+            '-ac', str(self.channels), '-ar', str(self.sample_rate), *_AUDIO_CODECS[self.audio_codec][1],
             '-f', 'segment', '-segment_time', str(self.segment_seconds), '-reset_timestamps', '1', '-strftime', '1',
             audio_pattern
         ]
-        return cmd
 
-    def _build_video_command(self) -> List[str]:
-        stream_url = self.config['input']['url']
-        headers = self.config['input'].get('headers', {})
-        header_string = self._build_header_string(headers)
+    def _build_video_output_args(self) -> List[str]:
         v = self._get_video_params(self.video_quality)
         video_pattern = str(self.video_dir / f"{self.channel_id}-%Y%m%d-%H%M%S.mp4")
-        cmd: List[str] = [
-            'ffmpeg', '-nostdin', '-loglevel', 'warning',  # More verbose for debugging  
-            '-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '30',
-            '-reconnect_at_eof', '1', '-timeout', '10000000',  # 10 second timeout
-            '-user_agent', headers.get('User-Agent', 'Mobasher/1.0'),
-        ]
-        if header_string:
-            cmd += ['-headers', header_string]
-        cmd += ['-i', stream_url, '-an']
+        cmd: List[str] = ['-an']
         # Video encoder selection and tuning
         if self.video_encoder == 'libx264':
             cmd += ['-c:v', 'libx264', '-preset', self.video_preset, '-threads', str(self.video_threads)]
@@ -216,22 +446,34 @@ class DualHLSRecorder:
         ]
         return cmd
 
+    def _build_audio_command(self) -> List[str]:
+        return self._build_input_args() + self._build_audio_output_args()
+
+    def _build_video_command(self) -> List[str]:
+        return self._build_input_args() + self._build_video_output_args()
+
+    def _build_combined_command(self) -> List[str]:
+        """One input pull feeding both segmenters: audio WAVs and video MP4s."""
+        return (
+            self._build_input_args()
+            + ['-map', '0:a:0'] + self._build_audio_output_args()
+            + ['-map', '0:v:0'] + self._build_video_output_args()
+        )
+
     def _build_archive_command(self) -> List[str]:
         if not self.archive_enabled:
             return []
         stream_url = self.config['input']['url']
-        headers = self.config['input'].get('headers', {})
-        header_string = self._build_header_string(headers)
         v = self._get_video_params(self.archive_quality)
         archive_pattern = str(self.archive_dir / f"{self.channel_id}-archive-%Y%m%d-%H%M%S.mp4")
         cmd: List[str] = [
-            'ffmpeg', '-nostdin', '-loglevel', 'error',
+            'ffmpeg', '-nostdin', '-loglevel', 'error', '-stats', '-stats_period', '5',
             '-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '5',
-            '-user_agent', headers.get('User-Agent', 'Mobasher/1.0'),
+            '-user_agent', self._user_agent,
         ]
-        if header_string:
-            cmd += ['-headers', header_string]
-        cmd += ['-i', stream_url, '-map', '0:v:0', '-map', '0:a:0']
+        if self._header_string:
+            cmd += ['-headers', self._header_string]
+        cmd += _fast_start_args(stream_url) + ['-i', stream_url, '-map', '0:v:0', '-map', '0:a:0']
         if self.video_encoder == 'libx264':
             cmd += ['-c:v', 'libx264', '-preset', self.video_preset, '-threads', str(self.video_threads)]
         else:
@@ -250,15 +492,33 @@ class DualHLSRecorder:
         ]
         return cmd
 
+    async def _spawn_ffmpeg(self, cmd: List[str], media_type: str) -> asyncio.subprocess.Process:
+        """Launch an ffmpeg process in its own group and drain its stderr into metrics."""
+        proc = await asyncio.create_subprocess_exec(
+            *cmd,
+            stdout=asyncio.subprocess.DEVNULL,
+            stderr=asyncio.subprocess.PIPE,
+            preexec_fn=os.setsid,
+        )
+        prev = self._stderr_tasks.pop(media_type, None)
+        if prev is not None and not prev.done():
+            prev.cancel()
+        drops = self.metrics_ffmpeg_drops.labels(channel_id=self.channel_id, media_type=media_type)
+        reconnects = self.metrics_reconnects.labels(channel_id=self.channel_id, media_type=media_type)
+        self._stderr_tasks[media_type] = asyncio.create_task(
+            pump_ffmpeg_stderr(proc.stderr, drops, reconnects, media_type)
+        )
+        return proc
+
     async def start_recording(self) -> str:
         if self.running:
             raise RuntimeError('Recording is already running')
-        self.recording_id = str(uuid.uuid4())
+        self.recording_id = str(uuid7())
         self.run_started_at = datetime.now(timezone.utc)
         self._create_directories()
         # mark running
         try:
-            self.metrics_started.labels(channel_id=self.channel_id).set(1)
+            self._m_running.set(1)
         except Exception:
             pass
         # Persist recording start
@@ -266,57 +526,78 @@ class DualHLSRecorder:
             self._persist_recording_start()
         except Exception as e:
             logger.warning(f"failed to persist recording start: {e}")
-        # Launch separate audio/video recorders for robustness
+        await self._launch_av_recorders()
+        if self.archive_enabled:
+            arch_cmd = self._build_archive_command()
+            self.archive_recorder = await self._spawn_ffmpeg(arch_cmd, 'archive')
+        self.running = True
+        if self.watch_files:
+            try:
+                import watchfiles  # noqa: F401
+                self._watch_task = asyncio.create_task(self._watch_loop())
+            except ImportError:
+                logger.warning("watchfiles not installed; falling back to polling for segments")
+        return self.recording_id
+
+    async def _launch_av_recorders(self) -> None:
+        """Start one shared ffmpeg when both media are enabled, else one per enabled medium."""
+        if self.audio_enabled and self.video_enabled:
+            av_cmd = self._build_combined_command()
+            logger.info(f"Starting audio+video recorder: {' '.join(av_cmd[:5])}...")
+            self.process_recorder = await self._spawn_ffmpeg(av_cmd, 'av')
+            return
         if self.audio_enabled:
             audio_cmd = self._build_audio_command()
             logger.info(f"Starting audio recorder: {' '.join(audio_cmd[:5])}...")
-            self.process_audio_recorder = await asyncio.create_subprocess_exec(
-                *audio_cmd,
-                stdout=asyncio.subprocess.PIPE,  # Capture for debugging
-                stderr=asyncio.subprocess.PIPE,
-                preexec_fn=os.setsid,
-            )
+            self.process_audio_recorder = await self._spawn_ffmpeg(audio_cmd, 'audio')
         if self.video_enabled:
             video_cmd = self._build_video_command()
             logger.info(f"Starting video recorder: {' '.join(video_cmd[:5])}...")
-            self.process_video_recorder = await asyncio.create_subprocess_exec(
-                *video_cmd,
-                stdout=asyncio.subprocess.PIPE,  # Capture for debugging
-                stderr=asyncio.subprocess.PIPE,
-                preexec_fn=os.setsid,
-            )
-        if self.archive_enabled:
-            self._create_directories()
-            arch_cmd = self._build_archive_command()
-            self.archive_recorder = await asyncio.create_subprocess_exec(
-                *arch_cmd,
-                stdout=asyncio.subprocess.DEVNULL,
-                stderr=asyncio.subprocess.DEVNULL,
-                preexec_fn=os.setsid,
-            )
-        self.running = True
-        return self.recording_id
+            self.process_video_recorder = await self._spawn_ffmpeg(video_cmd, 'video')
 
     async def stop_recording(self):
         if not self.running:
             return
+        await self._stop_process(self.process_recorder)
         await self._stop_process(self.process_audio_recorder)
         await self._stop_process(self.process_video_recorder)
         await self._stop_process(self.archive_recorder)
+        for task in self._stderr_tasks.values():
+            task.cancel()
+        self._stderr_tasks.clear()
         self.process_recorder = None
         self.process_audio_recorder = None
         self.process_video_recorder = None
         self.archive_recorder = None
-        self.recording_id = None
         self.running = False
+        if self._watch_stop_evt is not None:
+            self._watch_stop_evt.set()
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            self._watch_task = None
+        # ffmpeg has closed the files the watcher was still tracking; persist them
+        # while recording_id is set (partials cut by this stop are left to cleanup)
+        self._persist_open_files(min_duration=self._min_full_duration)
+        self.recording_id = None
         try:
-            self.metrics_started.labels(channel_id=self.channel_id).set(0)
+            self._m_running.set(0)
         except Exception:
             pass
-        # Remove partial/short segments produced right before stopping
-        await self._cleanup_partials()
-        # Remove extra full segments created during short validations (keep earliest in this run window)
-        await self._cleanup_extras()
+        # Scan each media folder once; both cleanup policies run over the same in-memory batch
+        media = []
+        if self.audio_enabled:
+            media.append((self.audio_dir, f'*.{self.audio_ext}', 'audio'))
+        if self.video_enabled:
+            media.append((self.video_dir, '*.mp4', 'video'))
+        for directory, pattern, kind in media:
+            # Outside test mode only the segment cut by this stop can be partial
+            batch = await self._scan_and_classify(directory, pattern, kind, tail_only=not self.test_mode)
+            # Remove partial/short segments produced right before stopping
+            doomed = self._cleanup_partials(batch)
+            if self.test_mode:
+                # Remove extra full segments created during short validations (keep earliest in this run window)
+                doomed |= self._cleanup_extras(batch, skip=doomed)
+            await self._unlink_batch(batch, doomed)
         # Persist recording end
         try:
             self._persist_recording_end()
@@ -331,12 +612,14 @@ class DualHLSRecorder:
                 pgid = os.getpgid(process.pid)
             except Exception:
                 pgid = None
+            # SIGINT is ffmpeg's clean-exit path: it closes the open segment and
+            # writes trailers, so stop leaves no partial files for cleanup to find
             if pgid:
-                os.killpg(pgid, signal.SIGTERM)
+                os.killpg(pgid, signal.SIGINT)
             else:
-                process.send_signal(signal.SIGTERM)
+                process.send_signal(signal.SIGINT)
             try:
-                await asyncio.wait_for(process.wait(), timeout=10.0)
+                await asyncio.wait_for(process.wait(), timeout=15.0)
             except asyncio.TimeoutError:
                 if pgid:
                     os.killpg(pgid, signal.SIGKILL)
@@ -347,180 +630,322 @@ class DualHLSRecorder:
             pass
 
     async def get_new_segments(self) -> List[Dict[str, Any]]:
-        self._create_directories()
-        segments: List[Dict[str, Any]] = []
+        await self.refresh_segments()
+        by_start = operator.itemgetter('started_at')
+        audio: List[Dict[str, Any]] = []
+        video: List[Dict[str, Any]] = []
+        for seg in self._segments_today.values():
+            (audio if seg['media_type'] == 'audio' else video).append(seg)
+        # Each list is already (nearly) in time order, which Timsort handles in one pass
+        audio.sort(key=by_start)
+        video.sort(key=by_start)
+        return list(heapq.merge(audio, video, key=by_start))
+
+    async def refresh_segments(self) -> None:
+        """Handle date rollover and, without a live watcher, poll the folders into the index."""
+        if self._maybe_roll_dirs():
+            # UTC date rollover: persist the old folders' last files, create the new
+            # folders once, start a fresh index and re-point the watcher at them
+            self._persist_open_files()
+            self._ensure_dirs()
+            self._segments_today.clear()
+            self._finalized_paths.clear()
+            if self._watch_stop_evt is not None:
+                self._watch_stop_evt.set()
         _t0 = time.time()
-        if self.audio_enabled:
-            segments += await self._collect_segments(self.audio_dir, '*.wav', 'audio')
-        if self.video_enabled:
-            segments += await self._collect_segments(self.video_dir, '*.mp4', 'video')
+        if not self._watch_active():
+            # Polling fallback (watchfiles unavailable/disabled, or recorder stopped);
+            # the two folder scans are independent, so run them side by side
+            scans = []
+            if self.audio_enabled:
+                scans.append(self._collect_segments(self.audio_dir, f'*.{self.audio_ext}', 'audio'))
+            if self.video_enabled:
+                scans.append(self._collect_segments(self.video_dir, '*.mp4', 'video'))
+            await asyncio.gather(*scans)
+            self._flush_segments()
         try:
-            self.metrics_segment_collect_latency.labels(channel_id=self.channel_id).observe(time.time() - _t0)
+            self._m_collect.observe(time.time() - _t0)
         except Exception:
             pass
-        return sorted(segments, key=lambda x: x['started_at'])
+
+    def segment_counts(self) -> tuple[int, int]:
+        """(audio, video) segments in today's index, without touching the disk."""
+        num_audio = num_video = 0
+        for seg in self._segments_today.values():
+            if seg['media_type'] == 'audio':
+                num_audio += 1
+            else:
+                num_video += 1
+        return num_audio, num_video
+
+    def _watch_active(self) -> bool:
+        return self._watch_task is not None and not self._watch_task.done()
+
+    async def _watch_loop(self) -> None:
+        """Feed the segment index from filesystem events (inotify/FSEvents/kqueue).
+
+        Restarts whenever ``_watch_stop_evt`` is set while still running, which
+        is how a UTC date rollover re-points the watcher at the new folders.
+        """
+        from watchfiles import awatch, Change
+
+        while self.running:
+            self._watch_stop_evt = asyncio.Event()
+            targets: Dict[str, tuple[str, str]] = {}
+            if self.audio_enabled:
+                targets[str(self.audio_dir)] = (f'.{self.audio_ext}', 'audio')
+            if self.video_enabled:
+                targets[str(self.video_dir)] = ('.mp4', 'video')
+            if not targets:
+                return
+            # Watchers only report future changes; index what is already on disk first
+            for directory, (suffix, media_type) in targets.items():
+                await self._collect_segments(Path(directory), '*' + suffix, media_type)
+            self._flush_segments()
+            open_files = self._open_files
+            async for changes in awatch(*targets, recursive=False, stop_event=self._watch_stop_evt):
+                for change, path in changes:
+                    directory = os.path.dirname(path)
+                    target = targets.get(directory)
+                    if target is None or not path.endswith(target[0]):
+                        continue
+                    media_type = target[1]
+                    if change == Change.deleted:
+                        self._segments_today.pop(path, None)
+                        if open_files.get(directory, (None,))[0] == path:
+                            del open_files[directory]
+                        continue
+                    current = open_files.get(directory, (None,))[0]
+                    if current is None or path > current:
+                        # A newer segment file means the previous one is closed
+                        if current is not None:
+                            self._ingest_segment(current, os.path.basename(current), media_type)
+                        open_files[directory] = (path, media_type)
+                    elif path < current:
+                        # Late event for an already closed file
+                        self._ingest_segment(path, os.path.basename(path), media_type)
+                        continue
+                    # Growing file: persist once the MP4 muxer wrote moov, otherwise
+                    # only track its size until the next segment starts
+                    complete = media_type == 'video' and _has_moov_atom(path)
+                    self._ingest_segment(path, os.path.basename(path), media_type, persist=complete)
+                self._flush_segments()
+
+    def _persist_open_files(self, min_duration: Optional[float] = None) -> None:
+        """Persist the files the watcher still tracks as open, then flush.
+
+        With ``min_duration``, files whose header shows a shorter duration are skipped.
+        """
+        open_files = list(self._open_files.values())
+        self._open_files.clear()
+        for path, media_type in open_files:
+            if min_duration is not None:
+                dur = self._header_duration(path, media_type)
+                if dur is not None and dur < min_duration:
+                    continue
+            self._ingest_segment(path, os.path.basename(path), media_type)
+        self._flush_segments()
 
     async def _collect_segments(self, directory: Path, pattern: str, media_type: str) -> List[Dict[str, Any]]:
+        # scandir/stat block, so they run in a worker thread; the index, row
+        # buffer and metrics are only touched here on the event loop
         out: List[Dict[str, Any]] = []
-        if not directory.exists():
+        for path, name, size in await asyncio.to_thread(self._scan_segments, directory, pattern):
+            if path in self._finalized_paths:
+                seg = self._segments_today.get(path)
+                if seg is not None:
+                    out.append(seg)
+                    continue
+            seg = self._ingest_segment(path, name, media_type, size)
+            if seg is not None:
+                out.append(seg)
+        return out
+
+    @staticmethod
+    def _scan_segments(directory: Path, pattern: str) -> List[tuple[str, str, int]]:
+        """(path, name, size) of every matching file, sorted by name."""
+        out: List[tuple[str, str, int]] = []
+        suffix = pattern.lstrip('*')
+        # scandir yields plain-string DirEntry objects; avoid a Path per file on every poll
+        try:
+            it = os.scandir(directory)
+        except FileNotFoundError:
             return out
-        for fp in directory.glob(pattern):
+        with it:
+            # Start-only filenames sort chronologically, so today's index fills in time order
+            entries = sorted((e for e in it if e.name.endswith(suffix)), key=lambda e: e.name)
+        for entry in entries:
             try:
-                size = fp.stat().st_size
-                suffix = fp.suffix.lower()
-                if suffix == '.wav':
-                    # Expected bytes = sample_rate * channels * 2 bytes * duration
-                    expected = self.sample_rate * self.channels * 2 * self.segment_seconds
-                    if size < expected * 0.85:
-                        continue
-                elif suffix in ('.mp4', '.mkv'):
-                    # Basic sanity threshold for video segments
-                    if size < 500_000:
-                        continue
-                else:
-                    if size < 100_000:
-                        continue
+                out.append((entry.path, entry.name, entry.stat().st_size))
             except FileNotFoundError:
                 continue
-            info = self._parse_start_only(fp.name)
-            if info:
-                # Persist/update segment row for this time slice
-                try:
-                    self._persist_segment(info, media_type, fp, size)
-                except Exception as e:
-                    logger.warning(f"persist segment failed: {fp.name} | {e}")
-                out.append({
-                    'path': str(fp),
-                    'channel_id': self.channel_id,
-                    'recording_id': self.recording_id,
-                    'media_type': media_type,
-                    **info,
-                })
-                try:
-                    self.metrics_segments_total.labels(channel_id=self.channel_id, media_type=media_type).inc()
-                except Exception:
-                    pass
         return out
 
-    def _probe_duration_seconds(self, file_path: Path) -> Optional[float]:
+    def _ingest_segment(self, path: str, name: str, media_type: str, size: Optional[int] = None,
+                        persist: bool = True) -> Optional[Dict[str, Any]]:
+        """Size-check, parse and persist one segment file, and record it in today's index.
+
+        With ``persist=False`` only the in-memory index is updated (file still growing).
+        """
+        if size is None:
+            try:
+                size = os.stat(path).st_size
+            except FileNotFoundError:
+                return None
+        # WAV: expected bytes check; MP4: basic sanity threshold for video segments
+        if not self._size_ok(media_type, size):
+            return None
+        known = self._segments_today.get(path)
+        if known is not None and known['file_size_bytes'] >= size and (known['persisted'] or not persist):
+            return known
+        info = self._parse_start_only(name)
+        if not info:
+            return None
+        if persist:
+            # Buffer the segment row for this time slice; written by _flush_segments
+            row = self._segment_row(info, media_type, path, size)
+            if row is not None:
+                self._pending_rows.append((path, row))
+        seg = {
+            'path': path,
+            'channel_id': self.channel_id,
+            'recording_id': self.recording_id,
+            'media_type': media_type,
+            'file_size_bytes': size,
+            'persisted': persist,
+            **info,
+        }
+        self._segments_today[path] = seg
+        if known is None:
+            try:
+                self._m_seg[media_type].inc()
+            except Exception:
+                pass
+        return seg
+
+    async def _probe_duration_seconds(self, file_path: str) -> Optional[float]:
         try:
-            import subprocess
-            result = subprocess.run(
-                [
-                    'ffprobe', '-v', 'error',
-                    '-show_entries', 'format=duration',
-                    '-of', 'default=noprint_wrappers=1:nokey=1',
-                    str(file_path)
-                ],
-                capture_output=True, text=True, check=False
+            proc = await asyncio.create_subprocess_exec(
+                'ffprobe', '-v', 'error',
+                '-show_entries', 'format=duration',
+                '-of', 'default=noprint_wrappers=1:nokey=1',
+                str(file_path),
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
             )
-            if result.returncode != 0:
-                return None
-            val = result.stdout.strip()
-            if not val:
-                return None
-            return float(val)
         except Exception:
             return None
+        try:
+            stdout, _ = await asyncio.wait_for(proc.communicate(), timeout=2.0)
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            return None
+        if proc.returncode != 0:
+            return None
+        try:
+            return float(stdout.decode().strip())
+        except ValueError:
+            return None
 
-    async def _cleanup_partials(self):
-        """Delete short/partial segments created right before stop, to keep only full segments."""
-        min_ok = max(10.0, self.segment_seconds * 0.92)  # ~55s for 60s segments
-        # Audio cleanup
-        if self.audio_enabled and self.audio_dir.exists():
-            for fp in self.audio_dir.glob('*.wav'):
-                dur = self._probe_duration_seconds(fp)
-                if dur is None:
-                    # Fallback to size estimation
-                    try:
-                        size = fp.stat().st_size
-                        expected = self.sample_rate * self.channels * 2 * self.segment_seconds
-                        if size < expected * 0.85:
-                            fp.unlink(missing_ok=True)
-                    except FileNotFoundError:
-                        pass
-                else:
-                    if dur < min_ok:
-                        fp.unlink(missing_ok=True)
-        # Video cleanup
-        if self.video_enabled and self.video_dir.exists():
-            for fp in self.video_dir.glob('*.mp4'):
-                dur = self._probe_duration_seconds(fp)
-                if dur is None:
-                    try:
-                        if fp.stat().st_size < 500_000:
-                            fp.unlink(missing_ok=True)
-                    except FileNotFoundError:
-                        pass
-                else:
-                    if dur < min_ok:
-                        fp.unlink(missing_ok=True)
+    async def _scan_and_classify(self, directory: Path, pattern: str, kind: str, tail_only: bool = False) -> SegmentBatch:
+        # Stat + header reads block; run them in a worker thread
+        batch = await asyncio.to_thread(self._scan_and_classify_sync, directory, pattern, kind, tail_only)
+        # ffprobe only for files whose header could not be read
+        missing = [i for i, dur in enumerate(batch.durations) if dur is None]
+        if missing:
+            probed = await asyncio.gather(*(
+                self._probe_duration_seconds(os.path.join(directory, batch.names[i])) for i in missing
+            ))
+            for i, dur in zip(missing, probed):
+                batch.durations[i] = dur
+        return batch
 
-    def _parse_start_only(self, filename: str) -> Optional[Dict[str, Any]]:
+    def _scan_and_classify_sync(self, directory: Path, pattern: str, kind: str, tail_only: bool = False) -> SegmentBatch:
+        """Stat and probe every segment file in ``directory`` (or just the newest) once, column-wise."""
+        batch = SegmentBatch(directory=directory, kind=kind)
+        suffix = pattern.lstrip('*')
         try:
-            stem = filename.rsplit('.', 1)[0]
-            parts = stem.split('-')
-            date_token = parts[-2]
-            time_token = parts[-1]
-            start_dt = datetime.strptime(date_token + time_token, '%Y%m%d%H%M%S').replace(tzinfo=timezone.utc)
-            end_dt = start_dt + timedelta(seconds=self.segment_seconds)
-            return {
-                'started_at': start_dt,
-                'ended_at': end_dt,
-                'duration': float(self.segment_seconds),
-            }
-        except Exception:
-            return None
+            with os.scandir(directory) as it:
+                entries = sorted((e for e in it if e.name.endswith(suffix)), key=lambda e: e.name)
+        except FileNotFoundError:
+            return batch
+        if tail_only:
+            entries = entries[-1:]
+        for entry in entries:
+            try:
+                size = entry.stat().st_size
+            except FileNotFoundError:
+                continue
+            info = self._parse_start_only(entry.name)
+            batch.names.append(entry.name)
+            batch.starts.append(info['started_at'] if info else None)
+            # Header parse is an O(1) read; None here is filled in by ffprobe later
+            batch.durations.append(self._header_duration(entry.path, kind))
+            batch.sizes.append(size)
+        return batch
+
+    def _header_duration(self, path: str, kind: str) -> Optional[float]:
+        if kind == 'video':
+            return _mp4_duration(path)
+        if self.audio_ext == 'flac':
+            return _flac_duration(path)
+        if self.audio_ext == 'opus':
+            return _opus_duration(path)
+        return _wav_duration(path)
+
+    def _size_ok(self, kind: str, size: int) -> bool:
+        if kind == 'audio':
+            return size >= self._min_audio_bytes
+        return size >= self._min_video_bytes
+
+    def _cleanup_partials(self, batch: SegmentBatch) -> Set[int]:
+        """Indices of short/partial segments created right before stop, to keep only full segments."""
+        min_ok = self._min_full_duration
+        doomed: Set[int] = set()
+        for i, dur in enumerate(batch.durations):
+            if dur is None:
+                # Fallback to size estimation
+                if not self._size_ok(batch.kind, batch.sizes[i]):
+                    doomed.add(i)
+            elif dur < min_ok:
+                doomed.add(i)
+        return doomed
 
-    async def _cleanup_extras(self):
+    def _cleanup_extras(self, batch: SegmentBatch, skip: Set[int]) -> Set[int]:
         """Aggressive test cleanup: keep only the earliest full segment per media type in today's folder."""
-        min_ok = max(10.0, self.segment_seconds * 0.92)
-        # Audio
-        if self.audio_enabled and self.audio_dir.exists():
-            candidates: List[tuple[datetime, Path]] = []
-            for fp in sorted(self.audio_dir.glob('*.wav')):
-                info = self._parse_start_only(fp.name)
-                if not info:
-                    continue
-                dur = self._probe_duration_seconds(fp)
-                if dur is None:
-                    try:
-                        size = fp.stat().st_size
-                        expected = self.sample_rate * self.channels * 2 * self.segment_seconds
-                        if size >= expected * 0.85:
-                            candidates.append((info['started_at'], fp))
-                    except FileNotFoundError:
-                        pass
-                elif dur >= min_ok:
-                    candidates.append((info['started_at'], fp))
-            if candidates:
-                candidates.sort(key=lambda x: x[0])
-                keep = candidates[0][1]
-                for _, fp in candidates[1:]:
-                    try:
-                        if fp != keep:
-                            fp.unlink(missing_ok=True)
-                    except FileNotFoundError:
-                        pass
-        # Video
-        if self.video_enabled and self.video_dir.exists():
-            candidates: List[tuple[datetime, Path]] = []
-            for fp in sorted(self.video_dir.glob('*.mp4')):
-                info = self._parse_start_only(fp.name)
-                if not info:
-                    continue
-                dur = self._probe_duration_seconds(fp)
-                if dur is not None and dur >= min_ok:
-                    candidates.append((info['started_at'], fp))
-            if candidates:
-                candidates.sort(key=lambda x: x[0])
-                keep = candidates[0][1]
-                for _, fp in candidates[1:]:
-                    try:
-                        if fp != keep:
-                            fp.unlink(missing_ok=True)
-                    except FileNotFoundError:
-                        pass
+        min_ok = self._min_full_duration
+        candidates: List[tuple[datetime, int]] = []
+        for i, started_at in enumerate(batch.starts):
+            if started_at is None or i in skip:
+                continue
+            dur = batch.durations[i]
+            if dur is None:
+                # Video segments are only trusted when ffprobe can read them
+                if batch.kind == 'audio' and self._size_ok('audio', batch.sizes[i]):
+                    candidates.append((started_at, i))
+            elif dur >= min_ok:
+                candidates.append((started_at, i))
+        candidates.sort(key=lambda x: x[0])
+        return {i for _, i in candidates[1:]}
+
+    async def _unlink_batch(self, batch: SegmentBatch, indices: Set[int]) -> None:
+        paths = [os.path.join(batch.directory, batch.names[i]) for i in sorted(indices)]
+        for path in paths:
+            self._segments_today.pop(path, None)
+        if paths:
+            # One worker-thread hop for the whole batch keeps the loop free during shutdown
+            await asyncio.to_thread(_bulk_unlink, paths)
+
+    def _parse_start_only(self, filename: str) -> Optional[Dict[str, Any]]:
+        parsed = _parse_filename_cached(filename, self.segment_seconds)
+        if parsed is None:
+            return None
+        return {
+            'started_at': parsed[0],
+            'ended_at': parsed[1],
+            'duration': float(self.segment_seconds),
+        }
 
     # -------------------- DB Persistence --------------------
     @contextmanager
@@ -540,10 +965,11 @@ class DualHLSRecorder:
         if not self.recording_id or not self.run_started_at:
             return
         from mobasher.storage.models import Recording, Channel
+        from mobasher.storage.repositories import get_cached_channel
         with self._db_session() as session:
             # Ensure channel exists to satisfy FK on recordings.channel_id
             try:
-                ch = session.get(Channel, self.channel_id)
+                ch = get_cached_channel(session, self.channel_id)
                 if ch is None:
                     input_cfg = self.config.get('input', {})
                     ch = Channel(
@@ -584,63 +1010,57 @@ class DualHLSRecorder:
         name = f"{self.channel_id}:{started_at.isoformat()}"
         return uuid.uuid5(uuid.NAMESPACE_DNS, name)
 
-    def _persist_segment(self, info: Dict[str, Any], media_type: str, file_path: Path, size: int) -> None:
+    def _segment_row(self, info: Dict[str, Any], media_type: str, file_path: str, size: int) -> Optional[Dict[str, Any]]:
         if not self.recording_id or not self.run_started_at:
-            return
+            return None
         # persist only segments within this run window (avoid older files in today's folder)
         if info['started_at'] < self.run_started_at:
+            return None
+        return {
+            'id': self._segment_uuid(info['started_at']),
+            'recording_id': uuid.UUID(self.recording_id),
+            'channel_id': self.channel_id,
+            'started_at': info['started_at'],
+            'ended_at': info['ended_at'],
+            'audio_path': file_path if media_type == 'audio' else None,
+            'video_path': file_path if media_type == 'video' else None,
+            'file_size_bytes': size,
+            'status': 'completed',
+            # Pipeline status policy: both pipelines start pending; they are finalized
+            # when the corresponding media is added or determined to be missing
+            'asr_status': 'pending',
+            'vision_status': 'pending',
+        }
+
+    def _persist_segments_bulk(self, rows: List[Dict[str, Any]]) -> None:
+        """Upsert segment rows in a single INSERT ... ON CONFLICT statement."""
+        if not rows:
             return
-        from mobasher.storage.models import Segment
-        seg_id = self._segment_uuid(info['started_at'])
-        logger.debug(f"Persisting {media_type} segment: {seg_id} | {info['started_at']} | {file_path.name}")
+        from mobasher.storage.repositories import upsert_segments_bulk
+
         with self._db_session() as session:
-            existing = session.get(Segment, (seg_id, info['started_at']))
-            if existing is None:
-                logger.debug(f"Creating new segment for {media_type}: {seg_id}")
-                seg = Segment(
-                    id=seg_id,
-                    recording_id=uuid.UUID(self.recording_id) if self.recording_id else None,
-                    channel_id=self.channel_id,
-                    started_at=info['started_at'],
-                    ended_at=info['ended_at'],
-                    audio_path=str(file_path) if media_type == 'audio' else None,
-                    video_path=str(file_path) if media_type == 'video' else None,
-                    file_size_bytes=size,
-                    status='completed',
-                )
-                # Pipeline status policy: both audio and video are enabled, so both should start as pending
-                # The status will be updated when the corresponding media is added or determined to be missing
-                # Note: Default status is already 'pending' from the model, but being explicit here
-                seg.asr_status = 'pending'      # Will process audio when available
-                seg.vision_status = 'pending'   # Will process video when available
-                session.add(seg)
-            else:
-                logger.debug(f"Updating existing segment for {media_type}: {seg_id} | audio={bool(existing.audio_path)} | video={bool(existing.video_path)}")
-                if media_type == 'audio' and not existing.audio_path:
-                    existing.audio_path = str(file_path)
-                    logger.debug(f"Added audio_path to existing segment: {seg_id}")
-                    # Segment now has audio; ensure ASR will consider it
-                    try:
-                        if existing.asr_status == 'completed':
-                            existing.asr_status = 'pending'
-                    except Exception:
-                        pass
-                if media_type == 'video' and not existing.video_path:
-                    existing.video_path = str(file_path)
-                    logger.debug(f"Added video_path to existing segment: {seg_id}")
-                    # Segment now has video; ensure vision will consider it
-                    try:
-                        if existing.vision_status == 'completed':
-                            existing.vision_status = 'pending'
-                    except Exception:
-                        pass
-                if not existing.file_size_bytes or size > (existing.file_size_bytes or 0):
-                    existing.file_size_bytes = size
-                existing.ended_at = info['ended_at']
-                existing.status = 'completed'
-                session.add(existing)
-            session.commit()
-    
+            n = upsert_segments_bulk(session, rows)
+        logger.debug(f"Persisted {n} segment rows ({len(rows)} files)")
+
+    def _flush_segments(self) -> None:
+        """Write buffered segment rows; full-size WAVs are then skipped on later polls."""
+        rows, self._pending_rows = self._pending_rows, []
+        if not rows:
+            return
+        try:
+            self._persist_segments_bulk([row for _, row in rows])
+        except Exception as e:
+            logger.warning(f"persist segments failed: {len(rows)} rows | {e}")
+            # The index already holds these paths, so they would not be queued
+            # again; keep them buffered for the next flush
+            self._pending_rows[:0] = rows
+            return
+        if self._expected_audio_bytes is None:
+            return
+        for path, row in rows:
+            if row['audio_path'] and (row['file_size_bytes'] or 0) >= self._expected_audio_bytes:
+                self._finalized_paths.add(path)
+
     def _finalize_incomplete_segments(self) -> None:
         """Mark segments as completed for missing media types after a reasonable delay."""
         from mobasher.storage.models import Segment
@@ -686,6 +1106,18 @@ class DualHLSRecorder:
             self.video_restart_count = 0
             self.last_video_restart = now
         
+        # Check shared audio+video process
+        if self.process_recorder and self.process_recorder.returncode is not None:
+            logger.warning(f"Audio+video recorder process terminated with code {self.process_recorder.returncode}")
+            if self.audio_restart_count < self.max_restarts_per_hour:
+                logger.info("Restarting audio+video recorder...")
+                await self._restart_combined_process()
+            else:
+                logger.error("Audio+video recorder restart limit reached, disabling audio/video recording")
+                self.process_recorder = None
+                self.audio_enabled = False
+                self.video_enabled = False
+
         # Check audio process
         if self.audio_enabled and self.process_audio_recorder:
             if self.process_audio_recorder.returncode is not None:
@@ -710,6 +1142,20 @@ class DualHLSRecorder:
                     logger.error("Video recorder restart limit reached, disabling video recording")
                     self.video_enabled = False
     
+    async def _restart_combined_process(self) -> None:
+        """Restart the shared audio+video process (split again if a medium was disabled)."""
+        try:
+            await self._stop_process(self.process_recorder)
+            self.process_recorder = None
+            await self._launch_av_recorders()
+            self.audio_restart_count += 1
+            logger.info(f"Audio+video recorder restarted (attempt {self.audio_restart_count})")
+
+        except Exception as e:
+            logger.error(f"Failed to restart audio+video process: {e}")
+            self.audio_enabled = False
+            self.video_enabled = False
+
     async def _restart_audio_process(self) -> None:
         """Restart the audio recording process."""
         try:
@@ -717,12 +1163,7 @@ class DualHLSRecorder:
                 await self._stop_process(self.process_audio_recorder)
             
             audio_cmd = self._build_audio_command()
-            self.process_audio_recorder = await asyncio.create_subprocess_exec(
-                *audio_cmd,
-                stdout=asyncio.subprocess.PIPE,  # Capture output for debugging
-                stderr=asyncio.subprocess.PIPE,
-                preexec_fn=os.setsid,
-            )
+            self.process_audio_recorder = await self._spawn_ffmpeg(audio_cmd, 'audio')
             self.audio_restart_count += 1
             logger.info(f"Audio recorder restarted (attempt {self.audio_restart_count})")
             
@@ -737,12 +1178,7 @@ class DualHLSRecorder:
                 await self._stop_process(self.process_video_recorder)
             
             video_cmd = self._build_video_command()
-            self.process_video_recorder = await asyncio.create_subprocess_exec(
-                *video_cmd,
-                stdout=asyncio.subprocess.PIPE,  # Capture output for debugging
-                stderr=asyncio.subprocess.PIPE,
-                preexec_fn=os.setsid,
-            )
+            self.process_video_recorder = await self._spawn_ffmpeg(video_cmd, 'video')
             self.video_restart_count += 1
             logger.info(f"Video recorder restarted (attempt {self.video_restart_count})")
             
@@ -753,13 +1189,11 @@ class DualHLSRecorder:
     async def _validate_stream_health(self) -> Dict[str, bool]:
         """Validate that the stream has both audio and video tracks available."""
         stream_url = self.config['input']['url']
-        headers = self.config['input'].get('headers', {})
-        header_string = self._build_header_string(headers)
         
         cmd = ['ffprobe', '-v', 'quiet', '-print_format', 'json', '-show_streams']
-        if header_string:
-            cmd += ['-headers', header_string]
-        cmd += ['-user_agent', headers.get('User-Agent', 'Mobasher/1.0'), stream_url]
+        if self._header_string:
+            cmd += ['-headers', self._header_string]
+        cmd += ['-user_agent', self._user_agent, stream_url]
         
         try:
             proc = await asyncio.create_subprocess_exec(
@@ -842,9 +1276,8 @@ async def main():
         while not stop_event.is_set():
             # Heartbeat status
             try:
-                segs = await recorder.get_new_segments()
-                num_audio = sum(1 for s in segs if s['media_type'] == 'audio')
-                num_video = sum(1 for s in segs if s['media_type'] == 'video')
+                await recorder.refresh_segments()
+                num_audio, num_video = recorder.segment_counts()
                 
                 # Finalize incomplete segments (mark missing media as completed)
                 recorder._finalize_incomplete_segments()
@@ -869,9 +1302,9 @@ async def main():
                         logger.warning(f"Stream health check failed: {e}")
                 
                 try:
-                    recorder.metrics_heartbeat.labels(channel_id=recorder.channel_id).inc()
+                    recorder._m_hb.inc()
                     import time as _t
-                    recorder.metrics_last_hb.labels(channel_id=recorder.channel_id).set(_t.time())
+                    recorder._m_last_hb.set(_t.time())
                 except Exception:
                     pass
                 logger.info(
@@ -891,9 +1324,8 @@ async def main():
     finally:
         await recorder.stop_recording()
         # Final summary
-        segs = await recorder.get_new_segments()
-        num_audio = sum(1 for s in segs if s['media_type'] == 'audio')
-        num_video = sum(1 for s in segs if s['media_type'] == 'video')
+        await recorder.refresh_segments()
+        num_audio, num_video = recorder.segment_counts()
         logger.info(f'stopped | audio_segments_today={num_audio} | video_segments_today={num_video}')
 
 
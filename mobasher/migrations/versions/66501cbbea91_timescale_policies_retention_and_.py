@@ -5,6 +5,7 @@ Revises: f761abb86757
 Create Date: 2025-09-05 19:56:39.839217
 
 """
+import os
 from typing import Sequence, Union
 
 from alembic import op
@@ -17,111 +18,78 @@ down_revision: Union[str, Sequence[str], None] = 'f761abb86757'
 branch_labels: Union[str, Sequence[str], None] = None
 depends_on: Union[str, Sequence[str], None] = None
 
+_CHUNK_INTERVALS = {
+    'recordings': '7 days',
+    'segments': '1 day',
+    'visual_events': '1 hour',
+    'system_metrics': '1 day',
+}
+
 
 def upgrade() -> None:
     """Upgrade schema."""
-    # Enable compression on hypertables and add retention/compression policies (idempotent)
-    op.execute("ALTER TABLE IF EXISTS recordings SET (timescaledb.compress, timescaledb.compress_segmentby = 'channel_id')")
-    op.execute("ALTER TABLE IF EXISTS segments SET (timescaledb.compress, timescaledb.compress_segmentby = 'channel_id')")
-    op.execute("ALTER TABLE IF EXISTS visual_events SET (timescaledb.compress, timescaledb.compress_segmentby = 'channel_id')")
-    op.execute("ALTER TABLE IF EXISTS system_metrics SET (timescaledb.compress, timescaledb.compress_segmentby = 'metric_name')")
-
-    # Add compression policies if missing
+    # Enable compression on hypertables and add retention/compression policies (idempotent).
+    # segmentby groups rows that are filtered together; orderby on the time column keeps each
+    # compressed batch sorted so range scans decompress contiguous runs.
     op.execute(
-        """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_compression' AND hypertable_name = 'recordings'
-            ) THEN
-                PERFORM add_compression_policy('recordings', INTERVAL '7 days');
-            END IF;
-        END$$;
-        """
+        "ALTER TABLE IF EXISTS recordings SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'channel_id', timescaledb.compress_orderby = 'started_at DESC')"
     )
     op.execute(
-        """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_compression' AND hypertable_name = 'segments'
-            ) THEN
-                PERFORM add_compression_policy('segments', INTERVAL '7 days');
-            END IF;
-        END$$;
-        """
+        "ALTER TABLE IF EXISTS segments SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'channel_id', timescaledb.compress_orderby = 'started_at DESC')"
     )
     op.execute(
-        """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_compression' AND hypertable_name = 'visual_events'
-            ) THEN
-                PERFORM add_compression_policy('visual_events', INTERVAL '1 day');
-            END IF;
-        END$$;
-        """
+        "ALTER TABLE IF EXISTS visual_events SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'channel_id, event_type', timescaledb.compress_orderby = 'created_at DESC')"
     )
     op.execute(
-        """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_compression' AND hypertable_name = 'system_metrics'
-            ) THEN
-                PERFORM add_compression_policy('system_metrics', INTERVAL '1 day');
-            END IF;
-        END$$;
-        """
+        "ALTER TABLE IF EXISTS system_metrics SET (timescaledb.compress, "
+        "timescaledb.compress_segmentby = 'metric_name', timescaledb.compress_orderby = 'timestamp DESC')"
     )
 
-    # Add retention policies if missing
-    op.execute(
-        """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_retention' AND hypertable_name = 'recordings'
-            ) THEN
-                PERFORM add_retention_policy('recordings', INTERVAL '365 days');
-            END IF;
-        END$$;
-        """
-    )
-    op.execute(
-        """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_retention' AND hypertable_name = 'segments'
-            ) THEN
-                PERFORM add_retention_policy('segments', INTERVAL '365 days');
-            END IF;
-        END$$;
-        """
-    )
-    op.execute(
-        """
-        DO $$
-        BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_retention' AND hypertable_name = 'visual_events'
-            ) THEN
-                PERFORM add_retention_policy('visual_events', INTERVAL '90 days');
-            END IF;
-        END$$;
-        """
-    )
+    # Chunk intervals per hypertable (only affects chunks created from now on). Size so the
+    # active chunk and its indexes fit in ~25% of shared_buffers; override via TS_CHUNK_INTERVAL_<TABLE>.
+    for table, default in _CHUNK_INTERVALS.items():
+        interval = os.getenv(f"TS_CHUNK_INTERVAL_{table.upper()}", default)
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+                IF to_regclass('{table}') IS NOT NULL THEN
+                    PERFORM set_chunk_time_interval('{table}', INTERVAL '{interval}');
+                END IF;
+            END$$;
+            """
+        )
+
+    # Add compression and retention policies if missing, in one plpgsql block:
+    # (hypertable, compress_after, drop_after)
     op.execute(
         """
         DO $$
+        DECLARE
+            r record;
         BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_retention' AND hypertable_name = 'system_metrics'
-            ) THEN
-                PERFORM add_retention_policy('system_metrics', INTERVAL '90 days');
-            END IF;
+            FOR r IN
+                SELECT * FROM (VALUES
+                    ('recordings', INTERVAL '7 days', INTERVAL '365 days'),
+                    ('segments', INTERVAL '7 days', INTERVAL '365 days'),
+                    ('visual_events', INTERVAL '1 day', INTERVAL '90 days'),
+                    ('system_metrics', INTERVAL '1 day', INTERVAL '90 days')
+                ) AS t(hypertable, compress_after, drop_after)
+            LOOP
+                IF NOT EXISTS (
+                    SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_compression' AND hypertable_name = r.hypertable
+                ) THEN
+                    PERFORM add_compression_policy(r.hypertable::regclass, r.compress_after);
+                END IF;
+                IF NOT EXISTS (
+                    SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_retention' AND hypertable_name = r.hypertable
+                ) THEN
+                    PERFORM add_retention_policy(r.hypertable::regclass, r.drop_after);
+                END IF;
+            END LOOP;
         END$$;
         """
     )
@@ -130,25 +98,25 @@ def upgrade() -> None:
 def downgrade() -> None:
     """Downgrade schema."""
     # Remove policies if they exist; leave compression setting as-is
-    def remove_if_exists(proc: str, hypertable: str, remove_sql: str) -> None:
-        op.execute(
-            f"""
-            DO $$
-            BEGIN
+    op.execute(
+        """
+        DO $$
+        DECLARE
+            h text;
+        BEGIN
+            FOREACH h IN ARRAY ARRAY['recordings', 'segments', 'visual_events', 'system_metrics']
+            LOOP
                 IF EXISTS (
-                    SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = '{proc}' AND hypertable_name = '{hypertable}'
+                    SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_compression' AND hypertable_name = h
                 ) THEN
-                    PERFORM {remove_sql};
+                    PERFORM remove_compression_policy(h::regclass);
                 END IF;
-            END$$;
-            """
-        )
-
-    remove_if_exists('policy_compression', 'recordings', "remove_compression_policy('recordings')")
-    remove_if_exists('policy_retention', 'recordings', "remove_retention_policy('recordings')")
-    remove_if_exists('policy_compression', 'segments', "remove_compression_policy('segments')")
-    remove_if_exists('policy_retention', 'segments', "remove_retention_policy('segments')")
-    remove_if_exists('policy_compression', 'visual_events', "remove_compression_policy('visual_events')")
-    remove_if_exists('policy_retention', 'visual_events', "remove_retention_policy('visual_events')")
-    remove_if_exists('policy_compression', 'system_metrics', "remove_compression_policy('system_metrics')")
-    remove_if_exists('policy_retention', 'system_metrics', "remove_retention_policy('system_metrics')")
+                IF EXISTS (
+                    SELECT 1 FROM timescaledb_information.jobs WHERE proc_name = 'policy_retention' AND hypertable_name = h
+                ) THEN
+                    PERFORM remove_retention_policy(h::regclass);
+                END IF;
+            END LOOP;
+        END$$;
+        """
+    )
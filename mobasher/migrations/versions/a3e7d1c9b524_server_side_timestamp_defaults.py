@@ -0,0 +1,64 @@
+"""server-side now() defaults for created_at/updated_at/timestamp
+
+Revision ID: a3e7d1c9b524
+Revises: f9c7a3d5e182
+Create Date: 2025-09-21 14:08:51.502317
+
+"""
+from typing import Dict, List, Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3e7d1c9b524'
+down_revision: Union[str, Sequence[str], None] = 'f9c7a3d5e182'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Columns the models now fill with server_default=func.now()
+_COLUMNS: Dict[str, List[str]] = {
+    'channels': ['created_at', 'updated_at'],
+    'recordings': ['created_at', 'updated_at'],
+    'segments': ['created_at', 'updated_at'],
+    'transcripts': ['created_at', 'updated_at'],
+    'segment_embeddings': ['created_at', 'updated_at'],
+    'visual_events': ['created_at', 'updated_at'],
+    'system_metrics': ['timestamp'],
+    'screenshots': ['created_at'],
+    'entities': ['created_at'],
+    'alerts': ['created_at'],
+}
+
+# Of those, the ones that had no default before this revision
+_ADDED: Dict[str, List[str]] = {
+    'recordings': ['updated_at'],
+    'segments': ['updated_at'],
+    'transcripts': ['updated_at'],
+    'segment_embeddings': ['updated_at'],
+    'visual_events': ['updated_at'],
+    'screenshots': ['created_at'],
+    'entities': ['created_at'],
+    'alerts': ['created_at'],
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Only the column default changes (no rewrite); allowed on compressed hypertables too
+    for table, columns in _COLUMNS.items():
+        op.execute(
+            f"ALTER TABLE IF EXISTS {table} "
+            + ", ".join(f'ALTER COLUMN "{c}" SET DEFAULT now()' for c in columns)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # created_at/timestamp on the schema.sql tables already defaulted to now(); drop only ours
+    for table, columns in _ADDED.items():
+        op.execute(
+            f"ALTER TABLE IF EXISTS {table} "
+            + ", ".join(f'ALTER COLUMN "{c}" DROP DEFAULT' for c in columns)
+        )
@@ -0,0 +1,93 @@
+"""store JSON columns as jsonb; GIN indexes on visual_events.data and system_metrics.tags
+
+Revision ID: b7e2d5a0c913
+Revises: a4c81f3e9d26
+Create Date: 2025-09-21 10:03:17.226481
+
+"""
+from typing import Dict, List, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e2d5a0c913'
+down_revision: Union[str, Sequence[str], None] = 'a4c81f3e9d26'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table -> columns (column, has '{}' server default)
+_COLUMNS: Dict[str, List[Tuple[str, bool]]] = {
+    'channels': [('headers', True)],
+    'recordings': [('extra', False)],
+    'segments': [('extra', False)],
+    'transcripts': [('words', False)],
+    'visual_events': [('data', False)],
+    'system_metrics': [('tags', True)],
+    'alerts': [('payload_json', False)],
+}
+
+# Compressed hypertables must be decompressed and have compression switched off to change a
+# column type; settings mirror 66501cbbea91: (segmentby, orderby, compress_after)
+_COMPRESSED: Dict[str, Tuple[str, str, str]] = {
+    'recordings': ('channel_id', 'started_at DESC', '7 days'),
+    'segments': ('channel_id', 'started_at DESC', '7 days'),
+    'visual_events': ('channel_id, event_type', 'created_at DESC', '1 day'),
+    'system_metrics': ('metric_name', 'timestamp DESC', '1 day'),
+}
+
+
+def _alter_sql(table: str, type_: str) -> str:
+    parts = []
+    for column, has_default in _COLUMNS[table]:
+        parts.append(f"ALTER COLUMN {column} DROP DEFAULT")
+        parts.append(f"ALTER COLUMN {column} TYPE {type_} USING {column}::{type_}")
+        if has_default:
+            parts.append(f"ALTER COLUMN {column} SET DEFAULT '{{}}'::{type_}")
+    return f"ALTER TABLE {table} " + ", ".join(parts)
+
+
+def _retype(table: str, type_: str) -> None:
+    alter = _alter_sql(table, type_)
+    if table not in _COMPRESSED:
+        op.execute(alter)
+        return
+    segmentby, orderby, compress_after = _COMPRESSED[table]
+    op.execute(
+        f"""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = '{table}' AND compression_enabled
+            ) THEN
+                PERFORM remove_compression_policy('{table}', if_exists => true);
+                PERFORM decompress_chunk(c, true) FROM show_chunks('{table}') c;
+                ALTER TABLE {table} SET (timescaledb.compress = false);
+                {alter};
+                ALTER TABLE {table} SET (timescaledb.compress,
+                    timescaledb.compress_segmentby = '{segmentby}', timescaledb.compress_orderby = '{orderby}');
+                PERFORM add_compression_policy('{table}', INTERVAL '{compress_after}');
+            ELSE
+                {alter};
+            END IF;
+        END$$;
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # jsonb is stored parsed (no re-parse on read) and supports GIN containment indexes
+    for table in _COLUMNS:
+        _retype(table, 'jsonb')
+    op.create_index('idx_visual_events_data_gin', 'visual_events', ['data'], unique=False, postgresql_using='gin')
+    op.create_index('idx_system_metrics_tags_gin', 'system_metrics', ['tags'], unique=False, postgresql_using='gin')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('idx_system_metrics_tags_gin', table_name='system_metrics')
+    op.drop_index('idx_visual_events_data_gin', table_name='visual_events')
+    for table in _COLUMNS:
+        _retype(table, 'json')
@@ -0,0 +1,45 @@
+"""partial indexes on hot (in-progress) recording and segment statuses
+
+Revision ID: b8d2f4a6c031
+Revises: a3e7d1c9b524
+Create Date: 2025-09-21 15:32:10.874215
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b8d2f4a6c031'
+down_revision: Union[str, Sequence[str], None] = 'a3e7d1c9b524'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (index, table, columns, predicate)
+_INDEXES = (
+    ('idx_recordings_running', 'recordings', 'channel_id, started_at DESC', "status = 'running'"),
+    ('idx_segments_pending', 'segments', 'started_at', "status IN ('created', 'processing')"),
+    (
+        'idx_segments_pipeline_pending', 'segments', 'channel_id, started_at',
+        "asr_status = 'pending' OR vision_status = 'pending'",
+    ),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Hypertables: build per chunk outside the migration transaction
+    with context.autocommit_block():
+        for name, table, columns, where in _INDEXES:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns}) "
+                f"WITH (timescaledb.transaction_per_chunk) WHERE {where}"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, _, _ in _INDEXES:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,46 @@
+"""pgvector: store segment_embeddings.vector as halfvec and index with HNSW
+
+Revision ID: c3d9a1e5f207
+Revises: aaa2a180b9f7
+Create Date: 2025-09-20 10:14:37.512908
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c3d9a1e5f207'
+down_revision: Union[str, Sequence[str], None] = 'aaa2a180b9f7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # halfvec halves index/heap size; the IVFFlat index is bound to vector_l2_ops so drop it first
+    op.execute("DROP INDEX IF EXISTS idx_segment_embeddings_vector")
+    op.execute(
+        "ALTER TABLE segment_embeddings ALTER COLUMN vector TYPE halfvec(384) USING vector::halfvec(384)"
+    )
+    # HNSW graph build is memory bound; query-time recall is tuned with hnsw.ef_search (DB_HNSW_EF_SEARCH)
+    op.execute("SET LOCAL maintenance_work_mem = '2GB'")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_segment_embeddings_vector ON segment_embeddings "
+        "USING hnsw (vector halfvec_l2_ops) WITH (m = 16, ef_construction = 64)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_segment_embeddings_vector")
+    op.execute(
+        "ALTER TABLE segment_embeddings ALTER COLUMN vector TYPE vector(384) USING vector::vector(384)"
+    )
+    op.execute("SET LOCAL maintenance_work_mem = '2GB'")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_segment_embeddings_vector ON segment_embeddings "
+        "USING ivfflat (vector vector_l2_ops) WITH (lists = 100)"
+    )
@@ -0,0 +1,58 @@
+"""transcript_words: row-per-word timestamps (hypertable)
+
+Revision ID: c4a9e2f7d615
+Revises: b8d2f4a6c031
+Create Date: 2025-09-21 16:47:29.310458
+
+"""
+import os
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4a9e2f7d615'
+down_revision: Union[str, Sequence[str], None] = 'b8d2f4a6c031'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('transcript_words',
+    sa.Column('segment_id', postgresql.UUID(as_uuid=True), nullable=False),
+    sa.Column('segment_started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('idx', sa.Integer(), nullable=False),
+    sa.Column('word', sa.Text(), nullable=False),
+    sa.Column('start_ms', sa.Integer(), nullable=True),
+    sa.Column('end_ms', sa.Integer(), nullable=True),
+    sa.Column('confidence', sa.REAL(), nullable=True),
+    sa.PrimaryKeyConstraint('segment_id', 'segment_started_at', 'idx', name='pk_transcript_words')
+    )
+    interval = os.getenv("TS_CHUNK_INTERVAL_TRANSCRIPT_WORDS", "1 day")
+    op.execute(
+        f"""
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'timescaledb') THEN
+                PERFORM create_hypertable('transcript_words', 'segment_started_at',
+                    chunk_time_interval => INTERVAL '{interval}', if_not_exists => TRUE);
+            END IF;
+        END$$;
+        """
+    )
+    op.create_index('idx_transcript_words_word', 'transcript_words', ['word'], unique=False)
+    op.create_index(
+        'brin_transcript_words_started_at', 'transcript_words', ['segment_started_at'], unique=False,
+        postgresql_using='brin', postgresql_with={'pages_per_range': 32},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('brin_transcript_words_started_at', table_name='transcript_words')
+    op.drop_index('idx_transcript_words_word', table_name='transcript_words')
+    op.drop_table('transcript_words')
@@ -0,0 +1,73 @@
+"""narrow confidence/offset/metric columns from double precision to real
+
+Revision ID: c5f19a2b7e40
+Revises: b7e2d5a0c913
+Create Date: 2025-09-21 10:48:55.671302
+
+"""
+from typing import Dict, List, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f19a2b7e40'
+down_revision: Union[str, Sequence[str], None] = 'b7e2d5a0c913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_COLUMNS: Dict[str, List[str]] = {
+    'transcripts': ['confidence'],
+    'visual_events': ['confidence', 'timestamp_offset'],
+    'system_metrics': ['metric_value'],
+}
+
+# Compressed hypertables (settings as in 66501cbbea91): (segmentby, orderby, compress_after)
+_COMPRESSED: Dict[str, Tuple[str, str, str]] = {
+    'visual_events': ('channel_id, event_type', 'created_at DESC', '1 day'),
+    'system_metrics': ('metric_name', 'timestamp DESC', '1 day'),
+}
+
+
+def _retype(table: str, type_: str) -> None:
+    alter = f"ALTER TABLE {table} " + ", ".join(
+        f"ALTER COLUMN {column} TYPE {type_} USING {column}::{type_}" for column in _COLUMNS[table]
+    )
+    if table not in _COMPRESSED:
+        op.execute(alter)
+        return
+    segmentby, orderby, compress_after = _COMPRESSED[table]
+    op.execute(
+        f"""
+        DO $$
+        BEGIN
+            IF EXISTS (
+                SELECT 1 FROM timescaledb_information.hypertables WHERE hypertable_name = '{table}' AND compression_enabled
+            ) THEN
+                PERFORM remove_compression_policy('{table}', if_exists => true);
+                PERFORM decompress_chunk(c, true) FROM show_chunks('{table}') c;
+                ALTER TABLE {table} SET (timescaledb.compress = false);
+                {alter};
+                ALTER TABLE {table} SET (timescaledb.compress,
+                    timescaledb.compress_segmentby = '{segmentby}', timescaledb.compress_orderby = '{orderby}');
+                PERFORM add_compression_policy('{table}', INTERVAL '{compress_after}');
+            ELSE
+                {alter};
+            END IF;
+        END$$;
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 4-byte real is ample for scores, second offsets within a segment and gauge values
+    for table in _COLUMNS:
+        _retype(table, 'real')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in _COLUMNS:
+        _retype(table, 'double precision')
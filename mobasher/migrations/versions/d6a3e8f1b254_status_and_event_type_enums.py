@@ -0,0 +1,119 @@
+"""native enums for recordings.status, segments.status and visual_events.event_type
+
+Revision ID: d6a3e8f1b254
+Revises: c5f19a2b7e40
+Create Date: 2025-09-21 11:31:09.404758
+
+"""
+from typing import Dict, Optional, Sequence, Tuple, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6a3e8f1b254'
+down_revision: Union[str, Sequence[str], None] = 'c5f19a2b7e40'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_ENUMS: Dict[str, Tuple[str, ...]] = {
+    'recording_status': ('running', 'completed', 'failed', 'stopped'),
+    'segment_status': ('created', 'processing', 'completed', 'failed'),
+    'visual_event_type': ('object', 'face', 'ocr', 'logo', 'scene_change'),
+}
+
+# table -> (column, enum type, server default)
+_COLUMNS: Dict[str, Tuple[str, str, Optional[str]]] = {
+    'recordings': ('status', 'recording_status', 'running'),
+    'segments': ('status', 'segment_status', 'created'),
+    'visual_events': ('event_type', 'visual_event_type', None),
+}
+
+# Compressed hypertables (settings as in 66501cbbea91): (segmentby, orderby, compress_after)
+_COMPRESSED: Dict[str, Tuple[str, str, str]] = {
+    'recordings': ('channel_id', 'started_at DESC', '7 days'),
+    'segments': ('channel_id', 'started_at DESC', '7 days'),
+    'visual_events': ('channel_id, event_type', 'created_at DESC', '1 day'),
+}
+
+
+def _retype(table: str, type_: str, drop_check: bool) -> str:
+    column, _, default = _COLUMNS[table]
+    steps = []
+    if drop_check:
+        # CHECK (col IN (...text...)) cannot be evaluated against the enum; the type enforces it now
+        steps.append(
+            f"""
+            FOR con IN
+                SELECT conname FROM pg_constraint
+                WHERE conrelid = '{table}'::regclass AND contype = 'c'
+                  AND pg_get_constraintdef(oid) ~ '\\m{column}\\M'
+            LOOP
+                EXECUTE format('ALTER TABLE {table} DROP CONSTRAINT %I', con);
+            END LOOP;
+            """
+        )
+    alter = [f"ALTER COLUMN {column} DROP DEFAULT", f"ALTER COLUMN {column} TYPE {type_} USING {column}::text::{type_}"]
+    if default is not None:
+        alter.append(f"ALTER COLUMN {column} SET DEFAULT '{default}'::{type_}")
+    steps.append(f"ALTER TABLE {table} " + ", ".join(alter) + ";")
+    return "\n".join(steps)
+
+
+def _apply(table: str, body: str) -> None:
+    segmentby, orderby, compress_after = _COMPRESSED[table]
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            con name;
+            compressed boolean;
+        BEGIN
+            SELECT COALESCE(bool_or(compression_enabled), false) INTO compressed
+            FROM timescaledb_information.hypertables WHERE hypertable_name = '{table}';
+            IF compressed THEN
+                PERFORM remove_compression_policy('{table}', if_exists => true);
+                PERFORM decompress_chunk(c, true) FROM show_chunks('{table}') c;
+                ALTER TABLE {table} SET (timescaledb.compress = false);
+            END IF;
+            {body}
+            IF compressed THEN
+                ALTER TABLE {table} SET (timescaledb.compress,
+                    timescaledb.compress_segmentby = '{segmentby}', timescaledb.compress_orderby = '{orderby}');
+                PERFORM add_compression_policy('{table}', INTERVAL '{compress_after}');
+            END IF;
+        END$$;
+        """
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 4-byte enum OIDs instead of short text; vocabulary enforced by the type instead of CHECKs
+    for name, values in _ENUMS.items():
+        labels = ", ".join(f"''{v}''" for v in values)
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+                IF NOT EXISTS (SELECT 1 FROM pg_type WHERE typname = '{name}') THEN
+                    EXECUTE 'CREATE TYPE {name} AS ENUM ({labels})';
+                END IF;
+            END$$;
+            """
+        )
+    for table, (_, enum_name, _) in _COLUMNS.items():
+        _apply(table, _retype(table, enum_name, drop_check=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table, (column, enum_name, _) in _COLUMNS.items():
+        values = ", ".join(f"'{v}'" for v in _ENUMS[enum_name])
+        body = _retype(table, 'text', drop_check=False) + (
+            f"\nALTER TABLE {table} ADD CONSTRAINT ck_{table}_{column} CHECK ({column} IN ({values}));"
+        )
+        _apply(table, body)
+    for name in _ENUMS:
+        op.execute(f"DROP TYPE IF EXISTS {name}")
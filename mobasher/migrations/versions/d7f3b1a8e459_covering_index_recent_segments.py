@@ -0,0 +1,37 @@
+"""covering (INCLUDE) index for latest segments per channel
+
+Revision ID: d7f3b1a8e459
+Revises: c4a9e2f7d615
+Create Date: 2025-09-21 17:25:46.092183
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd7f3b1a8e459'
+down_revision: Union[str, Sequence[str], None] = 'c4a9e2f7d615'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Same key as idx_segments_channel_time_desc plus the columns recent-segment reads need,
+    # so they can be answered by an index-only scan; the old index becomes redundant.
+    with context.autocommit_block():
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_segments_recent_covering ON segments (channel_id, started_at DESC) "
+            "INCLUDE (id, ended_at, status, audio_path, video_path) "
+            "WITH (timescaledb.transaction_per_chunk)"
+        )
+        op.execute("DROP INDEX IF EXISTS idx_segments_channel_time_desc")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("CREATE INDEX IF NOT EXISTS idx_segments_channel_time_desc ON segments (channel_id, started_at DESC)")
+    op.execute("DROP INDEX IF EXISTS idx_segments_recent_covering")
@@ -0,0 +1,57 @@
+"""unique keys on entities and alerts so NLP task retries are idempotent
+
+Revision ID: d81e4b7f5a92
+Revises: c3d9a1e5f207
+Create Date: 2025-09-20 11:02:48.604117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd81e4b7f5a92'
+down_revision: Union[str, Sequence[str], None] = 'c3d9a1e5f207'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Drop duplicates left by earlier task retries, keeping the oldest row of each key
+    op.execute(
+        """
+        DELETE FROM entities a USING entities b
+        WHERE a.segment_id = b.segment_id AND a.started_at = b.started_at
+          AND a.label = b.label AND a.text = b.text
+          AND a.char_start IS NOT DISTINCT FROM b.char_start
+          AND a.model IS NOT DISTINCT FROM b.model
+          AND (a.created_at, a.id) > (b.created_at, b.id)
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM alerts a USING alerts b
+        WHERE a.segment_id IS NOT DISTINCT FROM b.segment_id
+          AND a.matched_phrase = b.matched_phrase
+          AND a.category IS NOT DISTINCT FROM b.category
+          AND (a.created_at, a.id) > (b.created_at, b.id)
+        """
+    )
+    # NULLS NOT DISTINCT (PostgreSQL 15+): heuristic entities have no char_start, alerts may lack a category
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_entities_segment_match ON entities "
+        "(segment_id, started_at, label, text, char_start, model) NULLS NOT DISTINCT"
+    )
+    op.execute(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_alerts_segment_phrase ON alerts "
+        "(segment_id, matched_phrase, category) NULLS NOT DISTINCT"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('uq_alerts_segment_phrase', table_name='alerts')
+    op.drop_index('uq_entities_segment_match', table_name='entities')
@@ -0,0 +1,39 @@
+"""transcripts.text_tsv generated tsvector + GIN index for full-text search
+
+Revision ID: e2c6a9d4f371
+Revises: d7f3b1a8e459
+Create Date: 2025-09-21 18:10:37.661920
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2c6a9d4f371'
+down_revision: Union[str, Sequence[str], None] = 'd7f3b1a8e459'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # 'simple' config over the normalized text: no stemming, but the same letter folding the
+    # query side applies; stored so the GIN index and matches don't re-tokenize per row
+    op.execute(
+        "ALTER TABLE transcripts ADD COLUMN IF NOT EXISTS text_tsv tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple', coalesce(text_norm, text))) STORED"
+    )
+    with context.autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_transcripts_text_tsv "
+            "ON transcripts USING gin (text_tsv)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_transcripts_text_tsv")
+    op.execute("ALTER TABLE transcripts DROP COLUMN IF EXISTS text_tsv")
@@ -0,0 +1,49 @@
+"""notify transcript_ready on transcript insert/update for the NLP scheduler
+
+Revision ID: e5a2c7d9b013
+Revises: d81e4b7f5a92
+Create Date: 2025-09-20 11:40:05.318226
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a2c7d9b013'
+down_revision: Union[str, Sequence[str], None] = 'd81e4b7f5a92'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Payload: "<segment_id>,<segment_started_at ISO-8601>,<channel_id>"; delivered on commit
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION transcript_notify() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify(
+                'transcript_ready',
+                NEW.segment_id::text || ',' || (to_json(NEW.segment_started_at) #>> '{}') || ',' ||
+                COALESCE((SELECT s.channel_id FROM segments s
+                          WHERE s.id = NEW.segment_id AND s.started_at = NEW.segment_started_at), '')
+            );
+            RETURN NULL;
+        END
+        $$ LANGUAGE plpgsql;
+        """
+    )
+    op.execute("DROP TRIGGER IF EXISTS transcript_notify ON transcripts")
+    op.execute(
+        "CREATE TRIGGER transcript_notify AFTER INSERT OR UPDATE OF text ON transcripts "
+        "FOR EACH ROW EXECUTE FUNCTION transcript_notify()"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER IF EXISTS transcript_notify ON transcripts")
+    op.execute("DROP FUNCTION IF EXISTS transcript_notify()")
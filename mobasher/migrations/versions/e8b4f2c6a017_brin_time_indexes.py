@@ -0,0 +1,42 @@
+"""BRIN indexes on hypertable time columns
+
+Revision ID: e8b4f2c6a017
+Revises: d6a3e8f1b254
+Create Date: 2025-09-21 12:10:42.930185
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b4f2c6a017'
+down_revision: Union[str, Sequence[str], None] = 'd6a3e8f1b254'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+_BRIN = (
+    ('brin_recordings_started_at', 'recordings', 'started_at'),
+    ('brin_segments_started_at', 'segments', 'started_at'),
+    ('brin_visual_events_created_at', 'visual_events', 'created_at'),
+    ('brin_system_metrics_timestamp', 'system_metrics', 'timestamp'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Hypertables: built one chunk per transaction, outside the migration transaction
+    with context.autocommit_block():
+        for name, table, column in _BRIN:
+            op.execute(
+                f'CREATE INDEX IF NOT EXISTS {name} ON {table} USING brin ("{column}") '
+                "WITH (pages_per_range = 32, timescaledb.transaction_per_chunk)"
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, _ in _BRIN:
+        op.execute(f"DROP INDEX IF EXISTS {name}")
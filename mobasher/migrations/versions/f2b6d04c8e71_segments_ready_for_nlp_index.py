@@ -0,0 +1,36 @@
+"""partial index on segments for the NLP scheduler lookback
+
+Revision ID: f2b6d04c8e71
+Revises: e5a2c7d9b013
+Create Date: 2025-09-20 12:05:51.027734
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2b6d04c8e71'
+down_revision: Union[str, Sequence[str], None] = 'e5a2c7d9b013'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # segments is a hypertable: CONCURRENTLY is not supported there, so build chunk by chunk
+    # (one short transaction per chunk) outside the migration transaction instead.
+    # started_at DESC alone is already covered by the hypertable's default time index.
+    with context.autocommit_block():
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_segments_ready_for_nlp ON segments (started_at DESC) "
+            "INCLUDE (id, channel_id) WHERE asr_status = 'completed' "
+            "WITH (timescaledb.transaction_per_chunk)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_segments_ready_for_nlp")
@@ -0,0 +1,34 @@
+"""partial index for the ASR backlog (segments with audio awaiting a transcript)
+
+Revision ID: f5b8c3e1a742
+Revises: e2c6a9d4f371
+Create Date: 2025-09-22 09:14:52.417305
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f5b8c3e1a742'
+down_revision: Union[str, Sequence[str], None] = 'e2c6a9d4f371'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # segments is a hypertable: build chunk by chunk outside the migration transaction
+    with context.autocommit_block():
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS idx_segments_missing_tr ON segments (channel_id, started_at DESC) "
+            "WITH (timescaledb.transaction_per_chunk) "
+            "WHERE audio_path IS NOT NULL AND status = 'completed'"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_segments_missing_tr")
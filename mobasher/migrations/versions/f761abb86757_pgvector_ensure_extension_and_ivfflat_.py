@@ -5,9 +5,10 @@ Revises: b6aa81e4e7b3
 Create Date: 2025-09-05 19:55:12.227222
 
 """
+import math
 from typing import Sequence, Union
 
-from alembic import op
+from alembic import context, op
 import sqlalchemy as sa
 
 
@@ -22,22 +23,52 @@ def upgrade() -> None:
     """Upgrade schema."""
     # Ensure pgvector extension exists
     op.execute("CREATE EXTENSION IF NOT EXISTS vector")
-    # Create IVFFlat index for faster similarity search (requires rows present to vacuum/analyze before use)
+    # Create IVFFlat index for faster similarity search (requires rows present to vacuum/analyze before use).
+    # lists follows pgvector guidance for the current row estimate (rows/1000 up to 1M rows,
+    # sqrt(rows) beyond, clamped to [10, 4000]); probes ~ sqrt(lists) is stored as the database default.
+    # Built CONCURRENTLY outside the migration transaction so ingestion keeps writing during the build.
+    with context.autocommit_block():
+        n = 0
+        if not context.is_offline_mode():
+            n = op.get_bind().execute(
+                sa.text(
+                    "SELECT GREATEST(COALESCE(MAX(reltuples), 0), 0)::bigint FROM pg_class "
+                    "WHERE oid = to_regclass('segment_embeddings')"
+                )
+            ).scalar() or 0
+        lists = min(max(int(math.sqrt(n)) if n > 1_000_000 else n // 1000, 10), 4000)
+        op.execute("SET maintenance_work_mem = '2GB'")
+        op.execute("SET max_parallel_maintenance_workers = 4")
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_segment_embeddings_vector ON segment_embeddings "
+            f"USING ivfflat (vector vector_l2_ops) WITH (lists = {lists})"
+        )
+        op.execute("RESET max_parallel_maintenance_workers")
+        op.execute("RESET maintenance_work_mem")
+        op.execute(
+            f"""
+            DO $$
+            BEGIN
+                EXECUTE format('ALTER DATABASE %I SET ivfflat.probes = %s', current_database(), {max(int(math.sqrt(lists)), 1)});
+            EXCEPTION WHEN insufficient_privilege THEN
+                RAISE NOTICE 'ivfflat.probes not persisted: not the database owner';
+            END
+            $$;
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS idx_segment_embeddings_vector")
     op.execute(
         """
         DO $$
         BEGIN
-            IF NOT EXISTS (
-                SELECT 1 FROM pg_indexes WHERE schemaname = current_schema() AND indexname = 'idx_segment_embeddings_vector'
-            ) THEN
-                CREATE INDEX idx_segment_embeddings_vector ON segment_embeddings USING ivfflat (vector vector_l2_ops) WITH (lists = 100);
-            END IF;
+            EXECUTE format('ALTER DATABASE %I RESET ivfflat.probes', current_database());
+        EXCEPTION WHEN insufficient_privilege THEN
+            NULL;
         END
         $$;
         """
     )
-
-
-def downgrade() -> None:
-    """Downgrade schema."""
-    op.execute("DROP INDEX IF EXISTS idx_segment_embeddings_vector")
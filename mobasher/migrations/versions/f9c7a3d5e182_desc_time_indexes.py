@@ -0,0 +1,54 @@
+"""latest-first (DESC) composite time indexes
+
+Revision ID: f9c7a3d5e182
+Revises: e8b4f2c6a017
+Create Date: 2025-09-21 12:44:03.118926
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f9c7a3d5e182'
+down_revision: Union[str, Sequence[str], None] = 'e8b4f2c6a017'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (new index, table, columns, replaced index or None)
+_INDEXES = (
+    ('idx_recordings_channel_time_desc', 'recordings', 'channel_id, started_at DESC', 'idx_recordings_channel_time'),
+    ('idx_segments_channel_time_desc', 'segments', 'channel_id, started_at DESC', 'idx_segments_channel_time'),
+    ('idx_visual_events_channel_created_desc', 'visual_events', 'channel_id, created_at DESC', None),
+    ('idx_system_metrics_name_desc', 'system_metrics', 'metric_name, "timestamp" DESC', 'idx_system_metrics_name'),
+)
+
+_PREVIOUS = {
+    'idx_recordings_channel_time': ('recordings', 'channel_id, started_at'),
+    'idx_segments_channel_time': ('segments', 'channel_id, started_at'),
+    'idx_system_metrics_name': ('system_metrics', 'metric_name, "timestamp"'),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Hypertables: build per chunk outside the migration transaction, then drop the ASC versions
+    with context.autocommit_block():
+        for name, table, columns, replaces in _INDEXES:
+            op.execute(
+                f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns}) "
+                "WITH (timescaledb.transaction_per_chunk)"
+            )
+            if replaces:
+                op.execute(f"DROP INDEX IF EXISTS {replaces}")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for name, _, _, replaces in _INDEXES:
+        if replaces:
+            table, columns = _PREVIOUS[replaces]
+            op.execute(f"CREATE INDEX IF NOT EXISTS {replaces} ON {table} ({columns})")
+        op.execute(f"DROP INDEX IF EXISTS {name}")
@@ -0,0 +1,21 @@
+"""Arabic orthographic normalization shared by the ASR and NLP workers."""
+
+from __future__ import annotations
+
+
+# Same folding as CAMeL Tools' normalize_alef_ar / normalize_alef_maksura_ar /
+# normalize_teh_marbuta_ar (the alef/yah/ta flags), as one C-level translate pass.
+# Every mapping is one character to one character, so string offsets are preserved.
+AR_NORM_TABLE = str.maketrans({
+    "آ": "ا",  # آ -> ا
+    "أ": "ا",  # أ -> ا
+    "إ": "ا",  # إ -> ا
+    "ٱ": "ا",  # ٱ -> ا
+    "ى": "ي",  # ى -> ي
+    "ة": "ه",  # ة -> ه
+})
+
+
+def normalize_arabic(text: str) -> str:
+    """Fold alef variants, alef maksura and teh marbuta; idempotent."""
+    return text.translate(AR_NORM_TABLE)
@@ -4,30 +4,67 @@ import asyncio
 from datetime import datetime, timedelta, timezone
 from typing import Optional
 
-from mobasher.storage.db import get_session, init_engine
+import psycopg
+from sqlalchemy import and_, select
+
+from mobasher.storage.db import DBSettings, get_session
 from mobasher.storage.models import Segment, Transcript
-from mobasher.nlp.worker import entities_for_transcript, alerts_for_transcript
+from mobasher.nlp.worker import entities_for_transcript, alerts_for_transcript, queue_for_channel
+
+
+# Raised by the transcript_notify trigger (migration e5a2c7d9b013)
+NOTIFY_CHANNEL = "transcript_ready"
+
+
+def _enqueue(segment_id: str, started_at_iso: str, channel_id: Optional[str]) -> None:
+    queue = queue_for_channel(channel_id)
+    entities_for_transcript.apply_async(args=(segment_id, started_at_iso), queue=queue)
+    alerts_for_transcript.apply_async(args=(segment_id, started_at_iso), queue=queue)
+
+
+def _enqueue_recent(*, lookback_minutes: int, channel_id: Optional[str]) -> int:
+    """Catch up on transcripts written while no listener was connected."""
+    since = datetime.now(timezone.utc) - timedelta(minutes=lookback_minutes)
+    with next(get_session()) as db:  # type: ignore
+        # Only segments that already have a transcript, in one round trip
+        stmt = (
+            select(Segment.id, Segment.started_at, Segment.channel_id)
+            .join(Transcript, and_(
+                Transcript.segment_id == Segment.id,
+                Transcript.segment_started_at == Segment.started_at,
+            ))
+            .where(
+                Segment.asr_status == "completed",  # matches idx_segments_ready_for_nlp
+                Segment.started_at >= since,
+                Transcript.segment_started_at >= since,
+            )
+        )
+        if channel_id:
+            stmt = stmt.where(Segment.channel_id == channel_id)
+        rows = db.execute(stmt.order_by(Segment.started_at.desc()).limit(200)).all()
+    for seg_id, started_at, seg_channel_id in rows:
+        _enqueue(str(seg_id), started_at.isoformat(), seg_channel_id)
+    return len(rows)
 
 
 async def run_scheduler(*, interval_seconds: int = 30, lookback_minutes: int = 10, channel_id: Optional[str] = None) -> None:
-    init_engine()
+    """Enqueue NLP tasks as transcripts land, via LISTEN transcript_ready.
+
+    On every (re)connect the last ``lookback_minutes`` are enqueued once to cover
+    anything committed while not listening; ``interval_seconds`` is the reconnect delay.
+    """
+    conninfo = DBSettings().database_url().replace("postgresql+psycopg://", "postgresql://", 1)
     while True:
-        since = datetime.now(timezone.utc) - timedelta(minutes=lookback_minutes)
         try:
-            with next(get_session()) as db:  # type: ignore
-                q = db.query(Segment).filter(Segment.started_at >= since)
-                if channel_id:
-                    q = q.filter(Segment.channel_id == channel_id)
-                segs = q.order_by(Segment.started_at.desc()).limit(200).all()
-                enq = 0
-                for seg in segs:
-                    tr = db.get(Transcript, (seg.id, seg.started_at))
-                    if tr is None:
+            async with await psycopg.AsyncConnection.connect(conninfo, autocommit=True) as conn:
+                await conn.execute(f"LISTEN {NOTIFY_CHANNEL}")
+                enq = _enqueue_recent(lookback_minutes=lookback_minutes, channel_id=channel_id)
+                print(f"nlp-scheduler: listening, catch-up enqueued={enq}")
+                async for notify in conn.notifies():
+                    seg_id, started_at_iso, notify_channel = (notify.payload.split(",", 2) + ["", ""])[:3]
+                    if channel_id and notify_channel != channel_id:
                         continue
-                    entities_for_transcript.delay(str(seg.id), seg.started_at.isoformat())
-                    alerts_for_transcript.delay(str(seg.id), seg.started_at.isoformat())
-                    enq += 1
-                print(f"nlp-scheduler: enqueued={enq}")
+                    _enqueue(seg_id, started_at_iso, notify_channel or None)
         except Exception as e:
             print(f"nlp-scheduler error: {e}")
         await asyncio.sleep(max(5, interval_seconds))
@@ -35,5 +72,3 @@ async def run_scheduler(*, interval_seconds: int = 30, lookback_minutes: int = 1
 
 def run_scheduler_blocking(*, interval_seconds: int = 30, lookback_minutes: int = 10, channel_id: Optional[str] = None) -> None:
     asyncio.run(run_scheduler(interval_seconds=interval_seconds, lookback_minutes=lookback_minutes, channel_id=channel_id))
-
-
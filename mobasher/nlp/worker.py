@@ -1,13 +1,18 @@
 from __future__ import annotations
 
 import os
-from typing import Dict, List, Optional, Tuple
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
 from time import perf_counter
 
 from celery import Celery
+from celery.signals import worker_process_init
 from pydantic_settings import BaseSettings
 from prometheus_client import Counter, Histogram, start_http_server
 
+from mobasher.nlp.normalize import normalize_arabic as _normalize_arabic
+
 
 class NLPSettings(BaseSettings):
     redis_url: str = os.environ.get("REDIS_URL", "redis://localhost:6379/0")
@@ -17,10 +22,34 @@ class NLPSettings(BaseSettings):
     # Dictionaries
     alerts_dir: str = os.environ.get("ALERTS_DICTIONARIES_DIR", "data/dictionaries/alerts")
     entities_dir: str = os.environ.get("ENTITIES_DICTIONARIES_DIR", "data/dictionaries/entities")
+    # Route scheduled tasks to "nlp.<channel_id>" so one channel's backlog can't starve others
+    per_channel_queues: bool = os.environ.get("NLP_PER_CHANNEL_QUEUES", "0") in ("1", "true", "True")
 
 
 settings = NLPSettings()
 app = Celery("mobasher_nlp", broker=settings.redis_url, backend=settings.redis_url)
+# One task in flight per worker process, acked after it finishes (tasks are idempotent)
+app.conf.update(
+    task_acks_late=True,
+    worker_prefetch_multiplier=1,
+    task_default_queue="nlp",
+    task_routes={"nlp.*": {"queue": "nlp"}},
+)
+
+
+@worker_process_init.connect
+def _init_worker_engine(**_: Any) -> None:
+    # One engine per worker process, created after fork; with -P solo there is no child
+    # process and get_session() creates it lazily on first use instead
+    from mobasher.storage.db import init_engine
+
+    init_engine()
+
+
+def queue_for_channel(channel_id: Optional[str]) -> str:
+    if settings.per_channel_queues and channel_id:
+        return f"nlp.{channel_id}"
+    return "nlp"
 
 
 NLP_TASK_ATTEMPTS = Counter(
@@ -40,6 +69,10 @@ if settings.metrics_port:
     except Exception:
         pass
 
+def _yaml_loader(yaml: Any) -> Any:
+    # libyaml-backed loader when PyYAML was built with it
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
 
 def _load_alert_dictionaries() -> List[Tuple[str, List[str]]]:
     import glob
@@ -48,7 +81,7 @@ def _load_alert_dictionaries() -> List[Tuple[str, List[str]]]:
     for path in glob.glob(os.path.join(settings.alerts_dir, "*.yaml")):
         try:
             with open(path, "r") as f:
-                obj = yaml.safe_load(f) or {}
+                obj = yaml.load(f, Loader=_yaml_loader(yaml)) or {}
                 category = obj.get("category") or os.path.splitext(os.path.basename(path))[0]
                 phrases = obj.get("phrases") or []
                 phrases = [str(p).strip() for p in phrases if str(p).strip()]
@@ -66,7 +99,7 @@ def _load_entity_dictionaries() -> List[Tuple[str, List[str]]]:
     for path in glob.glob(os.path.join(settings.entities_dir, "*.yaml")):
         try:
             with open(path, "r") as f:
-                obj = yaml.safe_load(f) or {}
+                obj = yaml.load(f, Loader=_yaml_loader(yaml)) or {}
                 label = obj.get("label") or os.path.splitext(os.path.basename(path))[0]
                 items = obj.get("items") or []
                 items = [str(p).strip() for p in items if str(p).strip()]
@@ -77,44 +110,159 @@ def _load_entity_dictionaries() -> List[Tuple[str, List[str]]]:
     return out
 
 
-def _normalize_arabic(text: str) -> str:
+def _dict_cache_key(directory: str) -> Tuple[Tuple[str, float], ...]:
+    """(path, mtime) per YAML file: changes when a dictionary is added, removed or edited."""
+    try:
+        with os.scandir(directory) as it:
+            return tuple(sorted((e.path, e.stat().st_mtime) for e in it if e.name.endswith(".yaml")))
+    except OSError:
+        return ()
+
+
+class _HyperscanMatcher:
+    """Literal multi-pattern matcher compiled by Hyperscan.
+
+    Exposes the same ``iter(text)`` contract as a pyahocorasick automaton:
+    yields ``(end_char_index, (normalized, [original phrases...]))``, reporting
+    only the first occurrence of each phrase.
+    """
+
+    def __init__(self, hyperscan: Any, by_norm: Dict[str, List[str]]) -> None:
+        self._values = list(by_norm.items())
+        self._lengths = [len(norm.encode("utf-8")) for norm, _ in self._values]
+        self._db = hyperscan.Database()
+        self._db.compile(
+            expressions=[norm.encode("utf-8") for norm, _ in self._values],
+            ids=list(range(len(self._values))),
+            elements=len(self._values),
+            flags=hyperscan.HS_FLAG_SINGLEMATCH,
+            literal=True,
+        )
+        # Scratch space must not be shared between concurrent scans (-P threads)
+        self._hyperscan = hyperscan
+        self._local = threading.local()
+
+    def iter(self, text: str) -> Iterable[Tuple[int, Tuple[str, List[str]]]]:
+        data = text.encode("utf-8")
+        hits: List[Tuple[int, int]] = []
+
+        def on_match(pattern_id: int, _from: int, to: int, _flags: int, _ctx: Any) -> None:
+            hits.append((pattern_id, to - self._lengths[pattern_id]))
+
+        scratch = getattr(self._local, "scratch", None)
+        if scratch is None:
+            scratch = self._local.scratch = self._hyperscan.Scratch(self._db)
+        self._db.scan(data, match_event_handler=on_match, scratch=scratch)
+        for pattern_id, byte_start in hits:
+            norm, originals = self._values[pattern_id]
+            start = len(data[:byte_start].decode("utf-8"))
+            yield start + len(norm) - 1, (norm, originals)
+
+
+def _build_automaton(phrases: Iterable[str]) -> Optional[Any]:
+    """Multi-pattern matcher keyed by normalized phrase.
+
+    Hyperscan when installed, else a pyahocorasick automaton, else None. Each
+    key maps to ``(normalized, [original phrases...])``.
+    """
+    by_norm: Dict[str, List[str]] = {}
+    for phr in phrases:
+        if phr:
+            by_norm.setdefault(_normalize_arabic(phr), []).append(phr)
+    by_norm.pop("", None)
+    if not by_norm:
+        return None
     try:
-        from camel_tools.utils.normalize import normalize_arabic  # type: ignore
-        return normalize_arabic(text, alef=True, yah=True, ta=True)
+        import hyperscan  # type: ignore
+
+        return _HyperscanMatcher(hyperscan, by_norm)
     except Exception:
-        return text
+        pass
+    try:
+        import ahocorasick  # type: ignore
+    except Exception:
+        return None
+    automaton = ahocorasick.Automaton()
+    for norm, originals in by_norm.items():
+        automaton.add_word(norm, (norm, originals))
+    if len(automaton) == 0:
+        return None
+    automaton.make_automaton()
+    return automaton
+
+
+# Dictionaries are parsed and compiled once per worker, then reused until the files change
+@lru_cache(maxsize=1)
+def _alerts_matcher(cache_key: Tuple[Tuple[str, float], ...]) -> Tuple[List[Tuple[str, List[str]]], Optional[Any]]:
+    dicts = _load_alert_dictionaries()
+    return dicts, _build_automaton(p for _, phrases in dicts for p in phrases)
+
+
+@lru_cache(maxsize=1)
+def _entities_matcher(cache_key: Tuple[Tuple[str, float], ...]) -> Tuple[List[Tuple[str, List[str]]], Optional[Any]]:
+    dicts = _load_entity_dictionaries()
+    return dicts, _build_automaton(p for _, items in dicts for p in items)
+
+
+def _find_phrases(automaton: Optional[Any], dicts: List[Tuple[str, List[str]]], text: str) -> Dict[str, int]:
+    """Map each dictionary phrase present in normalized ``text`` to its first occurrence.
+
+    Phrases are compared in normalized form. One linear pass over ``text`` with
+    the matcher; falls back to per-phrase ``str.find`` without Hyperscan/pyahocorasick.
+    """
+    found: Dict[str, int] = {}
+    if automaton is not None:
+        for end_idx, (norm, originals) in automaton.iter(text):
+            for phr in originals:
+                if phr not in found:
+                    found[phr] = end_idx - len(norm) + 1
+        return found
+    for _, phrases in dicts:
+        for phr in phrases:
+            if phr and phr not in found:
+                idx = text.find(_normalize_arabic(phr))
+                if idx >= 0:
+                    found[phr] = idx
+    return found
+
+
+@lru_cache(maxsize=4096)
+def _normalized(text: str) -> str:
+    # Idempotent, so already-normalized text_norm passes through unchanged; both
+    # NLP tasks for the same transcript share the result
+    return _normalize_arabic(text)
 
 
 @app.task(name="nlp.entities_for_transcript", bind=True, max_retries=2, default_retry_delay=10)
 def entities_for_transcript(self, segment_id: str, segment_started_at_iso: str) -> Dict[str, int]:
     start = perf_counter()
-    from uuid import UUID
-    from datetime import datetime
-    from mobasher.storage.db import get_session, init_engine
+    from mobasher.storage.db import get_session
+    from mobasher.storage.repositories import seg_key
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
     from mobasher.storage.models import Transcript, Entity, Segment
 
-    init_engine()
+    key = seg_key(segment_id, segment_started_at_iso)
     with next(get_session()) as db:  # type: ignore
-        tr = db.get(Transcript, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
-        seg = db.get(Segment, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
+        tr = db.get(Transcript, key)
+        seg = db.get(Segment, key)
         if tr is None or seg is None:
             raise self.retry(exc=RuntimeError("missing_transcript_or_segment"))
 
         NLP_TASK_ATTEMPTS.labels(task="entities_for_transcript", channel_id=seg.channel_id).inc()
 
-        text = tr.text_norm or _normalize_arabic(tr.text or "")
-        label_to_items = _load_entity_dictionaries()  # [(label, [items...])]
-        created = 0
+        text = _normalized(tr.text_norm or tr.text or "")
+        label_to_items, automaton = _entities_matcher(_dict_cache_key(settings.entities_dir))  # [(label, [items...])]
+        entity_rows: List[Dict[str, Any]] = []
         if label_to_items:
-            t = text or ""
+            found = _find_phrases(automaton, label_to_items, text or "")
             for label, candidates in label_to_items:
                 for cand in candidates:
                     if not cand:
                         continue
-                    idx = t.find(cand)
+                    idx = found.get(cand, -1)
                     if idx >= 0:
-                        ent = Entity(
-                            segment_id=UUID(segment_id),
+                        entity_rows.append(dict(
+                            segment_id=key.id,
                             channel_id=seg.channel_id,
                             started_at=seg.started_at,
                             ended_at=seg.ended_at,
@@ -125,9 +273,7 @@ def entities_for_transcript(self, segment_id: str, segment_started_at_iso: str)
                             char_end=idx + len(cand),
                             text_norm=cand,
                             model="dict-v1",
-                        )
-                        db.add(ent)
-                        created += 1
+                        ))
         else:
             # Fallback: simple token extraction by whitespace; keep top few unique tokens (>3 chars)
             tokens = [w for w in (text or "").split() if len(w) >= 4]
@@ -136,8 +282,8 @@ def entities_for_transcript(self, segment_id: str, segment_started_at_iso: str)
                 if w in seen:
                     continue
                 seen.add(w)
-                ent = Entity(
-                    segment_id=UUID(segment_id),
+                entity_rows.append(dict(
+                    segment_id=key.id,
                     channel_id=seg.channel_id,
                     started_at=seg.started_at,
                     ended_at=seg.ended_at,
@@ -148,10 +294,13 @@ def entities_for_transcript(self, segment_id: str, segment_started_at_iso: str)
                     char_end=None,
                     text_norm=w,
                     model="heuristic-v1",
-                )
-                db.add(ent)
-                created += 1
-        if created:
+                ))
+        created = 0
+        if entity_rows:
+            # One multi-row INSERT instead of a unit-of-work flush per entity; rows already
+            # written by an earlier attempt of this task are skipped by the unique key
+            result = db.execute(pg_insert(Entity).on_conflict_do_nothing().returning(Entity.id), entity_rows)
+            created = len(result.all())
             db.commit()
         NLP_TASK_OUTCOMES.labels(task="entities_for_transcript", outcome="success", channel_id=seg.channel_id).inc()
         NLP_TASK_DURATION.labels(task="entities_for_transcript", channel_id=seg.channel_id).observe(perf_counter() - start)
@@ -161,38 +310,40 @@ def entities_for_transcript(self, segment_id: str, segment_started_at_iso: str)
 @app.task(name="nlp.alerts_for_transcript", bind=True, max_retries=2, default_retry_delay=10)
 def alerts_for_transcript(self, segment_id: str, segment_started_at_iso: str) -> Dict[str, int]:
     start = perf_counter()
-    from uuid import UUID
-    from datetime import datetime
-    from mobasher.storage.db import get_session, init_engine
+    from mobasher.storage.db import get_session
+    from mobasher.storage.repositories import seg_key
+    from sqlalchemy.dialects.postgresql import insert as pg_insert
     from mobasher.storage.models import Transcript, Segment, Alert
 
-    init_engine()
+    key = seg_key(segment_id, segment_started_at_iso)
     with next(get_session()) as db:  # type: ignore
-        tr = db.get(Transcript, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
-        seg = db.get(Segment, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
+        tr = db.get(Transcript, key)
+        seg = db.get(Segment, key)
         if tr is None or seg is None:
             raise self.retry(exc=RuntimeError("missing_transcript_or_segment"))
 
         NLP_TASK_ATTEMPTS.labels(task="alerts_for_transcript", channel_id=seg.channel_id).inc()
-        text = tr.text_norm or _normalize_arabic(tr.text or "")
-        dicts = _load_alert_dictionaries()
-        created = 0
+        text = _normalized(tr.text_norm or tr.text or "")
+        dicts, automaton = _alerts_matcher(_dict_cache_key(settings.alerts_dir))
+        found = _find_phrases(automaton, dicts, text or "")
+        alert_rows: List[Dict[str, Any]] = []
         for category, phrases in dicts:
             for phr in phrases:
                 if not phr:
                     continue
-                if (text or "").find(phr) >= 0:
-                    al = Alert(
+                if phr in found:
+                    alert_rows.append(dict(
                         channel_id=seg.channel_id,
-                        segment_id=UUID(segment_id),
+                        segment_id=key.id,
                         matched_phrase=phr,
                         category=category,
                         score=None,
                         payload_json={"segment_started_at": segment_started_at_iso},
-                    )
-                    db.add(al)
-                    created += 1
-        if created:
+                    ))
+        created = 0
+        if alert_rows:
+            result = db.execute(pg_insert(Alert).on_conflict_do_nothing().returning(Alert.id), alert_rows)
+            created = len(result.all())
             db.commit()
         NLP_TASK_OUTCOMES.labels(task="alerts_for_transcript", outcome="success", channel_id=seg.channel_id).inc()
         NLP_TASK_DURATION.labels(task="alerts_for_transcript", channel_id=seg.channel_id).observe(perf_counter() - start)
@@ -9,11 +9,12 @@ Provides:
 
 from __future__ import annotations
 
+import warnings
 from typing import Generator, Optional
 from urllib.parse import urlencode
 
 from pydantic_settings import BaseSettings
-from pydantic import Field
+from pydantic import Field, field_validator
 from sqlalchemy import create_engine
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, Session
@@ -28,21 +29,42 @@ class DBSettings(BaseSettings):
     db_password: str = Field(default="mobasher", alias="DB_PASSWORD")
     db_sslmode: Optional[str] = Field(default=None, alias="DB_SSLMODE")  # e.g., require/disable
     db_schema: Optional[str] = Field(default=None, alias="DB_SCHEMA")  # optional: set search_path
+    # Pooling: size for Celery concurrency; recycle so server-side per-connection caches stay bounded
+    db_pool_size: int = Field(default=5, alias="DB_POOL_SIZE")
+    db_max_overflow: int = Field(default=10, alias="DB_MAX_OVERFLOW")
+    db_pool_recycle: int = Field(default=300, alias="DB_POOL_RECYCLE")
+    # psycopg3 server-side prepared statements: prepare after N executions (None disables,
+    # e.g. behind PgBouncer in transaction mode); keep at most this many per connection
+    db_prepare_threshold: Optional[int] = Field(default=5, alias="DB_PREPARE_THRESHOLD")
+    db_statement_cache_size: int = Field(default=100, alias="DB_STATEMENT_CACHE_SIZE")
+    # pgvector HNSW candidate list size at query time (recall vs. latency); None keeps server default (40)
+    db_hnsw_ef_search: Optional[int] = Field(default=100, alias="DB_HNSW_EF_SEARCH")
+    # SQLAlchemy compiled-statement LRU (per engine); the default 500 is tight for API + workers
+    db_query_cache_size: int = Field(default=1200, alias="DB_QUERY_CACHE_SIZE")
 
     model_config = {"extra": "ignore", "env_file": ".env", "case_sensitive": False}
 
+    @field_validator("db_prepare_threshold", "db_hnsw_ef_search", mode="before")
+    @classmethod
+    def _empty_is_none(cls, v):
+        return None if v == "" else v
+
     def database_url(self) -> str:
         # Build a PostgreSQL URL compatible with psycopg
         base = f"postgresql+psycopg://{self.db_user}:{self.db_password}@{self.db_host}:{self.db_port}/{self.db_name}"
-        params: dict[str, str] = {}
+        # UTF-8 client encoding goes in the startup packet instead of a SET per new connection
+        params: dict[str, str] = {"client_encoding": "utf8"}
         if self.db_sslmode:
             params["sslmode"] = str(self.db_sslmode)
+        # Session GUCs ride along in libpq 'options' (startup packet, no extra round trip)
+        options: list[str] = []
         if self.db_schema:
-            # Use 'options' to set search_path; URL-encode as needed
-            params["options"] = f"-csearch_path={self.db_schema}"
-        if params:
-            return f"{base}?{urlencode(params)}"
-        return base
+            options.append(f"-csearch_path={self.db_schema}")
+        if self.db_hnsw_ef_search:
+            options.append(f"-chnsw.ef_search={int(self.db_hnsw_ef_search)}")
+        if options:
+            params["options"] = " ".join(options)
+        return f"{base}?{urlencode(params)}"
 
 
 _engine: Optional[Engine] = None
@@ -58,20 +80,29 @@ def init_engine(settings: Optional[DBSettings] = None) -> Engine:
         _engine = create_engine(
             settings.database_url(),
             pool_pre_ping=True,
-            pool_size=5,
-            max_overflow=10,
+            pool_size=settings.db_pool_size,
+            max_overflow=settings.db_max_overflow,
+            pool_recycle=settings.db_pool_recycle,
+            # Explicit level skips the per-connect isolation probe
+            isolation_level="READ COMMITTED",
+            connect_args={"prepare_threshold": settings.db_prepare_threshold},
+            query_cache_size=settings.db_query_cache_size,
             future=True,
         )
-        # Ensure UTF-8 client encoding on every connection
+        if not getattr(_engine.dialect, "supports_statement_cache", False):
+            # Third-party dialects must opt in; without it every statement is recompiled
+            warnings.warn(
+                f"SQLAlchemy dialect {_engine.dialect.name}+{_engine.dialect.driver} does not support "
+                "statement caching; queries will be recompiled on every execution",
+                RuntimeWarning,
+            )
+        statement_cache_size = settings.db_statement_cache_size
+
         @event.listens_for(_engine, "connect")
-        def _set_client_encoding(dbapi_connection, connection_record):  # type: ignore[no-redef]
-            try:
-                cur = dbapi_connection.cursor()
-                cur.execute("SET client_encoding TO 'UTF8'")
-                cur.close()
-            except Exception:
-                # Best-effort; psycopg3 should already use UTF-8
-                pass
+        def _set_statement_cache(dbapi_connection, connection_record):  # type: ignore[no-redef]
+            # Client-side attribute only; no round trip
+            dbapi_connection.prepared_max = statement_cache_size
+
         SessionLocal = sessionmaker(
             bind=_engine, autoflush=False, autocommit=False, expire_on_commit=False, class_=Session
         )
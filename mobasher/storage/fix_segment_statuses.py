@@ -6,47 +6,89 @@ Audio-only segments should have vision_status = 'completed'
 Video-only segments should have asr_status = 'completed'
 """
 
+from sqlalchemy import and_, func, or_, select, tuple_, update
+
 from mobasher.storage.db import get_session, init_engine
 from mobasher.storage.models import Segment
 
 
-def fix_segment_statuses(dry_run: bool = True) -> None:
-    """Fix pipeline statuses for existing segments."""
+def _has(col):
+    return and_(col.is_not(None), col != '')
+
+
+def _missing(col):
+    return or_(col.is_(None), col == '')
+
+
+# Audio-only segments: should have vision_status = 'completed'
+_AUDIO_ONLY_PENDING = and_(_has(Segment.audio_path), _missing(Segment.video_path), Segment.vision_status == 'pending')
+# Video-only segments: should have asr_status = 'completed'
+_VIDEO_ONLY_PENDING = and_(_has(Segment.video_path), _missing(Segment.audio_path), Segment.asr_status == 'pending')
+
+
+def fix_segment_statuses(dry_run: bool = True, row_by_row: bool = False, batch_size: int = 1000) -> None:
+    """Fix pipeline statuses for existing segments (server-side, one statement per case)."""
     init_engine()
+    if row_by_row:
+        _fix_segment_statuses_batched(dry_run, batch_size)
+        return
     
     with next(get_session()) as db:
-        segments = db.query(Segment).all()
-        
-        audio_only_fixed = 0
-        video_only_fixed = 0
+        if dry_run:
+            audio_only_fixed = db.scalar(select(func.count()).select_from(Segment).where(_AUDIO_ONLY_PENDING))
+            video_only_fixed = db.scalar(select(func.count()).select_from(Segment).where(_VIDEO_ONLY_PENDING))
+        else:
+            audio_only_fixed = db.execute(
+                update(Segment).where(_AUDIO_ONLY_PENDING).values(vision_status='completed'),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+            video_only_fixed = db.execute(
+                update(Segment).where(_VIDEO_ONLY_PENDING).values(asr_status='completed'),
+                execution_options={"synchronize_session": False},
+            ).rowcount
+            db.commit()
         
-        for seg in segments:
-            changed = False
-            
-            # Audio-only segments: should have vision_status = 'completed'
-            if seg.audio_path and not seg.video_path:
-                if seg.vision_status == 'pending':
+        print(f"{'DRY RUN: ' if dry_run else ''}Fixed {audio_only_fixed} audio-only segments (vision_status)")
+        print(f"{'DRY RUN: ' if dry_run else ''}Fixed {video_only_fixed} video-only segments (asr_status)")
+
+
+def _fix_segment_statuses_batched(dry_run: bool, batch_size: int) -> None:
+    """ORM path for when a bulk UPDATE is undesirable (e.g. row triggers).
+
+    Walks only the candidate rows in keyset-paginated batches and commits per
+    batch, so memory stays bounded regardless of table size.
+    """
+    audio_only_fixed = 0
+    video_only_fixed = 0
+    last = None
+    with next(get_session()) as db:
+        while True:
+            q = (
+                db.query(Segment)
+                .filter(or_(_AUDIO_ONLY_PENDING, _VIDEO_ONLY_PENDING))
+                .order_by(Segment.started_at, Segment.id)
+            )
+            if last is not None:
+                q = q.filter(tuple_(Segment.started_at, Segment.id) > last)
+            batch = q.limit(batch_size).all()
+            if not batch:
+                break
+            for seg in batch:
+                if seg.audio_path and not seg.video_path:
                     if not dry_run:
                         seg.vision_status = 'completed'
                     audio_only_fixed += 1
-                    changed = True
-            
-            # Video-only segments: should have asr_status = 'completed'  
-            elif seg.video_path and not seg.audio_path:
-                if seg.asr_status == 'pending':
+                else:
                     if not dry_run:
                         seg.asr_status = 'completed'
                     video_only_fixed += 1
-                    changed = True
-            
-            if changed and not dry_run:
-                db.add(seg)
-        
-        if not dry_run:
-            db.commit()
-        
-        print(f"{'DRY RUN: ' if dry_run else ''}Fixed {audio_only_fixed} audio-only segments (vision_status)")
-        print(f"{'DRY RUN: ' if dry_run else ''}Fixed {video_only_fixed} video-only segments (asr_status)")
+            last = (batch[-1].started_at, batch[-1].id)
+            if not dry_run:
+                db.commit()
+            db.expunge_all()
+
+    print(f"{'DRY RUN: ' if dry_run else ''}Fixed {audio_only_fixed} audio-only segments (vision_status)")
+    print(f"{'DRY RUN: ' if dry_run else ''}Fixed {video_only_fixed} video-only segments (asr_status)")
 
 
 if __name__ == "__main__":
@@ -54,6 +96,8 @@ if __name__ == "__main__":
     
     parser = argparse.ArgumentParser(description="Fix segment pipeline statuses")
     parser.add_argument("--apply", action="store_true", help="Apply changes (default is dry-run)")
+    parser.add_argument("--row-by-row", action="store_true", help="Update through the ORM in batches instead of bulk UPDATE")
+    parser.add_argument("--batch-size", type=int, default=1000, help="Rows per batch with --row-by-row")
     args = parser.parse_args()
     
-    fix_segment_statuses(dry_run=not args.apply)
+    fix_segment_statuses(dry_run=not args.apply, row_by_row=args.row_by_row, batch_size=args.batch_size)
@@ -5,21 +5,34 @@ These models correspond to the TimescaleDB schema with proper relationships
 and type annotations for the live TV analysis system.
 """
 
-from datetime import datetime, timezone
+import os
+from datetime import datetime
 from typing import Optional, List, Dict, Any
 from uuid import UUID, uuid4
 
 from sqlalchemy import (
-    Column, String, Text, Boolean, Integer, BigInteger, Float, DateTime,
-    JSON, ARRAY, ForeignKey, CheckConstraint, Index, text, PrimaryKeyConstraint
+    Column, String, Text, Boolean, Integer, BigInteger, Float, REAL, DateTime,
+    ARRAY, Computed, DDL, ForeignKey, CheckConstraint, Index, text, PrimaryKeyConstraint, event
 )
-from sqlalchemy.dialects.postgresql import UUID as PG_UUID
-from pgvector.sqlalchemy import Vector
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import relationship, Mapped, mapped_column
-from sqlalchemy.sql import func
+from sqlalchemy.dialects.postgresql import ENUM, JSONB, TSVECTOR, UUID as PG_UUID
+from pgvector.sqlalchemy import HALFVEC
+from uuid_utils.compat import uuid7
+from sqlalchemy.orm import DeclarativeBase, relationship, Mapped, mapped_column
+from sqlalchemy.sql import desc, func
 
-Base = declarative_base()
+
+class Base(DeclarativeBase):
+    """Declarative base for all models (SQLAlchemy 2.0 style)."""
+
+    # Fetch server-generated values (now() defaults, onupdate) via RETURNING on the
+    # INSERT/UPDATE itself, so write paths don't need a refresh() SELECT afterwards
+    __mapper_args__ = {"eager_defaults": True}
+
+
+# Native PostgreSQL enums for fixed vocabularies (4-byte values, no CHECK constraint needed)
+RecordingStatus = ENUM("running", "completed", "failed", "stopped", name="recording_status")
+SegmentStatus = ENUM("created", "processing", "completed", "failed", name="segment_status")
+VisualEventType = ENUM("object", "face", "ocr", "logo", "scene_change", name="visual_event_type")
 
 
 class Channel(Base):
@@ -31,23 +44,24 @@ class Channel(Base):
     name: Mapped[str] = mapped_column(String, nullable=False)
     description: Mapped[Optional[str]] = mapped_column(Text)
     url: Mapped[str] = mapped_column(String, nullable=False)
-    headers: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict)
+    headers: Mapped[Dict[str, Any]] = mapped_column(JSONB, default=dict)
     active: Mapped[bool] = mapped_column(Boolean, default=True)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc)
+        server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc)
+        server_default=func.now(),
+        onupdate=func.now()
     )
     
-    # Relationships
-    recordings: Mapped[List["Recording"]] = relationship("Recording", back_populates="channel")
-    segments: Mapped[List["Segment"]] = relationship("Segment", back_populates="channel")
-    visual_events: Mapped[List["VisualEvent"]] = relationship("VisualEvent", back_populates="channel")
-    system_metrics: Mapped[List["SystemMetric"]] = relationship("SystemMetric", back_populates="channel")
+    # Relationships: collections are unbounded hypertables, so implicit lazy loads raise;
+    # load them explicitly (see repositories.get_channels_with)
+    recordings: Mapped[List["Recording"]] = relationship("Recording", back_populates="channel", lazy="raise")
+    segments: Mapped[List["Segment"]] = relationship("Segment", back_populates="channel", lazy="raise")
+    visual_events: Mapped[List["VisualEvent"]] = relationship("VisualEvent", back_populates="channel", lazy="raise")
+    system_metrics: Mapped[List["SystemMetric"]] = relationship("SystemMetric", back_populates="channel", lazy="raise")
 
 
 class Recording(Base):
@@ -55,31 +69,32 @@ class Recording(Base):
     
     __tablename__ = "recordings"
     
-    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), default=uuid4)
+    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), default=uuid7)
     channel_id: Mapped[str] = mapped_column(String, ForeignKey("channels.id"), nullable=False)
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     ended_at: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
-    status: Mapped[str] = mapped_column(
-        String, 
-        CheckConstraint("status IN ('running', 'completed', 'failed', 'stopped')"),
-        default="running"
-    )
+    status: Mapped[str] = mapped_column(RecordingStatus, default="running")
     error_message: Mapped[Optional[str]] = mapped_column(Text)
-    extra: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict)
+    extra: Mapped[Dict[str, Any]] = mapped_column(JSONB, default=dict)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc)
+        server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc)
+        server_default=func.now(),
+        onupdate=func.now()
     )
     
     # Composite primary key for TimescaleDB
     __table_args__ = (
         PrimaryKeyConstraint("id", "started_at", name="pk_recordings"),
-        Index("idx_recordings_channel_time", "channel_id", "started_at"),
+        # Latest-first per channel: DESC key order matches ORDER BY started_at DESC LIMIT n
+        Index("idx_recordings_channel_time_desc", "channel_id", desc("started_at")),
+        # Compact min/max-per-page-range index for time range scans on append-mostly data
+        Index("brin_recordings_started_at", "started_at", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
+        # Partial indexes on hot statuses stay as small as the live work, not the whole history
+        Index("idx_recordings_running", "channel_id", desc("started_at"), postgresql_where=text("status = 'running'")),
     )
     
     # Relationships
@@ -91,7 +106,7 @@ class Segment(Base):
     
     __tablename__ = "segments"
     
-    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), default=uuid4)
+    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), default=uuid7)
     recording_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
     channel_id: Mapped[str] = mapped_column(String, ForeignKey("channels.id"), nullable=False)
     started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
@@ -100,20 +115,16 @@ class Segment(Base):
     audio_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     video_path: Mapped[Optional[str]] = mapped_column(String, nullable=True)
     file_size_bytes: Mapped[Optional[int]] = mapped_column(BigInteger)
-    status: Mapped[str] = mapped_column(
-        String,
-        CheckConstraint("status IN ('created', 'processing', 'completed', 'failed')"),
-        default="created"
-    )
-    extra: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict)
+    status: Mapped[str] = mapped_column(SegmentStatus, default="created")
+    extra: Mapped[Dict[str, Any]] = mapped_column(JSONB, default=dict)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc)
+        server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc)
+        server_default=func.now(),
+        onupdate=func.now()
     )
 
     # Pipeline processing fields (per-pipeline status and bookkeeping)
@@ -136,13 +147,39 @@ class Segment(Base):
     # Composite primary key for TimescaleDB
     __table_args__ = (
         PrimaryKeyConstraint("id", "started_at", name="pk_segments"),
-        Index("idx_segments_channel_time", "channel_id", "started_at"),
+        # Latest segments per channel; INCLUDE lets recent_segments-style reads skip the heap
+        Index(
+            "idx_segments_recent_covering",
+            "channel_id", desc("started_at"),
+            postgresql_include=["id", "ended_at", "status", "audio_path", "video_path"],
+        ),
         Index("idx_segments_recording", "recording_id", "started_at"),
+        Index("brin_segments_started_at", "started_at", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
+        # Small partial index for the NLP scheduler's "recent transcribed segments" lookback
+        Index(
+            "idx_segments_ready_for_nlp",
+            text("started_at DESC"),
+            postgresql_where=text("asr_status = 'completed'"),
+            postgresql_include=["id", "channel_id"],
+        ),
+        Index("idx_segments_pending", "started_at", postgresql_where=text("status IN ('created', 'processing')")),
+        # ASR backlog scan (list_segments_missing_transcripts): only rows that can need a transcript
+        Index(
+            "idx_segments_missing_tr",
+            "channel_id", desc("started_at"),
+            postgresql_where=text("audio_path IS NOT NULL AND status = 'completed'"),
+        ),
+        # Recorder's media-completion sweep (per channel, pipeline still pending)
+        Index(
+            "idx_segments_pipeline_pending",
+            "channel_id", "started_at",
+            postgresql_where=text("asr_status = 'pending' OR vision_status = 'pending'"),
+        ),
         CheckConstraint("(audio_path IS NOT NULL) OR (video_path IS NOT NULL)", name="ck_segment_has_media"),
     )
     
     # Relationships (avoid non-FK joins in ORM)
-    channel: Mapped["Channel"] = relationship("Channel", back_populates="segments")
+    channel: Mapped["Channel"] = relationship("Channel", back_populates="segments", lazy="joined", innerjoin=True)
 
 
 class Transcript(Base):
@@ -156,8 +193,16 @@ class Transcript(Base):
     text: Mapped[str] = mapped_column(Text, nullable=False)
     # Optional normalized text for search (diacritics/tatweel removed, digit normalized)
     text_norm: Mapped[Optional[str]] = mapped_column(Text)
-    words: Mapped[Optional[List[Dict[str, Any]]]] = mapped_column(JSON)  # Word-level timestamps
-    confidence: Mapped[Optional[float]] = mapped_column(Float)
+    # Token index source for full-text search (match with plainto_tsquery('simple', <normalized q>));
+    # deferred so regular transcript reads don't fetch it
+    text_tsv: Mapped[Optional[Any]] = mapped_column(
+        TSVECTOR,
+        Computed("to_tsvector('simple', coalesce(text_norm, text))", persisted=True),
+        deferred=True,
+    )
+    # Legacy word-timestamp blob; new transcripts write rows to transcript_words instead
+    words: Mapped[Optional[List[Dict[str, Any]]]] = mapped_column(JSONB)
+    confidence: Mapped[Optional[float]] = mapped_column(REAL)
     model_name: Mapped[str] = mapped_column(String, nullable=False)
     model_version: Mapped[Optional[str]] = mapped_column(String)
     # Total task wall-clock
@@ -166,46 +211,80 @@ class Transcript(Base):
     engine_time_ms: Mapped[Optional[int]] = mapped_column(Integer)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc)
+        server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc)
+        server_default=func.now(),
+        onupdate=func.now()
     )
     
     __table_args__ = (
         PrimaryKeyConstraint("segment_id", "segment_started_at", name="pk_transcripts"),
         Index("idx_transcripts_language", "language"),
         Index("idx_transcripts_segment", "segment_id", "segment_started_at"),
-        # Full-text search index (created separately in SQL/migration)
+        Index("idx_transcripts_text_tsv", "text_tsv", postgresql_using="gin"),
     )
     
     # No ORM relationship to Segment (no FKs)
 
 
+class TranscriptWord(Base):
+    """Word-level timestamps of a transcript, one row per word (TimescaleDB hypertable)."""
+
+    __tablename__ = "transcript_words"
+
+    segment_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
+    segment_started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+    idx: Mapped[int] = mapped_column(Integer, nullable=False)  # position within the transcript
+    word: Mapped[str] = mapped_column(Text, nullable=False)
+    start_ms: Mapped[Optional[int]] = mapped_column(Integer)  # offsets from segment start
+    end_ms: Mapped[Optional[int]] = mapped_column(Integer)
+    confidence: Mapped[Optional[float]] = mapped_column(REAL)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("segment_id", "segment_started_at", "idx", name="pk_transcript_words"),
+        Index("idx_transcript_words_word", "word"),
+        Index("brin_transcript_words_started_at", "segment_started_at", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
+    )
+
+    # No ORM relationship to Transcript (no FKs)
+
+
 class SegmentEmbedding(Base):
-    """Vector embeddings for segment content."""
+    """Vector embeddings for segment content.
+
+    Query with ``ORDER BY vector <=> :q LIMIT k`` (bare operator, ascending) so
+    the HNSW index is used; see ``repositories.knn_segments``.
+    """
     
     __tablename__ = "segment_embeddings"
     
     segment_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
     segment_started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     model_name: Mapped[str] = mapped_column(String, nullable=False)
-    vector: Mapped[Optional[List[float]]] = mapped_column(Vector(384))  # Adjust dimension as needed
+    vector: Mapped[Optional[List[float]]] = mapped_column(HALFVEC(384))  # Adjust dimension as needed; half precision
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc)
+        server_default=func.now()
     )
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc)
+        server_default=func.now(),
+        onupdate=func.now()
     )
     
     __table_args__ = (
         PrimaryKeyConstraint("segment_id", "segment_started_at", name="pk_segment_embeddings"),
         Index("idx_embeddings_segment", "segment_id", "segment_started_at"),
+        # ANN index for cosine distance; the migration picks m from the row count
+        Index(
+            "idx_embeddings_vector_hnsw",
+            "vector",
+            postgresql_using="hnsw",
+            postgresql_with={"m": 24, "ef_construction": 128},
+            postgresql_ops={"vector": "halfvec_cosine_ops"},
+        ),
     )
     
     # No ORM relationship to Segment (no FKs)
@@ -216,22 +295,18 @@ class VisualEvent(Base):
     
     __tablename__ = "visual_events"
     
-    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), default=uuid4)
+    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), default=uuid7)
     segment_id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), nullable=False)
     segment_started_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
     channel_id: Mapped[str] = mapped_column(String, ForeignKey("channels.id"), nullable=False)
-    timestamp_offset: Mapped[float] = mapped_column(Float, nullable=False)  # Seconds from segment start
-    event_type: Mapped[str] = mapped_column(
-        String,
-        CheckConstraint("event_type IN ('object', 'face', 'ocr', 'logo', 'scene_change')"),
-        nullable=False
-    )
+    timestamp_offset: Mapped[float] = mapped_column(REAL, nullable=False)  # Seconds from segment start
+    event_type: Mapped[str] = mapped_column(VisualEventType, nullable=False)
     bbox: Mapped[Optional[List[int]]] = mapped_column(ARRAY(Integer))  # [x, y, width, height]
-    confidence: Mapped[Optional[float]] = mapped_column(Float)
-    data: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)  # Event-specific data
+    confidence: Mapped[Optional[float]] = mapped_column(REAL)
+    data: Mapped[Dict[str, Any]] = mapped_column(JSONB, nullable=False)  # Event-specific data
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc)
+        server_default=func.now()
     )
     # Media and QC metadata
     video_path: Mapped[Optional[str]] = mapped_column(String)
@@ -240,14 +315,17 @@ class VisualEvent(Base):
     frame_timestamp_ms: Mapped[Optional[int]] = mapped_column(Integer)
     updated_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
-        onupdate=lambda: datetime.now(timezone.utc)
+        server_default=func.now(),
+        onupdate=func.now()
     )
     
     __table_args__ = (
         PrimaryKeyConstraint("id", "created_at", name="pk_visual_events"),
         Index("idx_visual_events_segment", "segment_id", "segment_started_at"),
         Index("idx_visual_events_type", "event_type"),
+        Index("idx_visual_events_channel_created_desc", "channel_id", desc("created_at")),
+        Index("idx_visual_events_data_gin", "data", postgresql_using="gin"),
+        Index("brin_visual_events_created_at", "created_at", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
     )
     
     # Relationships
@@ -259,19 +337,21 @@ class SystemMetric(Base):
     
     __tablename__ = "system_metrics"
     
-    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), default=uuid4)
+    id: Mapped[UUID] = mapped_column(PG_UUID(as_uuid=True), default=uuid7)
     timestamp: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc)
+        server_default=func.now()
     )
     metric_name: Mapped[str] = mapped_column(String, nullable=False)
-    metric_value: Mapped[float] = mapped_column(Float, nullable=False)
-    tags: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict)
+    metric_value: Mapped[float] = mapped_column(REAL, nullable=False)
+    tags: Mapped[Dict[str, Any]] = mapped_column(JSONB, default=dict)
     channel_id: Mapped[Optional[str]] = mapped_column(String, ForeignKey("channels.id"))
     
     __table_args__ = (
         PrimaryKeyConstraint("id", "timestamp", name="pk_system_metrics"),
-        Index("idx_system_metrics_name", "metric_name", "timestamp"),
+        Index("idx_system_metrics_name_desc", "metric_name", desc("timestamp")),
+        Index("idx_system_metrics_tags_gin", "tags", postgresql_using="gin"),
+        Index("brin_system_metrics_timestamp", "timestamp", postgresql_using="brin", postgresql_with={"pages_per_range": 32}),
     )
     
     # Relationships
@@ -323,7 +403,7 @@ class Screenshot(Base):
     screenshot_path: Mapped[str] = mapped_column(String, nullable=False)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True), 
-        default=lambda: datetime.now(timezone.utc)
+        server_default=func.now()
     )
     
     __table_args__ = (
@@ -352,12 +432,19 @@ class Entity(Base):
     model: Mapped[Optional[str]] = mapped_column(String)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
     )
 
     __table_args__ = (
         Index("idx_entities_channel_started", "channel_id", "started_at"),
         Index("idx_entities_label_started", "label", "started_at"),
+        # Retried NLP tasks insert with ON CONFLICT DO NOTHING against these keys
+        Index(
+            "uq_entities_segment_match",
+            "segment_id", "started_at", "label", "text", "char_start", "model",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
     )
 
 
@@ -374,11 +461,61 @@ class Alert(Base):
     score: Mapped[Optional[float]] = mapped_column(Float)
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
-        default=lambda: datetime.now(timezone.utc),
+        server_default=func.now(),
     )
-    payload_json: Mapped[Dict[str, Any]] = mapped_column(JSON, default=dict)
+    payload_json: Mapped[Dict[str, Any]] = mapped_column(JSONB, default=dict)
 
     __table_args__ = (
         Index("idx_alerts_channel_created", "channel_id", "created_at"),
         Index("idx_alerts_category_created", "category", "created_at"),
+        Index(
+            "uq_alerts_segment_phrase",
+            "segment_id", "matched_phrase", "category",
+            unique=True,
+            postgresql_nulls_not_distinct=True,
+        ),
+    )
+
+
+# -------------------- TimescaleDB hypertables (create_all path) --------------------
+# Alembic creates and tunes hypertables for deployed databases; these listeners give
+# Base.metadata.create_all() the same layout. They are skipped when the timescaledb
+# extension is absent (e.g. the plain pgvector container in the integration test).
+# Keep in sync with migration 66501cbbea91; intervals honour TS_CHUNK_INTERVAL_<TABLE>.
+# (time column, chunk interval, compress_segmentby, compress_after); None = no compression
+_HYPERTABLES = {
+    Recording.__table__: ("started_at", "7 days", "channel_id", "7 days"),
+    Segment.__table__: ("started_at", "1 day", "channel_id", "7 days"),
+    VisualEvent.__table__: ("created_at", "1 hour", "channel_id, event_type", "1 day"),
+    SystemMetric.__table__: ("timestamp", "1 day", "metric_name", "1 day"),
+    TranscriptWord.__table__: ("segment_started_at", "1 day", None, None),
+}
+
+
+def _timescaledb_installed(ddl, target, bind, **kw) -> bool:
+    return bind.execute(text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'")).first() is not None
+
+
+def _hypertable_ddl(
+    name: str, time_col: str, interval: str, segmentby: Optional[str], compress_after: Optional[str]
+) -> List[DDL]:
+    interval = os.getenv(f"TS_CHUNK_INTERVAL_{name.upper()}", interval)
+    create = DDL(
+        f"SELECT create_hypertable('{name}', '{time_col}', "
+        f"chunk_time_interval => INTERVAL '{interval}', if_not_exists => TRUE)"
     )
+    if segmentby is None:
+        return [create]
+    return [
+        create,
+        DDL(
+            f"ALTER TABLE {name} SET (timescaledb.compress, "
+            f"timescaledb.compress_segmentby = '{segmentby}', timescaledb.compress_orderby = '\"{time_col}\" DESC')"
+        ),
+        DDL(f"SELECT add_compression_policy('{name}', INTERVAL '{compress_after}', if_not_exists => TRUE)"),
+    ]
+
+
+for _table, _spec in _HYPERTABLES.items():
+    for _ddl in _hypertable_ddl(_table.name, *_spec):
+        event.listen(_table, "after_create", _ddl.execute_if(dialect="postgresql", callable_=_timescaledb_installed))
@@ -3,17 +3,30 @@ Typed repository helpers for common DB operations.
 
 These helpers wrap SQLAlchemy ORM operations with clear, typed functions
 to simplify usage across services and CLIs.
+
+Write helpers commit by default; pass ``autocommit=False`` to only flush and
+group several writes into one caller-managed transaction.
 """
 
 from __future__ import annotations
 
 from dataclasses import dataclass
+from time import monotonic
+from functools import lru_cache
 from datetime import datetime, timezone, timedelta
-from typing import Iterable, List, Optional, Tuple
-from uuid import UUID, uuid4
+from typing import Any, Dict, Iterable, List, Mapping, NamedTuple, Optional, Sequence, Tuple
+from uuid import UUID
+
+from pgvector.sqlalchemy import HALFVEC, Vector
+from uuid_utils.compat import uuid7
+from sqlalchemy import (
+    ARRAY, JSON, REAL, BigInteger, Boolean, DateTime, Float, Integer, Select, String,
+    and_, bindparam, case, delete, desc, event, func, insert, lambda_stmt, select, exists, text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, UUID as PG_UUID, insert as pg_insert
+from sqlalchemy.orm import Session, raiseload, selectinload
 
-from sqlalchemy import Select, and_, desc, func, select, exists
-from sqlalchemy.orm import Session
+from mobasher.nlp.normalize import normalize_arabic
 
 from .models import (
     Base,
@@ -21,10 +34,43 @@ from .models import (
     Recording,
     Segment,
     Transcript,
+    TranscriptWord,
     SegmentEmbedding,
 )
 
 
+# -------------------- Segment keys --------------------
+
+class SegKey(NamedTuple):
+    """Composite primary key shared by segments and their per-segment tables."""
+
+    id: UUID
+    started_at: datetime
+
+
+@lru_cache(maxsize=4096)
+def seg_key(segment_id: str, started_at_iso: str) -> SegKey:
+    """Parse a task's ``(segment_id, started_at_iso)`` strings into a ``SegKey``.
+
+    A segment's key is parsed by every task that touches it (ASR, NLP, each vision
+    pass) and per row by the vision loops; the LRU makes that a dict hit. Usable
+    directly as the identity for ``db.get(Segment, key)``.
+    """
+    return SegKey(UUID(segment_id), datetime.fromisoformat(started_at_iso))
+
+
+def _finish(db: Session, autocommit: bool) -> None:
+    """Commit, or with ``autocommit=False`` only flush and leave the commit to the caller.
+
+    Lets callers group many writes into one transaction (one WAL flush) instead of one
+    commit per helper call.
+    """
+    if autocommit:
+        db.commit()
+    else:
+        db.flush()
+
+
 # -------------------- Channels --------------------
 
 def upsert_channel(
@@ -36,27 +82,21 @@ def upsert_channel(
     headers: Optional[dict] = None,
     active: bool = True,
     description: Optional[str] = None,
+    autocommit: bool = True,
 ) -> Channel:
-    channel = db.get(Channel, channel_id)
-    if channel is None:
-        channel = Channel(
-            id=channel_id,
-            name=name,
-            url=url,
-            headers=headers or {},
-            active=active,
-            description=description,
-        )
-        db.add(channel)
-    else:
-        channel.name = name
-        channel.url = url
-        channel.headers = headers or {}
-        channel.active = active
-        channel.description = description
-        db.add(channel)
-    db.commit()
-    db.refresh(channel)
+    row = dict(
+        id=channel_id,
+        name=name,
+        url=url,
+        headers=headers or {},
+        active=active,
+        description=description,
+    )
+    # One round trip whether or not the channel exists (no SELECT first)
+    stmt = _upsert_by_pk(Channel, row).values(row)
+    channel = db.scalars(stmt.returning(Channel), execution_options={"populate_existing": True}).one()
+    _CHANNEL_CACHE.pop(channel_id, None)  # Core statement: the ORM after_update listener doesn't fire
+    _finish(db, autocommit)
     return channel
 
 
@@ -64,6 +104,46 @@ def get_channel(db: Session, channel_id: str) -> Optional[Channel]:
     return db.get(Channel, channel_id)
 
 
+# channels is a small, rarely changed dimension table: hot ingest paths that only need to
+# know a channel exists (or read its url/headers) use this per-process cache instead of a SELECT.
+_CHANNEL_CACHE: Dict[str, Channel] = {}
+# Edits made in this process evict immediately (listeners below); the TTL bounds how long
+# edits made by other processes (API, CLI) can go unseen.
+CHANNEL_CACHE_TTL_S = 60.0
+_channel_cache_loaded_at = 0.0
+
+
+def load_channels(db: Session) -> int:
+    """(Re)load every channel into the process cache; returns the number cached."""
+    global _channel_cache_loaded_at
+    # Separate session so the cached copies are detached and never expired by db's commits
+    with Session(bind=db.get_bind()) as s:
+        channels = list(s.execute(select(Channel)).scalars().all())
+    _CHANNEL_CACHE.clear()
+    _CHANNEL_CACHE.update((ch.id, ch) for ch in channels)
+    _channel_cache_loaded_at = monotonic()
+    return len(channels)
+
+
+def get_cached_channel(db: Session, channel_id: str) -> Optional[Channel]:
+    """Return ``channel_id`` from the process cache, reloading the table on a miss or
+    once it is older than ``CHANNEL_CACHE_TTL_S``.
+
+    The result is a detached read-only snapshot; use ``get_channel`` to modify a channel.
+    """
+    ch = _CHANNEL_CACHE.get(channel_id)
+    if ch is None or monotonic() - _channel_cache_loaded_at > CHANNEL_CACHE_TTL_S:
+        load_channels(db)
+        ch = _CHANNEL_CACHE.get(channel_id)
+    return ch
+
+
+@event.listens_for(Channel, "after_update")
+@event.listens_for(Channel, "after_delete")
+def _evict_cached_channel(mapper: Any, connection: Any, target: Channel) -> None:
+    _CHANNEL_CACHE.pop(target.id, None)
+
+
 def list_channels(db: Session, *, active_only: bool = False, limit: int = 100, offset: int = 0) -> List[Channel]:
     stmt: Select = select(Channel)
     if active_only:
@@ -72,6 +152,36 @@ def list_channels(db: Session, *, active_only: bool = False, limit: int = 100, o
     return list(db.execute(stmt).scalars().all())
 
 
+def get_channels_with(
+    db: Session,
+    *,
+    recent_segments_since: Optional[datetime] = None,
+    recent_recordings_since: Optional[datetime] = None,
+    active_only: bool = False,
+) -> List[Channel]:
+    """List channels with recent segments/recordings loaded up front.
+
+    Channel collections are ``lazy="raise"``; this loads the requested ones with
+    one ``IN (...)`` query each instead of a query per channel. Collections not
+    requested still raise on access.
+    """
+    stmt: Select = select(Channel)
+    if active_only:
+        stmt = stmt.where(Channel.active.is_(True))
+    if recent_segments_since is not None:
+        stmt = stmt.options(
+            selectinload(Channel.segments.and_(Segment.started_at >= recent_segments_since))
+            .options(raiseload("*", sql_only=True))
+        )
+    if recent_recordings_since is not None:
+        stmt = stmt.options(
+            selectinload(Channel.recordings.and_(Recording.started_at >= recent_recordings_since))
+            .options(raiseload("*", sql_only=True))
+        )
+    stmt = stmt.order_by(Channel.created_at.asc())
+    return list(db.execute(stmt).scalars().all())
+
+
 # -------------------- Recordings --------------------
 
 def create_recording(
@@ -81,22 +191,31 @@ def create_recording(
     started_at: Optional[datetime] = None,
     status: str = "running",
     error_message: Optional[str] = None,
+    autocommit: bool = True,
 ) -> Recording:
     if started_at is None:
         started_at = datetime.now(timezone.utc)
     rec = Recording(
-        id=uuid4(),
+        id=uuid7(),
         channel_id=channel_id,
         started_at=started_at,
         status=status,
         error_message=error_message,
     )
     db.add(rec)
-    db.commit()
-    db.refresh(rec)
+    _finish(db, autocommit)
     return rec
 
 
+def create_recordings_bulk(db: Session, rows: Sequence[Mapping[str, Any]], *, autocommit: bool = True) -> int:
+    """Insert recording rows (column key -> value) with one batched executemany and commit once."""
+    if not rows:
+        return 0
+    db.execute(insert(Recording), list(rows))
+    _finish(db, autocommit)
+    return len(rows)
+
+
 def complete_recording(
     db: Session,
     *,
@@ -104,6 +223,7 @@ def complete_recording(
     started_at: datetime,
     ended_at: Optional[datetime] = None,
     status: str = "completed",
+    autocommit: bool = True,
 ) -> Optional[Recording]:
     rec = db.get(Recording, (recording_id, started_at))
     if rec is None:
@@ -111,8 +231,7 @@ def complete_recording(
     rec.ended_at = ended_at or datetime.now(timezone.utc)
     rec.status = status
     db.add(rec)
-    db.commit()
-    db.refresh(rec)
+    _finish(db, autocommit)
     return rec
 
 
@@ -138,6 +257,56 @@ def list_recent_recordings(
 
 # -------------------- Segments --------------------
 
+def _merge_segment_rows(rows: Sequence[Mapping[str, Any]]) -> List[Dict[str, Any]]:
+    """Merge rows sharing a primary key so one statement never hits a conflict target twice."""
+    # Audio and video of the same time slice share a row
+    merged: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+    for row in rows:
+        key = (row["id"], row["started_at"])
+        cur = merged.get(key)
+        if cur is None:
+            merged[key] = dict(row)
+            continue
+        cur["audio_path"] = cur.get("audio_path") or row.get("audio_path")
+        cur["video_path"] = cur.get("video_path") or row.get("video_path")
+        cur["file_size_bytes"] = max(cur.get("file_size_bytes") or 0, row.get("file_size_bytes") or 0)
+        cur["ended_at"] = row["ended_at"]
+    return list(merged.values())
+
+
+@lru_cache(maxsize=None)
+def _segments_upsert() -> Any:
+    """INSERT ... ON CONFLICT for segments; bind rows with .values() or executemany.
+
+    Built once per process: statements are immutable, and rebuilding the CASE/coalesce
+    tree on every call was pure Python overhead on the ingest path.
+    """
+    seg = Segment.__table__
+    stmt = pg_insert(Segment)
+    ex = stmt.excluded
+    return stmt.on_conflict_do_update(
+        index_elements=["id", "started_at"],
+        set_={
+            # Update media only if provided and not already set
+            "audio_path": func.coalesce(seg.c.audio_path, ex.audio_path),
+            "video_path": func.coalesce(seg.c.video_path, ex.video_path),
+            # Newly attached media re-opens its pipeline
+            "asr_status": case(
+                (and_(seg.c.audio_path.is_(None), ex.audio_path.is_not(None), seg.c.asr_status == "completed"), "pending"),
+                else_=seg.c.asr_status,
+            ),
+            "vision_status": case(
+                (and_(seg.c.video_path.is_(None), ex.video_path.is_not(None), seg.c.vision_status == "completed"), "pending"),
+                else_=seg.c.vision_status,
+            ),
+            "file_size_bytes": func.greatest(func.coalesce(seg.c.file_size_bytes, 0), ex.file_size_bytes),
+            "ended_at": ex.ended_at,
+            "status": ex.status,
+            "updated_at": func.now(),
+        },
+    )
+
+
 def upsert_segment(
     db: Session,
     *,
@@ -150,37 +319,39 @@ def upsert_segment(
     video_path: Optional[str],
     file_size_bytes: Optional[int],
     status: str = "completed",
+    autocommit: bool = True,
 ) -> Segment:
-    seg = db.get(Segment, (segment_id, started_at))
-    if seg is None:
-        seg = Segment(
-            id=segment_id,
-            recording_id=recording_id,
-            channel_id=channel_id,
-            started_at=started_at,
-            ended_at=ended_at,
-            audio_path=audio_path,
-            video_path=video_path,
-            file_size_bytes=file_size_bytes,
-            status=status,
-        )
-        db.add(seg)
-    else:
-        # Update only if provided
-        if audio_path and not seg.audio_path:
-            seg.audio_path = audio_path
-        if video_path and not seg.video_path:
-            seg.video_path = video_path
-        if file_size_bytes and (not seg.file_size_bytes or file_size_bytes > seg.file_size_bytes):
-            seg.file_size_bytes = file_size_bytes
-        seg.ended_at = ended_at
-        seg.status = status
-        db.add(seg)
-    db.commit()
-    db.refresh(seg)
+    stmt = _segments_upsert().values(dict(
+        id=segment_id,
+        recording_id=recording_id,
+        channel_id=channel_id,
+        started_at=started_at,
+        ended_at=ended_at,
+        audio_path=audio_path,
+        video_path=video_path,
+        file_size_bytes=file_size_bytes,
+        status=status,
+    ))
+    seg = db.scalars(stmt.returning(Segment), execution_options={"populate_existing": True}).one()
+    _finish(db, autocommit)
     return seg
 
 
+def upsert_segments_bulk(db: Session, rows: Sequence[Mapping[str, Any]], *, autocommit: bool = True) -> int:
+    """Upsert segment rows (column key -> value) as one batched executemany and commit once.
+
+    Same merge rules as ``upsert_segment``; returns the number of distinct rows written.
+    """
+    if not rows:
+        return 0
+    merged = _merge_segment_rows(rows)
+    # No RETURNING, so this is a plain cursor.executemany: psycopg pipelines the
+    # parameter sets of one cached statement in a single round trip
+    db.execute(_segments_upsert(), merged)
+    _finish(db, autocommit)
+    return len(merged)
+
+
 def list_segments(
     db: Session,
     *,
@@ -206,6 +377,29 @@ def list_segments(
 
 # -------------------- Transcripts --------------------
 
+def _upsert_by_pk(model: type, keys: Iterable[str]) -> Any:
+    """INSERT ... ON CONFLICT (pk) DO UPDATE of the given (non-key) columns."""
+    return _upsert_stmt(model, tuple(keys))
+
+
+@lru_cache(maxsize=64)
+def _upsert_stmt(model: type, keys: Tuple[str, ...]) -> Any:
+    # One statement per (model, column set), shared by every call with that shape
+    table = model.__table__
+    pk = [c.key for c in table.primary_key]
+    stmt = pg_insert(model)
+    set_ = {k: stmt.excluded[k] for k in keys if k not in pk}
+    if "updated_at" in table.c:
+        set_["updated_at"] = func.now()
+    return stmt.on_conflict_do_update(index_elements=pk, set_=set_)
+
+
+def _dedupe_by_pk(model: type, rows: Sequence[Mapping[str, Any]]) -> List[Mapping[str, Any]]:
+    """Last row wins per primary key (ON CONFLICT can't update a row twice per statement)."""
+    pk = [c.key for c in model.__table__.primary_key]
+    return list({tuple(r[k] for k in pk): r for r in rows}.values())
+
+
 def upsert_transcript(
     db: Session,
     *,
@@ -219,42 +413,75 @@ def upsert_transcript(
     words: Optional[list] = None,
     processing_time_ms: Optional[int] = None,
     engine_time_ms: Optional[int] = None,
+    text_norm: Optional[str] = None,
+    autocommit: bool = True,
 ) -> Transcript:
-    tr = db.get(Transcript, (segment_id, segment_started_at))
-    if tr is None:
-        tr = Transcript(
-            segment_id=segment_id,
-            segment_started_at=segment_started_at,
-            language=language,
-            text=text,
-            words=words,
-            confidence=confidence,
-            model_name=model_name,
-            model_version=model_version,
-            processing_time_ms=processing_time_ms,
-            engine_time_ms=engine_time_ms,
-        )
-        db.add(tr)
-    else:
-        tr.text = text
-        tr.language = language
-        tr.confidence = confidence
-        tr.model_name = model_name
-        tr.model_version = model_version
-        tr.words = words
-        tr.processing_time_ms = processing_time_ms
-        tr.engine_time_ms = engine_time_ms
-        db.add(tr)
-    db.commit()
-    db.refresh(tr)
+    row = dict(
+        segment_id=segment_id,
+        segment_started_at=segment_started_at,
+        language=language,
+        text=text,
+        words=words,
+        confidence=confidence,
+        model_name=model_name,
+        model_version=model_version,
+        processing_time_ms=processing_time_ms,
+        engine_time_ms=engine_time_ms,
+    )
+    if text_norm is not None:
+        # Otherwise left as is on conflict
+        row["text_norm"] = text_norm
+    stmt = _upsert_by_pk(Transcript, row).values(row)
+    tr = db.scalars(stmt.returning(Transcript), execution_options={"populate_existing": True}).one()
+    _finish(db, autocommit)
     return tr
 
 
+def upsert_transcripts_bulk(db: Session, rows: Sequence[Mapping[str, Any]], *, autocommit: bool = True) -> int:
+    """Upsert transcript rows as one batched executemany and commit once.
+
+    Every row must carry the same keys; columns not given are left untouched on update.
+    """
+    if not rows:
+        return 0
+    rows = _dedupe_by_pk(Transcript, rows)
+    db.execute(_upsert_by_pk(Transcript, rows[0]), rows)
+    _finish(db, autocommit)
+    return len(rows)
+
+
+def replace_transcript_words(
+    db: Session,
+    *,
+    segment_id: UUID,
+    segment_started_at: datetime,
+    words: Sequence[Mapping[str, Any]],
+    autocommit: bool = True,
+) -> int:
+    """Replace a transcript's word rows with ``words`` (word, start_ms, end_ms, confidence).
+
+    Rows are numbered in the given order and written with one COPY.
+    """
+    db.execute(
+        delete(TranscriptWord).where(
+            TranscriptWord.segment_id == segment_id,
+            TranscriptWord.segment_started_at == segment_started_at,
+        )
+    )
+    n = bulk_copy(db, TranscriptWord, [
+        dict(w, segment_id=segment_id, segment_started_at=segment_started_at, idx=i)
+        for i, w in enumerate(words)
+    ])
+    _finish(db, autocommit)
+    return n
+
+
 def list_recent_transcripts(
     db: Session,
     *,
     channel_id: Optional[str] = None,
     since: Optional[datetime] = None,
+    q: Optional[str] = None,
     limit: int = 100,
     offset: int = 0,
 ) -> List[Tuple[Segment, Transcript]]:
@@ -263,6 +490,7 @@ def list_recent_transcripts(
     This pages over transcripts directly (ordered by Transcript.segment_started_at desc)
     and joins to the corresponding Segment, ensuring every returned item has a transcript.
     This avoids empty result pages when the newest segments are not yet transcribed.
+    ``q`` keeps transcripts containing all of its words (GIN full-text index on text_tsv).
     """
     stmt: Select = (
         select(Segment, Transcript)
@@ -278,6 +506,10 @@ def list_recent_transcripts(
         stmt = stmt.where(Segment.channel_id == channel_id)
     if since:
         stmt = stmt.where(Transcript.segment_started_at >= since)
+    if q:
+        # Same normalization as text_norm so folded spellings match
+        tsq = func.plainto_tsquery("simple", normalize_arabic(q))
+        stmt = stmt.where(Transcript.text_tsv.bool_op("@@")(tsq))
     stmt = stmt.order_by(desc(Transcript.segment_started_at)).offset(offset).limit(limit)
 
     rows = list(db.execute(stmt).all())
@@ -286,32 +518,99 @@ def list_recent_transcripts(
 
 # -------------------- Embeddings (pgvector) --------------------
 
+def _as_half(vector: Optional[Sequence[float]]) -> Optional[Any]:
+    """Cast to float16 up front so the halfvec column stores exactly what was sent."""
+    if vector is None:
+        return None
+    import numpy as np
+
+    return np.asarray(vector, dtype=np.float32).astype(np.float16)
+
+
+def _ensure_pgvector_adapters(db: Session) -> None:
+    """Register pgvector's psycopg dumpers/loaders on the session's connection, once."""
+    raw = db.connection().connection
+    if raw.adapters.types.get("halfvec") is None:
+        # Once per connection: look up the pgvector type OIDs and binary dumpers
+        from pgvector.psycopg import register_vector
+
+        register_vector(raw)
+
+
+class _HalfvecParam(HALFVEC):
+    """HALFVEC bind type that hands ``HalfVector`` to psycopg instead of a ``'[...]'`` string.
+
+    With the pgvector adapters registered the value is sent in binary (2 bytes per
+    dimension), skipping the per-float ``str()`` of the stock bind processor.
+    """
+
+    cache_ok = True
+
+    def bind_processor(self, dialect: Any) -> Any:
+        from pgvector import HalfVector
+
+        def process(value: Any) -> Any:
+            if value is None or isinstance(value, HalfVector):
+                return value
+            return HalfVector(value)
+
+        return process
+
+
+# Query vector for the similarity searches; the statement text is identical for every
+# query, so the compiled form stays in the SQLAlchemy cache and only the bytes change.
+_QVEC = bindparam("qvec", type_=_HalfvecParam(384))
+
+
+@lru_cache(maxsize=2)
+def _get_embedder(model_name: str) -> Any:
+    from sentence_transformers import SentenceTransformer  # lazy heavy import
+
+    return SentenceTransformer(model_name)
+
+
+@lru_cache(maxsize=2048)
+def embed_query_cached(text: str, model_name: str) -> Tuple[float, ...]:
+    """Embed query ``text`` with ``model_name``, memoized per (text, model) in this process.
+
+    Repeated searches (dashboards, saved queries) skip the transformer call. Returns an
+    immutable tuple so cached vectors can't be mutated by callers.
+    """
+    vec = _get_embedder(model_name).encode(text, normalize_embeddings=True)
+    return tuple(float(x) for x in vec)
+
+
 def upsert_embedding(
     db: Session,
     *,
     segment_id: UUID,
     segment_started_at: datetime,
     model_name: str,
-    vector: Optional[list[float]],
+    vector: Optional[Sequence[float]],
+    autocommit: bool = True,
 ) -> SegmentEmbedding:
-    emb = db.get(SegmentEmbedding, (segment_id, segment_started_at))
-    if emb is None:
-        emb = SegmentEmbedding(
-            segment_id=segment_id,
-            segment_started_at=segment_started_at,
-            model_name=model_name,
-            vector=vector,
-        )
-        db.add(emb)
-    else:
-        emb.model_name = model_name
-        emb.vector = vector
-        db.add(emb)
-    db.commit()
-    db.refresh(emb)
+    row = dict(
+        segment_id=segment_id,
+        segment_started_at=segment_started_at,
+        model_name=model_name,
+        vector=_as_half(vector),
+    )
+    stmt = _upsert_by_pk(SegmentEmbedding, row).values(row)
+    emb = db.scalars(stmt.returning(SegmentEmbedding), execution_options={"populate_existing": True}).one()
+    _finish(db, autocommit)
     return emb
 
 
+def upsert_embeddings_bulk(db: Session, rows: Sequence[Mapping[str, Any]], *, autocommit: bool = True) -> int:
+    """Upsert embedding rows (segment_id, segment_started_at, model_name, vector) and commit once."""
+    if not rows:
+        return 0
+    rows = [dict(r, vector=_as_half(r.get("vector"))) for r in _dedupe_by_pk(SegmentEmbedding, rows)]
+    db.execute(_upsert_by_pk(SegmentEmbedding, rows[0]), rows)
+    _finish(db, autocommit)
+    return len(rows)
+
+
 def semantic_search_segments_by_vector(
     db: Session,
     *,
@@ -319,13 +618,17 @@ def semantic_search_segments_by_vector(
     top_k: int = 5,
     model_name: Optional[str] = None,
     channel_id: Optional[str] = None,
+    ef_search: Optional[int] = None,
 ) -> List[Tuple[Segment, float]]:
-    """Return top-k segments most similar to the query vector (L2 distance).
+    """Return top-k segments most similar to the query vector (cosine distance).
 
-    Filters by embedding model and/or channel when provided.
+    Filters by embedding model and/or channel when provided. Filters apply after the
+    HNSW scan, so raise ``ef_search`` (this transaction only) when they are selective.
     """
-    # Build distance expression using pgvector comparator
-    distance = SegmentEmbedding.vector.l2_distance(query_vector)  # type: ignore[attr-defined]
+    if ef_search is not None:
+        db.execute(select(func.set_config("hnsw.ef_search", str(int(ef_search)), True)))
+    # Build distance expression using pgvector comparator (matches idx_embeddings_vector_hnsw)
+    distance = SegmentEmbedding.vector.cosine_distance(_QVEC)  # type: ignore[attr-defined]
 
     stmt: Select = select(Segment, distance.label("distance")).where(
         SegmentEmbedding.segment_id == Segment.id,
@@ -337,11 +640,66 @@ def semantic_search_segments_by_vector(
         stmt = stmt.where(Segment.channel_id == channel_id)
     stmt = stmt.order_by(distance.asc()).limit(top_k)
 
-    rows = list(db.execute(stmt).all())
+    _ensure_pgvector_adapters(db)
+    rows = list(db.execute(stmt, {"qvec": _as_half(query_vector)}).all())
     # rows are tuples: (Segment, distance)
     return [(row[0], float(row[1])) for row in rows]
 
 
+def semantic_search_segments_by_text(
+    db: Session,
+    *,
+    text: str,
+    model_name: str,
+    top_k: int = 5,
+    channel_id: Optional[str] = None,
+    ef_search: Optional[int] = None,
+) -> List[Tuple[Segment, float]]:
+    """Like ``semantic_search_segments_by_vector`` for a text query embedded with ``model_name``."""
+    return semantic_search_segments_by_vector(
+        db,
+        query_vector=list(embed_query_cached(text, model_name)),
+        top_k=top_k,
+        model_name=model_name,
+        channel_id=channel_id,
+        ef_search=ef_search,
+    )
+
+
+def knn_segments(
+    db: Session,
+    q_vec: Sequence[float],
+    k: int = 10,
+    *,
+    ef_search: Optional[int] = None,
+    model_name: Optional[str] = None,
+) -> List[Tuple[UUID, datetime, float, float]]:
+    """Nearest segment embeddings by cosine distance, served by the HNSW index.
+
+    Returns ``(segment_id, segment_started_at, distance, similarity)`` ordered by
+    distance. The ORDER BY is the bare ``vector <=> :q`` ascending: wrapping it
+    (``1 - (vector <=> q) DESC``, ``-1 * (vector <#> q)``) makes the planner skip
+    the index and sort the whole table. Similarity is derived in the select list.
+    ``ef_search`` overrides DB_HNSW_EF_SEARCH for the current transaction.
+    """
+    if ef_search is not None:
+        db.execute(select(func.set_config("hnsw.ef_search", str(int(ef_search)), True)))
+    distance = SegmentEmbedding.vector.cosine_distance(_QVEC)  # type: ignore[attr-defined]
+    stmt: Select = select(
+        SegmentEmbedding.segment_id,
+        SegmentEmbedding.segment_started_at,
+        distance.label("distance"),
+    )
+    if model_name:
+        stmt = stmt.where(SegmentEmbedding.model_name == model_name)
+    stmt = stmt.order_by(distance).limit(k)
+    _ensure_pgvector_adapters(db)
+    return [
+        (seg_id, started_at, float(dist), 1.0 - float(dist))
+        for seg_id, started_at, dist in db.execute(stmt, {"qvec": _as_half(q_vec)}).all()
+    ]
+
+
 # -------------------- Helpers for ASR pipeline --------------------
 
 def list_segments_missing_transcripts(
@@ -349,29 +707,151 @@ def list_segments_missing_transcripts(
     *,
     channel_id: Optional[str] = None,
     since: Optional[datetime] = None,
+    before: Optional[datetime] = None,
     limit: int = 200,
 ) -> List[Segment]:
     """List recent completed segments that have audio and no transcript yet.
 
-    Results ordered by newest first.
+    Results ordered by newest first. Page with ``before`` = the last row's started_at
+    (keyset), which idx_segments_missing_tr serves without re-reading earlier pages.
     """
-    tr_exists = (
-        select(Transcript.segment_id)
-        .where(
-            Transcript.segment_id == Segment.id,
-            Transcript.segment_started_at == Segment.started_at,
-        )
-        .limit(1)
-    )
-    stmt: Select = select(Segment).where(
+    # lambda_stmt: the statement is built and its cache key computed once per shape; later
+    # calls only extract the closure values (channel_id, since, limit) as bound parameters
+    stmt = lambda_stmt(lambda: select(Segment).where(
         Segment.audio_path.is_not(None),  # only segments with audio are eligible for ASR
         Segment.status == "completed",
-        ~exists(tr_exists),
-    )
+        ~exists(
+            select(Transcript.segment_id)
+            .where(
+                Transcript.segment_id == Segment.id,
+                Transcript.segment_started_at == Segment.started_at,
+            )
+            .limit(1)
+        ),
+    ))
     if channel_id:
-        stmt = stmt.where(Segment.channel_id == channel_id)
+        stmt += lambda s: s.where(Segment.channel_id == channel_id)
     if since:
-        stmt = stmt.where(Segment.started_at >= since)
-    stmt = stmt.order_by(desc(Segment.started_at)).limit(limit)
+        stmt += lambda s: s.where(Segment.started_at >= since)
+    if before:
+        stmt += lambda s: s.where(Segment.started_at < before)
+    stmt += lambda s: s.order_by(desc(Segment.started_at)).limit(limit)
     return list(db.execute(stmt).scalars().all())
 
+
+
+# -------------------- Bulk ingest (COPY) --------------------
+
+def _copy_type(sa_type: Any) -> Optional[str]:
+    """PostgreSQL type name for binary COPY of ``sa_type`` values; None if unsupported."""
+    if isinstance(sa_type, ARRAY):
+        item = _copy_type(sa_type.item_type)
+        return f"{item}[]" if item else None
+    if isinstance(sa_type, JSONB):
+        return "jsonb"
+    if isinstance(sa_type, JSON):
+        return "json"
+    if isinstance(sa_type, PG_UUID):
+        return "uuid"
+    if isinstance(sa_type, DateTime):
+        return "timestamptz" if sa_type.timezone else "timestamp"
+    if isinstance(sa_type, REAL):
+        return "float4"
+    if isinstance(sa_type, Float):
+        return "float8"
+    if isinstance(sa_type, BigInteger):
+        return "int8"
+    if isinstance(sa_type, Integer):
+        return "int4"
+    if isinstance(sa_type, Boolean):
+        return "bool"
+    if isinstance(sa_type, String):
+        # Also enums: their binary input is the label's text
+        return "text"
+    if isinstance(sa_type, HALFVEC):
+        return "halfvec"
+    if isinstance(sa_type, Vector):
+        return "vector"
+    return None
+
+
+def bulk_copy(db: Session, model: type, rows: Sequence[Mapping[str, Any]], *, into: Optional[str] = None) -> int:
+    """Append ``rows`` (column key -> value) to ``model``'s table with one COPY.
+
+    For high-rate append-only writes (e.g. visual events): one protocol stream
+    instead of an INSERT per row. Runs in the session's transaction; the caller
+    commits. Python-side column defaults (ids, timestamps) are filled here since
+    COPY bypasses the ORM; there is no conflict handling or RETURNING. ``into``
+    names another table with the same columns (e.g. a temp staging table).
+
+    Uses binary COPY when every column type has a binary mapping, so arrays such
+    as ``bbox`` go over the wire as packed int4s and vectors as pgvector's binary
+    frame instead of text the server has to parse; otherwise text COPY.
+    """
+    if not rows:
+        return 0
+    from pgvector import HalfVector, Vector as PgVector
+    from psycopg.types.json import Json
+
+    table = model.__table__
+    keys = {k for r in rows for k in r}
+    columns = [c for c in table.columns if c.key in keys or c.default is not None]
+    types = [_copy_type(c.type) for c in columns]
+    binary = all(types)
+    raw = db.connection().connection
+    if binary and {"vector", "halfvec"} & set(types):
+        _ensure_pgvector_adapters(db)
+    preparer = db.get_bind().dialect.identifier_preparer
+    sql = "COPY {} ({}) FROM STDIN{}".format(
+        preparer.quote(into) if into else preparer.format_table(table),
+        ", ".join(preparer.format_column(c) for c in columns),
+        " (FORMAT BINARY)" if binary else "",
+    )
+
+    def _value(col: Any, row: Mapping[str, Any]) -> Any:
+        val = row.get(col.key)
+        if val is None and col.default is not None:
+            val = col.default.arg(None) if col.default.is_callable else col.default.arg
+        if val is None:
+            return None
+        if isinstance(col.type, JSON):
+            return Json(val)
+        if isinstance(col.type, HALFVEC):
+            return HalfVector(val) if binary else HalfVector(val).to_text()
+        if isinstance(col.type, Vector):
+            return PgVector(val) if binary else PgVector(val).to_text()
+        return val
+
+    with raw.cursor() as cur:
+        with cur.copy(sql) as copy:
+            if binary:
+                copy.set_types(types)
+            for row in rows:
+                copy.write_row([_value(c, row) for c in columns])
+    return len(rows)
+
+
+def upsert_embeddings_copy(db: Session, rows: Sequence[Mapping[str, Any]], *, autocommit: bool = True) -> int:
+    """Upsert many embeddings via binary COPY into a staging table, then one INSERT ... SELECT.
+
+    For backfills and re-embedding jobs; same result as ``upsert_embeddings_bulk``
+    (last row wins per segment). Commits once.
+    """
+    if not rows:
+        return 0
+    db.execute(text(
+        "CREATE TEMP TABLE _segment_embeddings_load "
+        "(LIKE segment_embeddings INCLUDING DEFAULTS) ON COMMIT DROP"
+    ))
+    rows = [dict(r, vector=_as_half(r.get("vector"))) for r in _dedupe_by_pk(SegmentEmbedding, rows)]
+    bulk_copy(db, SegmentEmbedding, rows, into="_segment_embeddings_load")
+    result = db.execute(text(
+        "INSERT INTO segment_embeddings (segment_id, segment_started_at, model_name, vector) "
+        "SELECT segment_id, segment_started_at, model_name, vector FROM _segment_embeddings_load "
+        "ON CONFLICT (segment_id, segment_started_at) DO UPDATE "
+        "SET model_name = excluded.model_name, vector = excluded.vector, updated_at = now()"
+    ))
+    # Dropped now rather than at commit so the caller can run this again in one transaction
+    db.execute(text("DROP TABLE _segment_embeddings_load"))
+    _finish(db, autocommit)
+    return result.rowcount
@@ -3,14 +3,16 @@ Retention and cleanup jobs for non-hypertable tables.
 
 TimescaleDB retention policies handle hypertables (e.g., recordings, segments,
 visual_events, system_metrics). This script cleans up regular tables that
-reference time via segment_started_at: transcripts and segment_embeddings.
+reference time via segment_started_at: transcripts and segment_embeddings,
+plus transcript_words (a hypertable without a retention policy), which
+follows the transcripts cutoff.
 
 Usage:
   source mobasher/venv/bin/activate
   python -m mobasher.storage.retention_jobs --yes \
       --retain-transcripts-days 365 \
       --retain-embeddings-days 365 \
-      --retain-screenshots-days 90 [--screenshots-root /path/to/root]
+      --retain-screenshots-days 90 [--screenshots-root /path/to/root] [--batch-size 10000]
 
 Notes:
   - Use --dry-run to see what would be deleted.
@@ -21,31 +23,58 @@ from __future__ import annotations
 
 import argparse
 from datetime import datetime, timedelta, timezone
-from typing import Tuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import List, Tuple
 import os
 import shutil
 
 from sqlalchemy import text
+from sqlalchemy.engine import Engine
 
 from .db import init_engine
 
 
 def delete_older_than(table: str, cutoff_iso: str) -> str:
-    if table == "transcripts":
+    """One bounded batch (:batch rows) of the retention delete for ``table``.
+
+    Deleting by ctid in batches keeps each transaction's row locks and WAL burst small
+    and lets autovacuum reclaim space between batches; repeat until a batch comes back short.
+    """
+    if table in ("transcripts", "segment_embeddings"):
         return (
-            "DELETE FROM transcripts \n"
-            " WHERE segment_started_at < :cutoff"
+            f"WITH d AS (SELECT ctid FROM {table} WHERE segment_started_at < :cutoff LIMIT :batch) \n"
+            f"DELETE FROM {table} WHERE ctid IN (SELECT ctid FROM d)"
         )
-    if table == "segment_embeddings":
+    if table == "transcript_words":
+        # Hypertable: ctids are only unique per chunk, so batch by primary key
         return (
-            "DELETE FROM segment_embeddings \n"
-            " WHERE segment_started_at < :cutoff"
+            "WITH d AS (SELECT segment_id, segment_started_at, idx FROM transcript_words "
+            "WHERE segment_started_at < :cutoff LIMIT :batch) \n"
+            "DELETE FROM transcript_words w USING d "
+            "WHERE (w.segment_id, w.segment_started_at, w.idx) = (d.segment_id, d.segment_started_at, d.idx)"
         )
     raise ValueError(f"Unsupported cleanup table: {table}")
 
 
+def delete_in_batches(engine: Engine, table: str, cutoff: datetime, batch_size: int = 10_000) -> int:
+    """Run ``delete_older_than`` batches, one transaction each, until nothing is left."""
+    sql = text(delete_older_than(table, cutoff.isoformat()))
+    total = 0
+    while True:
+        with engine.begin() as conn:
+            n = conn.execute(sql, {"cutoff": cutoff, "batch": batch_size}).rowcount
+        total += n
+        if n < batch_size:
+            return total
+
+
+def _count(engine: Engine, table: str, cutoff: datetime) -> int:
+    with engine.connect() as conn:
+        return int(conn.execute(text(count_older_than(table)), {"cutoff": cutoff}).scalar_one())
+
+
 def count_older_than(table: str) -> str:
-    if table in ("transcripts", "segment_embeddings"):
+    if table in ("transcripts", "transcript_words", "segment_embeddings"):
         return f"SELECT count(*) FROM {table} WHERE segment_started_at < :cutoff"
     if table in ("entities",):
         return f"SELECT count(*) FROM {table} WHERE started_at < :cutoff"
@@ -54,61 +83,94 @@ def count_older_than(table: str) -> str:
     raise ValueError(f"Unsupported count table: {table}")
 
 
+_IMAGE_SUFFIXES = ('.jpg', '.jpeg', '.png')
+
+
+def _sweep_dir(path: str, cutoff_ts: float, dry_run: bool) -> Tuple[int, List[str]]:
+    """Expire images directly in ``path``; return (count, subdirectories to visit)."""
+    expired = 0
+    subdirs: List[str] = []
+    with os.scandir(path) as it:
+        for entry in it:
+            try:
+                # d_type from the directory listing: no stat() needed to tell dirs from files
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                if not entry.name.lower().endswith(_IMAGE_SUFFIXES):
+                    continue
+                if entry.stat(follow_symlinks=False).st_mtime < cutoff_ts:
+                    expired += 1
+                    if not dry_run:
+                        os.remove(entry.path)
+            except FileNotFoundError:
+                pass
+    return expired, subdirs
+
+
+def sweep_screenshots(root: str, cutoff_ts: float, dry_run: bool, max_workers: int = 8) -> int:
+    """Delete (or count) images under ``root`` older than ``cutoff_ts``.
+
+    Metadata-bound, so directories are listed in parallel threads; each worker
+    queues the subdirectories it finds.
+    """
+    total = 0
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = {pool.submit(_sweep_dir, root, cutoff_ts, dry_run)}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    expired, subdirs = fut.result()
+                except OSError:
+                    continue  # directory vanished or unreadable
+                total += expired
+                pending.update(pool.submit(_sweep_dir, d, cutoff_ts, dry_run) for d in subdirs)
+    return total
+
+
 def run_cleanup(
     retain_transcripts_days: int,
     retain_embeddings_days: int,
     retain_screenshots_days: int,
     screenshots_root: str,
     dry_run: bool,
-) -> Tuple[int, int, int]:
+    batch_size: int = 10_000,
+) -> Tuple[int, int, int, int]:
     engine = init_engine()
     now = datetime.now(timezone.utc)
     transcripts_cutoff = now - timedelta(days=retain_transcripts_days)
     embeddings_cutoff = now - timedelta(days=retain_embeddings_days)
 
-    deleted_transcripts = 0
-    deleted_embeddings = 0
     deleted_screenshots = 0
 
-    with engine.begin() as conn:
-        # Transcripts
-        to_delete_count = conn.execute(
-            text(count_older_than("transcripts")), {"cutoff": transcripts_cutoff}
-        ).scalar_one()
-        if not dry_run and to_delete_count:
-            conn.execute(text(delete_older_than("transcripts", transcripts_cutoff.isoformat())), {"cutoff": transcripts_cutoff})
-        deleted_transcripts = int(to_delete_count)
-
-        # Embeddings
-        to_delete_count = conn.execute(
-            text(count_older_than("segment_embeddings")), {"cutoff": embeddings_cutoff}
-        ).scalar_one()
-        if not dry_run and to_delete_count:
-            conn.execute(text(delete_older_than("segment_embeddings", embeddings_cutoff.isoformat())), {"cutoff": embeddings_cutoff})
-        deleted_embeddings = int(to_delete_count)
-
-    # Screenshots: delete files older than cutoff by filesystem mtime
-    try:
-        cutoff_ts = (now - timedelta(days=retain_screenshots_days)).timestamp()
-        root = screenshots_root or os.environ.get('MOBASHER_SCREENSHOT_ROOT', '')
-        if root and os.path.isdir(root):
-            for dirpath, dirnames, filenames in os.walk(root):
-                for fn in filenames:
-                    if not fn.lower().endswith(('.jpg', '.jpeg', '.png')):
-                        continue
-                    fp = os.path.join(dirpath, fn)
-                    try:
-                        st = os.stat(fp)
-                        if st.st_mtime < cutoff_ts:
-                            deleted_screenshots += 1
-                            if not dry_run:
-                                os.remove(fp)
-                    except FileNotFoundError:
-                        pass
-    except Exception:
-        pass
-
-    return deleted_transcripts, deleted_embeddings, deleted_screenshots
+    # The tables are disjoint, so their deletes (WAL-flush bound) run side by side on
+    # separate pooled connections while the screenshot walk runs here on the main thread
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        if dry_run:
+            transcripts_fut = pool.submit(_count, engine, "transcripts", transcripts_cutoff)
+            words_fut = pool.submit(_count, engine, "transcript_words", transcripts_cutoff)
+            embeddings_fut = pool.submit(_count, engine, "segment_embeddings", embeddings_cutoff)
+        else:
+            transcripts_fut = pool.submit(delete_in_batches, engine, "transcripts", transcripts_cutoff, batch_size)
+            # Word rows follow their transcripts' retention
+            words_fut = pool.submit(delete_in_batches, engine, "transcript_words", transcripts_cutoff, batch_size)
+            embeddings_fut = pool.submit(delete_in_batches, engine, "segment_embeddings", embeddings_cutoff, batch_size)
+
+        # Screenshots: delete files older than cutoff by filesystem mtime
+        try:
+            cutoff_ts = (now - timedelta(days=retain_screenshots_days)).timestamp()
+            root = screenshots_root or os.environ.get('MOBASHER_SCREENSHOT_ROOT', '')
+            if root and os.path.isdir(root):
+                deleted_screenshots = sweep_screenshots(root, cutoff_ts, dry_run)
+        except Exception:
+            pass
+
+        deleted_transcripts = transcripts_fut.result()
+        deleted_words = words_fut.result()
+        deleted_embeddings = embeddings_fut.result()
+
+    return deleted_transcripts, deleted_words, deleted_embeddings, deleted_screenshots
 
 
 def main() -> None:
@@ -119,17 +181,19 @@ def main() -> None:
     parser.add_argument("--retain-embeddings-days", type=int, default=365)
     parser.add_argument("--retain-screenshots-days", type=int, default=90)
     parser.add_argument("--screenshots-root", type=str, default="", help="Override MOBASHER_SCREENSHOT_ROOT")
+    parser.add_argument("--batch-size", type=int, default=10_000, help="Rows deleted per transaction")
     args = parser.parse_args()
 
     if not args.dry_run and not args.yes:
         parser.error("Refusing to run without --yes (or use --dry-run)")
 
-    deleted_transcripts, deleted_embeddings, deleted_screenshots = run_cleanup(
+    deleted_transcripts, deleted_words, deleted_embeddings, deleted_screenshots = run_cleanup(
         retain_transcripts_days=args.retain_transcripts_days,
         retain_embeddings_days=args.retain_embeddings_days,
         retain_screenshots_days=args.retain_screenshots_days,
         screenshots_root=args.screenshots_root,
         dry_run=args.dry_run,
+        batch_size=args.batch_size,
     )
 
     mode = "DRY-RUN" if args.dry_run else "DELETED"
@@ -142,9 +206,9 @@ def main() -> None:
         with engine.begin() as conn:
             ents = conn.execute(text(count_older_than("entities")), {"cutoff": entities_cutoff}).scalar_one()
             alrt = conn.execute(text(count_older_than("alerts")), {"cutoff": alerts_cutoff}).scalar_one()
-        print(f"{mode}: transcripts={deleted_transcripts}, embeddings={deleted_embeddings}, screenshots_files={deleted_screenshots}, entities_old={int(ents)}, alerts_old={int(alrt)}")
+        print(f"{mode}: transcripts={deleted_transcripts}, transcript_words={deleted_words}, embeddings={deleted_embeddings}, screenshots_files={deleted_screenshots}, entities_old={int(ents)}, alerts_old={int(alrt)}")
     except Exception:
-        print(f"{mode}: transcripts={deleted_transcripts}, embeddings={deleted_embeddings}, screenshots_files={deleted_screenshots}")
+        print(f"{mode}: transcripts={deleted_transcripts}, transcript_words={deleted_words}, embeddings={deleted_embeddings}, screenshots_files={deleted_screenshots}")
 
 
 if __name__ == "__main__":
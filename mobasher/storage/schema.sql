@@ -116,15 +116,17 @@ CREATE TABLE IF NOT EXISTS system_metrics (
 SELECT create_hypertable('system_metrics', 'timestamp', if_not_exists => TRUE);
 
 -- Indexes for performance
-CREATE INDEX IF NOT EXISTS idx_recordings_channel_time ON recordings(channel_id, started_at DESC);
-CREATE INDEX IF NOT EXISTS idx_segments_channel_time ON segments(channel_id, started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_recordings_channel_time_desc ON recordings(channel_id, started_at DESC);
+CREATE INDEX IF NOT EXISTS idx_segments_recent_covering ON segments(channel_id, started_at DESC)
+    INCLUDE (id, ended_at, status, audio_path, video_path);
 CREATE INDEX IF NOT EXISTS idx_segments_recording ON segments(recording_id, started_at);
 CREATE INDEX IF NOT EXISTS idx_transcripts_language ON transcripts(language);
 CREATE INDEX IF NOT EXISTS idx_transcripts_segment ON transcripts(segment_id, segment_started_at);
 CREATE INDEX IF NOT EXISTS idx_embeddings_segment ON segment_embeddings(segment_id, segment_started_at);
 CREATE INDEX IF NOT EXISTS idx_visual_events_segment ON visual_events(segment_id, segment_started_at);
 CREATE INDEX IF NOT EXISTS idx_visual_events_type ON visual_events(event_type);
-CREATE INDEX IF NOT EXISTS idx_system_metrics_name ON system_metrics(metric_name, timestamp DESC);
+CREATE INDEX IF NOT EXISTS idx_visual_events_channel_created_desc ON visual_events(channel_id, created_at DESC);
+CREATE INDEX IF NOT EXISTS idx_system_metrics_name_desc ON system_metrics(metric_name, timestamp DESC);
 
 -- Full-text search index for transcripts
 CREATE INDEX IF NOT EXISTS idx_transcripts_text_search ON transcripts USING GIN(to_tsvector('arabic', text));
@@ -4,6 +4,7 @@ Utility script to truncate Mobasher database tables for a fresh start.
 Usage:
   source venv/bin/activate
   python -m mobasher.storage.truncate_db --yes
+  python -m mobasher.storage.truncate_db --yes --drop-recreate   # dev/CI: faster on big hypertables
 
 By default, requires --yes to proceed. Set --force to skip prompt (CI).
 """
@@ -12,9 +13,10 @@ from __future__ import annotations
 import argparse
 from typing import Sequence
 
-from sqlalchemy import text
+from sqlalchemy import Connection, text
 
 from .db import init_engine
+from .models import Base
 
 # Order matters if not using CASCADE. We'll use TRUNCATE ... CASCADE to simplify.
 TABLES: Sequence[str] = (
@@ -22,6 +24,7 @@ TABLES: Sequence[str] = (
     "visual_events",
     "screenshots",
     "segment_embeddings",
+    "transcript_words",
     "transcripts",
     "segments",
     "recordings",
@@ -32,6 +35,37 @@ TABLES: Sequence[str] = (
 )
 
 
+def _drop_recreate(conn: Connection, tables: Sequence[str]) -> None:
+    """DROP the tables and recreate them from the models instead of truncating.
+
+    Truncating a hypertable truncates every chunk; dropping it discards the chunks
+    wholesale. ``create_all`` re-runs the hypertable DDL hooks. Views and triggers
+    on these tables would go with the CASCADE, so they are read back first and
+    recreated afterwards.
+    """
+    views = conn.execute(text(
+        "SELECT viewname, definition FROM pg_catalog.pg_views WHERE schemaname = current_schema()"
+    )).all()
+    triggers = conn.execute(text(
+        "SELECT pg_get_triggerdef(t.oid) FROM pg_catalog.pg_trigger t "
+        "JOIN pg_catalog.pg_class c ON c.oid = t.tgrelid "
+        "WHERE NOT t.tgisinternal AND t.tgname NOT LIKE 'ts\\_%' "  # TimescaleDB recreates its own
+        "AND c.relnamespace = current_schema()::regnamespace AND c.relname = ANY(:tables)"
+    ), {"tables": list(tables)}).scalars().all()
+
+    conn.execute(text("DROP TABLE IF EXISTS " + ", ".join(tables) + " CASCADE"))
+    Base.metadata.create_all(bind=conn, tables=[Base.metadata.tables[t] for t in tables])
+
+    existing_views = set(conn.execute(text(
+        "SELECT viewname FROM pg_catalog.pg_views WHERE schemaname = current_schema()"
+    )).scalars().all())
+    for name, definition in views:
+        if name not in existing_views:
+            conn.execute(text(f'CREATE VIEW "{name}" AS {definition}'))
+    for ddl in triggers:
+        conn.execute(text(ddl))
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Truncate Mobasher DB tables")
     parser.add_argument("--yes", action="store_true", help="Confirm truncate (required)")
@@ -41,6 +75,12 @@ def main() -> None:
         action="store_true",
         help="Also truncate channels table",
     )
+    parser.add_argument(
+        "--drop-recreate",
+        action="store_true",
+        help="DROP and recreate the tables from the models instead of TRUNCATE (dev/CI; "
+        "indexes that exist only in migrations are not restored)",
+    )
     args = parser.parse_args()
 
     if not (args.yes or args.force):
@@ -65,6 +105,16 @@ def main() -> None:
             print("No target tables found to truncate in current schema.")
             return
 
+        # Fail fast if a worker holds a lock instead of queueing behind it (and blocking
+        # everyone else behind us); the statement itself may run as long as it needs
+        conn.execute(text("SET LOCAL statement_timeout = 0"))
+        conn.execute(text("SET LOCAL lock_timeout = '1s'"))
+
+        if args.drop_recreate:
+            _drop_recreate(conn, truncate_list)
+            print("Dropped and recreated:", ", ".join(truncate_list))
+            return
+
         # Use TRUNCATE with CASCADE; avoid session_replication_role (often disallowed on managed DBs)
         # PostgreSQL TRUNCATE does not support IF EXISTS for multiple tables in one statement.
         # Execute a single TRUNCATE without IF EXISTS since we filtered to existing tables.
@@ -1,4 +1,5 @@
 import os
+import uuid
 from datetime import datetime, timezone, timedelta
 import sys
 from pathlib import Path
@@ -85,16 +86,41 @@ def test_repositories_end_to_end_postgres_container():
             )
             assert tr.text.startswith("اختبار")
 
-            # Embedding (384-dim zero vector for smoke test)
+            # Embeddings: one-hot 384-dim vectors (cosine distance is undefined for a zero
+            # vector, and pgvector does not index zero-norm vectors)
+            def unit(i: int) -> list[float]:
+                v = [0.0] * 384
+                v[i] = 1.0
+                return v
+
             emb = upsert_embedding(
                 db,
                 segment_id=seg.id,
                 segment_started_at=seg.started_at,
                 model_name="sentence-transformers-test",
-                vector=[0.0] * 384,
+                vector=unit(0),
             )
             assert emb.model_name.startswith("sentence-transformers")
 
+            other = upsert_segment(
+                db,
+                segment_id=uuid.uuid4(),
+                recording_id=rec.id,
+                channel_id=ch.id,
+                started_at=seg_id_start + timedelta(seconds=60),
+                ended_at=seg_id_start + timedelta(seconds=120),
+                audio_path="/tmp/audio2.wav",
+                video_path=None,
+                file_size_bytes=12345,
+            )
+            upsert_embedding(
+                db,
+                segment_id=other.id,
+                segment_started_at=other.started_at,
+                model_name="sentence-transformers-test",
+                vector=unit(1),
+            )
+
             # Complete recording
             rec2 = complete_recording(db, recording_id=rec.id, started_at=started_at)
             assert rec2 is not None and rec2.status == "completed"
@@ -106,13 +132,14 @@ def test_repositories_end_to_end_postgres_container():
             # Semantic search
             results = semantic_search_segments_by_vector(
                 db,
-                query_vector=[0.0] * 384,
+                query_vector=[1.0, 0.2] + [0.0] * 382,
                 top_k=3,
                 model_name="sentence-transformers-test",
                 channel_id=ch.id,
             )
-            assert len(results) >= 1
+            assert [s.id for s, _ in results] == [seg.id, other.id]
             top_seg, distance = results[0]
             assert isinstance(distance, float)
+            assert 0.0 < distance < results[1][1]
 
 
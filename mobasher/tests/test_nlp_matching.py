@@ -0,0 +1,52 @@
+import sys
+from pathlib import Path
+
+# Ensure repo root on path so 'mobasher' package resolves when tests run from anywhere
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+from mobasher.nlp.worker import _HyperscanMatcher, _build_automaton, _find_phrases, _normalized
+
+
+# Multi-byte text before each match: Arabic letters are 2 bytes in UTF-8, the emoji 4
+TEXT = _normalized("🔴 عاجل: قال الرئيس إن وزارة الصحة أعلنت حالة الطوارئ في المدينة")
+DICTS = [
+    ("org", ["وزارة الصحة", "وزارة الخارجية"]),
+    ("event", ["أعلنت حالة الطوارئ", "الطوارئ"]),
+    ("place", ["المدينة"]),
+]
+PHRASES = [p for _, items in DICTS for p in items]
+# Character (not byte) offsets of the first match, found by phrase in normalized form
+EXPECTED = {p: TEXT.index(_normalized(p)) for p in ("وزارة الصحة", "أعلنت حالة الطوارئ", "الطوارئ", "المدينة")}
+
+
+def test_hyperscan_char_offsets():
+    pytest.importorskip("hyperscan")
+    automaton = _build_automaton(PHRASES)
+    assert isinstance(automaton, _HyperscanMatcher)
+    assert _find_phrases(automaton, DICTS, TEXT) == EXPECTED
+
+
+def test_pyahocorasick_fallback(monkeypatch):
+    pytest.importorskip("ahocorasick")
+    # A None entry makes "import hyperscan" raise ImportError
+    monkeypatch.setitem(sys.modules, "hyperscan", None)
+    automaton = _build_automaton(PHRASES)
+    assert type(automaton).__name__ == "Automaton"
+    assert _find_phrases(automaton, DICTS, TEXT) == EXPECTED
+
+
+def test_str_find_fallback(monkeypatch):
+    monkeypatch.setitem(sys.modules, "hyperscan", None)
+    monkeypatch.setitem(sys.modules, "ahocorasick", None)
+    assert _build_automaton(PHRASES) is None
+    assert _find_phrases(None, DICTS, TEXT) == EXPECTED
+
+
+def test_first_occurrence_only():
+    text = _normalized("الصحة ثم وزارة الصحة ثم وزارة الصحة")
+    first = text.index(_normalized("وزارة الصحة"))
+    dicts = [("org", ["وزارة الصحة"])]
+    assert _find_phrases(_build_automaton(["وزارة الصحة"]), dicts, text) == {"وزارة الصحة": first}
+    assert _find_phrases(None, dicts, text) == {"وزارة الصحة": first}
@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+# Ensure repo root on path so 'mobasher' package resolves when tests run from anywhere
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+from mobasher.nlp.normalize import normalize_arabic
+
+
+@pytest.mark.parametrize("raw, expected", [
+    ("أحمد", "احمد"),
+    ("إسلام", "اسلام"),
+    ("آمال", "امال"),
+    ("ٱلله", "الله"),
+    ("مصطفى", "مصطفي"),
+    ("مدرسة", "مدرسه"),
+])
+def test_folds_alef_yah_and_teh_marbuta(raw, expected):
+    assert normalize_arabic(raw) == expected
+
+
+def test_preserves_offsets_and_other_text():
+    raw = "🔴 Breaking: وزارة الصحة أعلنت 2025"
+    out = normalize_arabic(raw)
+    # One character to one character, so match offsets in normalized text map back to the original
+    assert len(out) == len(raw)
+    assert out == "🔴 Breaking: وزاره الصحه اعلنت 2025"
+
+
+def test_idempotent():
+    once = normalize_arabic("إن وزارة الصحة أعلنت في مستشفى")
+    assert normalize_arabic(once) == once
@@ -0,0 +1,336 @@
+import asyncio
+import struct
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Ensure repo root on path so 'mobasher' package resolves when tests run from anywhere
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+
+import pytest
+
+from mobasher.ingestion.archive_recorder import _has_moov_atom, pump_ffmpeg_stderr
+from mobasher.ingestion.recorder import (
+    DualHLSRecorder,
+    SegmentBatch,
+    _flac_duration,
+    _mp4_duration,
+    _opus_duration,
+    _parse_filename_cached,
+    _wav_duration,
+)
+
+
+# -------------------- in-memory media headers --------------------
+
+def wav_bytes(seconds: float, sample_rate: int = 16000, data_size: int | None = None) -> bytes:
+    """16-bit mono PCM WAV; ``data_size`` overrides the header's data chunk size."""
+    byte_rate = sample_rate * 2
+    samples = b"\x00\x00" * int(sample_rate * seconds)
+    fmt = struct.pack("<HHIIHH", 1, 1, sample_rate, byte_rate, 2, 16)
+    size = len(samples) if data_size is None else data_size
+    body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"data" + struct.pack("<I", size) + samples
+    return b"RIFF" + struct.pack("<I", 4 + len(body)) + body
+
+
+def flac_bytes(sample_rate: int, total_samples: int) -> bytes:
+    """'fLaC' marker plus a last-block STREAMINFO (mono, 16-bit)."""
+    packed = (sample_rate << 44) | (0 << 41) | (15 << 36) | total_samples
+    streaminfo = struct.pack(">HH", 4096, 4096) + b"\x00" * 6 + packed.to_bytes(8, "big") + b"\x00" * 16
+    return b"fLaC" + bytes([0x80]) + len(streaminfo).to_bytes(3, "big") + streaminfo
+
+
+def ogg_page(granule: int, payload: bytes) -> bytes:
+    # capture pattern, version, header type, granule, serial, sequence, crc, 1 lacing value
+    return b"OggS" + b"\x00\x00" + struct.pack("<qIII", granule, 1, 0, 0) + bytes([1, len(payload)]) + payload
+
+
+def opus_bytes(pre_skip: int, final_granule: int) -> bytes:
+    head = b"OpusHead" + bytes([1, 1]) + struct.pack("<HIhB", pre_skip, 48000, 0, 0)
+    return ogg_page(0, head) + ogg_page(0, b"OpusTags" + b"\x00" * 8) + ogg_page(final_granule, b"\x00" * 32)
+
+
+def box(kind: bytes, payload: bytes) -> bytes:
+    return struct.pack(">I", 8 + len(payload)) + kind + payload
+
+
+def mvhd(timescale: int, duration: int, version: int = 0) -> bytes:
+    if version == 1:
+        times = struct.pack(">QQIQ", 0, 0, timescale, duration)
+    else:
+        times = struct.pack(">IIII", 0, 0, timescale, duration)
+    return box(b"mvhd", bytes([version, 0, 0, 0]) + times + b"\x00" * 80)
+
+
+def mp4_bytes(timescale: int = 1000, duration: int = 60_000, version: int = 0, moov: bool = True) -> bytes:
+    ftyp = box(b"ftyp", b"isom\x00\x00\x02\x00isomiso2mp41")
+    mdat = box(b"mdat", b"\x00" * 64)
+    if not moov:
+        # Still being written: ffmpeg leaves the mdat size at 0 until the file is closed
+        return ftyp + struct.pack(">I", 0) + b"mdat" + b"\x00" * 64
+    return ftyp + mdat + box(b"moov", mvhd(timescale, duration, version))
+
+
+@pytest.fixture
+def write(tmp_path):
+    def _write(name: str, data: bytes) -> str:
+        path = tmp_path / name
+        path.write_bytes(data)
+        return str(path)
+    return _write
+
+
+# -------------------- header durations --------------------
+
+def test_wav_duration_from_header(write):
+    assert _wav_duration(write("a.wav", wav_bytes(2.0))) == pytest.approx(2.0)
+
+
+@pytest.mark.parametrize("data_size", [0, 0xFFFFFFFF, 10 ** 9])
+def test_wav_duration_unfinalized_header_uses_bytes_present(write, data_size):
+    path = write("a.wav", wav_bytes(1.5, data_size=data_size))
+    assert _wav_duration(path) == pytest.approx(1.5)
+
+
+def test_wav_duration_rejects_other_files(write):
+    assert _wav_duration(write("a.wav", b"RIFF\x00\x00\x00\x00AVI LIST")) is None
+    assert _wav_duration(write("b.wav", b"")) is None
+    assert _wav_duration("/nonexistent/a.wav") is None
+
+
+def test_flac_duration_from_streaminfo(write):
+    assert _flac_duration(write("a.flac", flac_bytes(16000, 16000 * 60))) == pytest.approx(60.0)
+
+
+def test_flac_duration_unknown_total_samples(write):
+    # ffmpeg only fills in the sample count when it closes the file
+    assert _flac_duration(write("a.flac", flac_bytes(16000, 0))) is None
+    assert _flac_duration(write("b.flac", b"ID3" + b"\x00" * 40)) is None
+
+
+def test_opus_duration_from_last_granule(write):
+    path = write("a.opus", opus_bytes(pre_skip=312, final_granule=312 + 48000 * 3))
+    assert _opus_duration(path) == pytest.approx(3.0)
+
+
+def test_opus_duration_without_audio_pages(write):
+    assert _opus_duration(write("a.opus", opus_bytes(pre_skip=312, final_granule=0))) is None
+    assert _opus_duration(write("b.opus", b"\x00" * 64)) is None
+
+
+@pytest.mark.parametrize("version", [0, 1])
+def test_mp4_duration_from_mvhd(write, version):
+    path = write("a.mp4", mp4_bytes(timescale=90_000, duration=90_000 * 60, version=version))
+    assert _mp4_duration(path) == pytest.approx(60.0)
+
+
+def test_mp4_duration_none_until_moov_written(write):
+    assert _mp4_duration(write("a.mp4", mp4_bytes(moov=False))) is None
+    assert _mp4_duration(write("b.mp4", b"")) is None
+
+
+# -------------------- start-only filenames --------------------
+
+def test_parse_filename_start_and_end():
+    start = datetime(2025, 9, 21, 16, 47, 29, tzinfo=timezone.utc)
+    assert _parse_filename_cached("kuwait_news-20250921-164729.wav", 60) == (start, start + timedelta(seconds=60))
+    # Dashes in the channel prefix are fine: the date/time are the last two fields
+    assert _parse_filename_cached("al-arabiya-20250921-164729.mp4", 30)[1] == start + timedelta(seconds=30)
+
+
+@pytest.mark.parametrize("name", [
+    "segment.wav",
+    "ch-2025092-164729.wav",
+    "ch-20250921-1647.wav",
+    "ch-20251321-164729.wav",  # month 13
+    "ch-2025092x-164729.wav",
+])
+def test_parse_filename_rejects_malformed(name):
+    assert _parse_filename_cached(name, 60) is None
+
+
+# -------------------- stop cleanup --------------------
+
+@pytest.fixture
+def recorder(tmp_path):
+    # Skip __init__: it creates folders, the DB engine and process-wide Prometheus metrics
+    rec = DualHLSRecorder.__new__(DualHLSRecorder)
+    rec.config = {"id": "test", "recording": {"segment_seconds": 60}, "audio": {"sample_rate": 16000}}
+    rec.channel_id = "test"
+    rec._parse_config()
+    return rec
+
+
+def batch(tmp_path, kind, rows):
+    """SegmentBatch from (minute, duration, size) rows; minute None = unparsable name."""
+    b = SegmentBatch(directory=tmp_path, kind=kind)
+    for minute, duration, size in rows:
+        b.names.append(f"test-20250921-16{minute or 0:02d}00.wav")
+        b.starts.append(None if minute is None else datetime(2025, 9, 21, 16, minute, tzinfo=timezone.utc))
+        b.durations.append(duration)
+        b.sizes.append(size)
+    return b
+
+
+FULL_WAV = 16000 * 2 * 60
+
+
+def test_cleanup_partials_by_duration_then_size(recorder, tmp_path):
+    b = batch(tmp_path, "audio", [
+        (0, 60.0, FULL_WAV),
+        (1, 20.0, FULL_WAV),        # short by header
+        (2, None, FULL_WAV),        # unreadable header, full size
+        (3, None, FULL_WAV // 2),   # unreadable header, too small
+    ])
+    assert recorder._cleanup_partials(b) == {1, 3}
+
+
+def test_cleanup_partials_video_size_floor(recorder, tmp_path):
+    b = batch(tmp_path, "video", [(0, None, 400_000), (1, None, 2_000_000), (2, 59.9, 100)])
+    assert recorder._cleanup_partials(b) == {0}
+
+
+def test_cleanup_extras_keeps_earliest_full_segment(recorder, tmp_path):
+    b = batch(tmp_path, "audio", [
+        (3, 60.0, FULL_WAV),
+        (1, None, FULL_WAV),        # audio trusted by size
+        (2, 60.0, FULL_WAV),
+        (0, 30.0, FULL_WAV),        # partial: not a candidate
+        (None, 60.0, FULL_WAV),     # unparsable name
+    ])
+    assert recorder._cleanup_extras(b, skip=set()) == {0, 2}
+    # Already-doomed indices are not candidates either
+    assert recorder._cleanup_extras(b, skip={1}) == {0}
+
+
+def test_cleanup_extras_ignores_unprobed_video(recorder, tmp_path):
+    b = batch(tmp_path, "video", [(0, None, 2_000_000), (1, 60.0, 2_000_000), (2, 60.0, 2_000_000)])
+    assert recorder._cleanup_extras(b, skip=set()) == {2}
+
+
+# -------------------- moov detection --------------------
+
+def test_has_moov_atom_after_mdat(write):
+    assert _has_moov_atom(write("a.mp4", mp4_bytes()))
+
+
+def test_has_moov_atom_faststart_and_largesize(write):
+    ftyp = box(b"ftyp", b"isom\x00\x00\x02\x00")
+    moov = box(b"moov", mvhd(1000, 60_000))
+    assert _has_moov_atom(write("a.mp4", ftyp + moov + box(b"mdat", b"\x00" * 64)))
+    # 64-bit box size (size field 1, real size in the next 8 bytes)
+    mdat64 = struct.pack(">I4sQ", 1, b"mdat", 16 + 64) + b"\x00" * 64
+    assert _has_moov_atom(write("b.mp4", ftyp + mdat64 + moov))
+
+
+def test_has_moov_atom_missing(write):
+    assert not _has_moov_atom(write("a.mp4", mp4_bytes(moov=False)))
+    assert not _has_moov_atom(write("b.mp4", box(b"ftyp", b"isom") + box(b"mdat", b"\x00" * 64)))
+    assert not _has_moov_atom(write("c.mp4", b""))
+    assert not _has_moov_atom("/nonexistent/a.mp4")
+
+
+# -------------------- ffmpeg stderr --------------------
+
+class _Count:
+    def __init__(self) -> None:
+        self.value = 0
+
+    def inc(self, n: int = 1) -> None:
+        self.value += n
+
+
+def pump(*chunks: bytes) -> tuple[int, int]:
+    async def run() -> tuple[int, int]:
+        stream = asyncio.StreamReader()
+        for chunk in chunks:
+            stream.feed_data(chunk)
+        stream.feed_eof()
+        drops, reconnects = _Count(), _Count()
+        await pump_ffmpeg_stderr(stream, drops, reconnects, "audio")
+        return drops.value, reconnects.value
+    return asyncio.run(run())
+
+
+def test_pump_counts_drops_from_progress_lines():
+    # Captured -stats output: '\r'-terminated, drop= is cumulative
+    first = b"frame=  125 fps= 25 q=28.0 size=N/A time=00:00:05.00 bitrate=N/A dup=0 drop=3 speed=1x    \r"
+    second = b"frame=  250 fps= 25 q=28.0 size=N/A time=00:00:10.00 bitrate=N/A dup=0 drop=7 speed=1x    \r"
+    assert pump(first) == (3, 0)
+    # Repeated totals are not double counted; a line split across reads is reassembled
+    assert pump(first, first, second[:40], second[40:]) == (7, 0)
+
+
+def test_pump_counts_reconnects():
+    line = b"[https @ 0x55d0c8] Will reconnect at 1048576 in 0 second(s), error=Connection reset by peer.\n"
+    assert pump(line, b"frame=  25 fps=25 drop=0 speed=1x\r", line) == (0, 2)
+
+
+# -------------------- watched open files --------------------
+
+class _Metric(_Count):
+    def set(self, value: float) -> None:
+        self.value = value
+
+    observe = set
+
+
+@pytest.fixture
+def live_recorder(tmp_path):
+    """Recorder mid-run with the watcher's state, writing rows to ``rec.rows``."""
+    rec = DualHLSRecorder.__new__(DualHLSRecorder)
+    rec.config = {"id": "test", "recording": {"segment_seconds": 60}, "audio": {"sample_rate": 16000}}
+    rec.channel_id = "test"
+    rec.data_root = tmp_path
+    rec._parse_config()
+    rec._compute_directories()
+    rec._ensure_dirs()
+    rec._segments_today, rec._pending_rows, rec._finalized_paths, rec._open_files = {}, [], set(), {}
+    rec._stderr_tasks, rec._watch_task, rec._watch_stop_evt = {}, None, None
+    rec.process_recorder = rec.process_audio_recorder = rec.process_video_recorder = rec.archive_recorder = None
+    rec._m_seg = {"audio": _Metric(), "video": _Metric()}
+    rec._m_running, rec._m_collect = _Metric(), _Metric()
+    rec.running = True
+    rec.recording_id = "0190f0c4-5e6b-7a3c-8d2e-1f4a5b6c7d8e"
+    rec.run_started_at = datetime(2025, 9, 21, 16, 0, tzinfo=timezone.utc)
+    rec.rows = []
+    rec._persist_segments_bulk = rec.rows.extend
+    return rec
+
+
+def track_open(rec, directory, name, data, media_type):
+    """Write a segment file and register it as the watcher's open file for its folder."""
+    path = str(directory / name)
+    Path(path).write_bytes(data)
+    rec._ingest_segment(path, name, media_type, persist=False)
+    rec._open_files[str(directory)] = (path, media_type)
+    return path
+
+
+def test_stop_persists_open_files(live_recorder):
+    rec = live_recorder
+    wav = track_open(rec, rec.audio_dir, "test-20250921-160100.wav", wav_bytes(60.0), "audio")
+    # Cut short by the stop: left for cleanup, not persisted
+    ftyp = box(b"ftyp", b"isom\x00\x00\x02\x00")
+    partial = ftyp + box(b"mdat", b"\x00" * 600_000) + box(b"moov", mvhd(1000, 20_000))
+    mp4 = track_open(rec, rec.video_dir, "test-20250921-160100.mp4", partial, "video")
+    assert rec.rows == []
+
+    asyncio.run(rec.stop_recording())
+
+    assert [r["audio_path"] for r in rec.rows] == [wav]
+    assert str(rec.rows[0]["recording_id"]) == "0190f0c4-5e6b-7a3c-8d2e-1f4a5b6c7d8e"
+    assert rec._open_files == {}
+    assert not Path(mp4).exists()
+
+
+def test_date_rollover_persists_open_files(live_recorder, monkeypatch):
+    rec = live_recorder
+    wav = track_open(rec, rec.audio_dir, "test-20250921-235930.wav", wav_bytes(60.0), "audio")
+    monkeypatch.setattr(rec, "_maybe_roll_dirs", lambda: True)
+    monkeypatch.setattr(rec, "_watch_active", lambda: True)
+
+    asyncio.run(rec.refresh_segments())
+
+    assert [r["audio_path"] for r in rec.rows] == [wav]
+    assert rec._open_files == {} and rec._segments_today == {}
@@ -3,6 +3,9 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Optional
 
+from celery import group
+from sqlalchemy import and_, select
+
 from mobasher.storage.db import get_session, init_engine
 from mobasher.storage.models import Segment, Transcript
 from mobasher.vision.worker import ocr_segment, objects_segment, faces_segment
@@ -14,27 +17,31 @@ def enqueue_vision_for_asr_processed(limit: int = 20) -> int:
     Focuses the first N by start time.
     """
     init_engine()
-    count = 0
     with next(get_session()) as db:  # type: ignore
-        # Join-like query: segment with video and transcript present
-        segs = (
-            db.query(Segment)
-            .filter(Segment.video_path != None)
+        # Segments with video whose transcript exists, in one round trip
+        stmt = (
+            select(Segment.id, Segment.started_at)
+            .join(Transcript, and_(
+                Transcript.segment_id == Segment.id,
+                Transcript.segment_started_at == Segment.started_at,
+            ))
+            .where(Segment.video_path.is_not(None))
             .order_by(Segment.started_at.asc())
-            .limit(limit * 3)
-            .all()
+            .limit(limit)
         )
-        for seg in segs:
-            tr = db.get(Transcript, (seg.id, seg.started_at))
-            if tr is None:
-                continue
-            ocr_segment.delay(str(seg.id), seg.started_at.isoformat())
-            objects_segment.delay(str(seg.id), seg.started_at.isoformat())
-            faces_segment.delay(str(seg.id), seg.started_at.isoformat())
-            count += 1
-            if count >= limit:
-                break
-    return count
+        rows = db.execute(stmt).all()
+    if rows:
+        # One group publish over a single producer connection instead of 3 .delay() per segment
+        group(
+            sig
+            for seg_id, started_at in rows
+            for sig in (
+                ocr_segment.s(str(seg_id), started_at.isoformat()),
+                objects_segment.s(str(seg_id), started_at.isoformat()),
+                faces_segment.s(str(seg_id), started_at.isoformat()),
+            )
+        ).apply_async()
+    return len(rows)
 
 
 def enqueue_screenshots_for_recent(limit: int = 20) -> int:
@@ -1,7 +1,8 @@
 from __future__ import annotations
 
+from contextlib import contextmanager, nullcontext
 from dataclasses import dataclass
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Iterator, Tuple
 from time import perf_counter
 
 from celery import Celery
@@ -12,6 +13,8 @@ class VisionSettings(BaseSettings):
     redis_url: str = "redis://localhost:6379/0"
     ocr_fps: float = 3.0
     ocr_lang: str = "ar"  # EasyOCR language code
+    ocr_use_gpu: bool = True  # used only when CUDA is available
+    ocr_fp16: bool = True  # autocast OCR inference to float16 on GPU
     # Relative ROI bands (fractions of height) for typical news layouts
     enable_roi_headline: bool = True
     roi_headline_top: float = 0.72
@@ -27,6 +30,7 @@ class VisionSettings(BaseSettings):
     ocr_iou_threshold: float = 0.3
     ocr_text_sim_threshold: float = 0.6
     ocr_merge_window_s: float = 2.0
+    ocr_batch_size: int = 8  # crops of one region per readtext_batched call
     # Objects
     objects_fps: float = 1.0
     yolo_model: str = "yolov8n.pt"  # ultralytics model id or path
@@ -43,6 +47,19 @@ class VisionSettings(BaseSettings):
 
 settings = VisionSettings()
 app = Celery("mobasher_vision", broker=settings.redis_url, backend=settings.redis_url)
+# One queue per model so workers can be split and tuned (prefetch, concurrency) per
+# pipeline: CPU-bound OCR vs GPU-bound detection
+app.conf.update(
+    task_default_queue="vision",
+    task_routes={
+        "vision.ocr_segment": {"queue": "vision.ocr"},
+        "vision.objects_segment": {"queue": "vision.objects"},
+        "vision.faces_segment": {"queue": "vision.faces"},
+    },
+)
+
+# Visual events are buffered per task and written with COPY in batches of this size
+_COPY_BATCH = 500
 
 
 def _sample_timestamps(duration_s: float, fps: float) -> List[float]:
@@ -59,19 +76,41 @@ def _sample_timestamps(duration_s: float, fps: float) -> List[float]:
 
 # Global OCR model cache
 _OCR = None
+_OCR_ON_GPU = False
 _YOLO = None
 _FACE = None
 _GALLERY = None  # list of (identity, embedding)
 
 
 def _get_ocr():
-    global _OCR
+    global _OCR, _OCR_ON_GPU
     if _OCR is None:
         import easyocr  # type: ignore
-        _OCR = easyocr.Reader([settings.ocr_lang], gpu=False, verbose=False)
+        import torch  # type: ignore  # easyocr dependency
+
+        _OCR_ON_GPU = settings.ocr_use_gpu and torch.cuda.is_available()
+        if _OCR_ON_GPU:
+            # Crops of a region share one shape, so cuDNN's per-shape autotuning pays off
+            torch.backends.cudnn.benchmark = True
+            _OCR = easyocr.Reader([settings.ocr_lang], gpu=True, quantize=False, cudnn_benchmark=True, verbose=False)
+        else:
+            _OCR = easyocr.Reader([settings.ocr_lang], gpu=False, verbose=False)
+        # Warm up once so the first real batch doesn't pay for lazy init/allocation
+        import numpy as np
+        with _ocr_autocast():
+            _OCR.readtext(np.zeros((600, 800, 3), dtype=np.uint8))
     return _OCR
 
 
+def _ocr_autocast() -> Any:
+    """float16 autocast for OCR inference on GPU (``ocr_fp16``); a no-op context otherwise."""
+    if _OCR_ON_GPU and settings.ocr_fp16:
+        import torch  # type: ignore
+
+        return torch.autocast("cuda", dtype=torch.float16)
+    return nullcontext()
+
+
 def _get_yolo():
     global _YOLO
     if _YOLO is not None:
@@ -129,18 +168,151 @@ def _load_face_gallery() -> Optional[List[Tuple[str, Any]]]:
     return _GALLERY
 
 
-def _read_frame_at(video_path: str, ts_sec: float) -> Optional[Tuple[Any, int, int]]:
+# A sample further ahead than this is reached by seeking to the keyframe before it;
+# closer ones by decoding forward (cheaper than a seek's keyframe-to-target decode)
+_SEEK_GAP_S = 2.0
+
+
+@contextmanager
+def _open_video(video_path: str) -> Iterator[Tuple[Any, Any]]:
+    """Open ``video_path`` with PyAV; yields ``(container, video_stream)``."""
+    import av  # type: ignore
+
+    container = av.open(video_path)
+    try:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        yield container, stream
+    finally:
+        container.close()
+
+
+def _iter_frames(video_path: str, timestamps: List[float]) -> Iterator[Tuple[int, float, Any, int, int]]:
+    """Yield ``(index, ts, bgr_frame, width, height)`` for ascending ``timestamps``.
+
+    One container and decoder for the whole segment: dense samples are reached by
+    decoding forward, sparse ones by a keyframe seek. Each sample gets the first frame
+    at or after its timestamp; samples past the end of the stream are not yielded.
+    """
+    if not timestamps:
+        return
+    try:
+        import av  # type: ignore # noqa: F401
+    except ImportError:
+        yield from _iter_frames_cv2(video_path, timestamps)
+        return
+    try:
+        with _open_video(video_path) as (container, stream):
+            tb = stream.time_base
+            start = stream.start_time or 0
+            frames = container.decode(stream)
+            pos = 0.0
+            i = 0
+            while i < len(timestamps):
+                if timestamps[i] - pos > _SEEK_GAP_S:
+                    container.seek(start + int(timestamps[i] / tb), stream=stream, backward=True)
+                    frames = container.decode(stream)
+                for frame in frames:
+                    if frame.pts is None:
+                        continue
+                    pos = float((frame.pts - start) * tb)
+                    if pos + 1e-3 >= timestamps[i]:
+                        break
+                else:
+                    return  # end of stream
+                img = frame.to_ndarray(format="bgr24")
+                h, w = img.shape[0], img.shape[1]
+                # Every sample this frame reaches (sampling faster than the source fps)
+                while i < len(timestamps) and timestamps[i] <= pos + 1e-3:
+                    yield i, timestamps[i], img, w, h
+                    i += 1
+    except Exception:
+        return  # unreadable/truncated file: keep what was sampled so far
+
+
+def _probe_duration_s(video_path: str) -> Optional[float]:
+    """Container duration in seconds: PyAV header read, ffprobe only without PyAV."""
+    try:
+        import av  # type: ignore # noqa: F401
+    except ImportError:
+        import subprocess
+
+        try:
+            result = subprocess.run([
+                'ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nokey=1:noprint_wrappers=1', video_path
+            ], capture_output=True, text=True)
+            return float(result.stdout.strip()) if result.returncode == 0 else None
+        except Exception:
+            return None
+    try:
+        with _open_video(video_path) as (container, stream):
+            if container.duration is not None:
+                return container.duration / 1_000_000  # AV_TIME_BASE
+            if stream.duration is not None:
+                return float(stream.duration * stream.time_base)
+    except Exception:
+        pass
+    return None
+
+
+def _segment_duration_s(db: Any, seg: Any) -> float:
+    """Duration of ``seg``'s video, probed once and kept in ``segments.extra['duration_s']``.
+
+    The vision tasks for a segment all need it; the first one to run probes and stores it.
+    """
+    cached = (seg.extra or {}).get("duration_s")
+    if cached:
+        return float(cached)
+    duration_s = _probe_duration_s(seg.video_path)
+    if duration_s is None:
+        nominal = (seg.ended_at - seg.started_at).total_seconds() if seg.ended_at and seg.started_at else 0.0
+        return nominal if nominal > 0 else 60.0
+    from sqlalchemy import func, update
+    from mobasher.storage.models import Segment
+
+    # Merged in its own short transaction so sibling tasks never wait on this row's lock
+    db.execute(
+        update(Segment)
+        .where(Segment.id == seg.id, Segment.started_at == seg.started_at)
+        .values(extra=func.coalesce(Segment.extra, func.jsonb_build_object()).op("||")(
+            func.jsonb_build_object("duration_s", duration_s)
+        )),
+        execution_options={"synchronize_session": False},
+    )
+    db.commit()
+    return duration_s
+
+
+def _iter_frames_cv2(video_path: str, timestamps: List[float]) -> Iterator[Tuple[int, float, Any, int, int]]:
+    """OpenCV fallback for ``_iter_frames`` when PyAV is not installed.
+
+    Walks the stream once with ``grab()`` (demux only) and ``retrieve()``s (decodes
+    into BGR) just the frames that land on a sample.
+    """
     import cv2  # type: ignore
+
     cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        return None
-    cap.set(cv2.CAP_PROP_POS_MSEC, ts_sec * 1000.0)
-    ok, frame = cap.read()
-    h, w = (frame.shape[0], frame.shape[1]) if ok and frame is not None else (0, 0)
-    cap.release()
-    if not ok or frame is None:
-        return None
-    return frame, w, h
+    try:
+        if not cap.isOpened():
+            return
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        src_fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+        i = 0
+        n = 0
+        while i < len(timestamps) and cap.grab():
+            pos = n / src_fps
+            n += 1
+            if pos + 1e-3 < timestamps[i]:
+                continue
+            ok, frame = cap.retrieve()
+            if not ok or frame is None:
+                continue
+            h, w = frame.shape[0], frame.shape[1]
+            while i < len(timestamps) and timestamps[i] <= pos + 1e-3:
+                yield i, timestamps[i], frame, w, h
+                i += 1
+    finally:
+        cap.release()
 
 
 def _compute_rois(width: int, height: int) -> List[Tuple[str, Tuple[int, int, int, int]]]:
@@ -196,29 +368,21 @@ def screenshots_segment(self, segment_id: str, segment_started_at_iso: str) -> D
     rows in the screenshots table for fast listing.
     """
     start = perf_counter()
-    from datetime import datetime
-    from uuid import UUID
     from mobasher.storage.db import get_session, init_engine
+    from mobasher.storage.repositories import seg_key
     from mobasher.storage.models import Segment, Screenshot
-    import subprocess
+    from sqlalchemy import insert
     import os
 
+    key = seg_key(segment_id, segment_started_at_iso)
     init_engine()
     saved = 0
     with next(get_session()) as db:  # type: ignore
-        seg = db.get(Segment, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
+        seg = db.get(Segment, key)
         if seg is None or not seg.video_path:
             raise self.retry(exc=RuntimeError("segment_missing_or_no_video"))
 
-        # Probe duration via ffprobe
-        try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'error', '-show_entries', 'format=duration',
-                '-of', 'default=nokey=1:noprint_wrappers=1', seg.video_path
-            ], capture_output=True, text=True)
-            duration_s = float(result.stdout.strip()) if result.returncode == 0 else 60.0
-        except Exception:
-            duration_s = 60.0
+        duration_s = _segment_duration_s(db, seg)
 
         # Sample at 30%, 60%, 90%
         stamps = []
@@ -236,11 +400,8 @@ def screenshots_segment(self, segment_id: str, segment_started_at_iso: str) -> D
             pass
 
         base_name = os.path.basename(seg.video_path)
-        for ts in stamps:
-            fr = _read_frame_at(seg.video_path, ts)
-            if fr is None:
-                continue
-            frame, w, h = fr
+        shot_rows: List[Dict[str, Any]] = []
+        for _, ts, frame, w, h in _iter_frames(seg.video_path, stamps):
             # filename: <base>-t<ms>.jpg
             ms = int(ts * 1000)
             shot_name = f"{os.path.splitext(base_name)[0]}-t{ms}.jpg"
@@ -248,18 +409,19 @@ def screenshots_segment(self, segment_id: str, segment_started_at_iso: str) -> D
             try:
                 import cv2
                 cv2.imwrite(shot_path, frame)
-                sc = Screenshot(
+                shot_rows.append(dict(
                     channel_id=seg.channel_id,
-                    segment_id=UUID(segment_id),
-                    segment_started_at=datetime.fromisoformat(segment_started_at_iso),
+                    segment_id=key.id,
+                    segment_started_at=key.started_at,
                     frame_timestamp_ms=ms,
                     screenshot_path=shot_path,
-                )
-                db.add(sc)
+                ))
                 saved += 1
             except Exception:
                 pass
-        if saved:
+        if shot_rows:
+            # One executemany instead of a unit-of-work INSERT per screenshot
+            db.execute(insert(Screenshot), shot_rows)
             db.commit()
     return {"ok": True, "saved": saved, "elapsed_ms": int((perf_counter() - start) * 1000)}
 
@@ -268,31 +430,23 @@ def screenshots_segment(self, segment_id: str, segment_started_at_iso: str) -> D
 def ocr_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[str, Any]:
     start = perf_counter()
     # Lazy imports to keep worker light
-    from datetime import datetime
-    from uuid import UUID
     from mobasher.storage.db import get_session, init_engine
     from mobasher.storage.models import Segment, VisualEvent
-    from mobasher.storage.repositories import upsert_segment  # if needed later
-    import subprocess
+    from mobasher.storage.repositories import bulk_copy, seg_key, upsert_segment  # upsert_segment if needed later
 
+    key = seg_key(segment_id, segment_started_at_iso)
     init_engine()
     with next(get_session()) as db:  # type: ignore
-        seg = db.get(Segment, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
+        seg = db.get(Segment, key)
         if seg is None or not seg.video_path:
             raise self.retry(exc=RuntimeError("segment_missing_or_no_video"))
 
-        # Probe duration via ffprobe
-        try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nokey=1:noprint_wrappers=1', seg.video_path
-            ], capture_output=True, text=True)
-            duration_s = float(result.stdout.strip()) if result.returncode == 0 else 60.0
-        except Exception:
-            duration_s = 60.0
+        duration_s = _segment_duration_s(db, seg)
 
         timestamps = _sample_timestamps(duration_s, settings.ocr_fps)
 
         events = 0
+        ve_rows: List[Dict[str, Any]] = []
         # Keep aggregated per-frame OCR here to deduplicate later
         aggregated_frames: List[Dict[str, Any]] = []
         ocr = _get_ocr()
@@ -300,96 +454,121 @@ def ocr_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[str,
         screenshot_root = os.environ.get('MOBASHER_SCREENSHOT_ROOT', '/Volumes/ExternalDB/Media-View-Data/data/screenshot')
         os.makedirs(screenshot_root, exist_ok=True)
 
-        for idx, ts in enumerate(timestamps):
-            fr = _read_frame_at(seg.video_path, ts)
-            if fr is None:
-                continue
-            frame, w, h = fr
-            # Prepare ROIs including full frame as a fallback
-            rois = [("full", (0, 0, w, h))] + _compute_rois(w, h)
-            for region_name, (rx, ry, rw, rh) in rois:
-                sub = frame[ry:ry+rh, rx:rx+rw]
-                # Preprocess copy to help OCR on overlays; keep original for screenshot
-                pre = _preprocess_for_ocr(sub)
-                # EasyOCR returns list of [bbox, text, conf]
-                # Use slightly more permissive thresholds for overlays
-                results = ocr.readtext(pre, paragraph=False, detail=1, text_threshold=0.5, low_text=0.3)
-                # Save one region screenshot per frame with descriptive name
-                fname = os.path.basename(seg.video_path)
-                base, _ = os.path.splitext(fname)
-                shot_name = f"{base}-seg_{idx}_{region_name}.jpg"
-                shot_path = os.path.join(screenshot_root, shot_name)
-                try:
-                    import cv2
-                    cv2.imwrite(shot_path, sub)
-                except Exception:
-                    pass
-                if settings.ocr_write_raw:
-                    for item in results:
-                        if isinstance(item, (list, tuple)) and len(item) >= 2:
-                            box = item[0]
-                            text = item[1]
-                            conf = (item[2] if len(item) >= 3 else None)
-                        else:
-                            continue
-                        if not text or not str(text).strip():
-                            continue
-                        xs = [p[0] for p in box]
-                        ys = [p[1] for p in box]
-                        x_min, y_min = float(max(0, min(xs))) + rx, float(max(0, min(ys))) + ry
-                        x_max, y_max = float(min(rw, max(xs))) + rx, float(min(rh, max(ys))) + ry
-                        bbox = [int(x_min), int(y_min), int(max(1, x_max - x_min)), int(max(1, y_max - y_min))]
-                        ve = VisualEvent(
-                            id=None,
-                            segment_id=UUID(segment_id),
-                            segment_started_at=datetime.fromisoformat(segment_started_at_iso),
-                            channel_id=seg.channel_id,
-                            timestamp_offset=float(ts),
-                            event_type='ocr',
-                            bbox=bbox,
-                            confidence=float(conf) if conf is not None else None,
-                            data={"text": str(text).strip(), "lang": "ar", "region": region_name},
-                            video_path=seg.video_path,
-                            video_filename=fname,
-                            screenshot_path=shot_path,
-                            frame_timestamp_ms=int(ts*1000),
-                        )
-                        db.add(ve)
-                        events += 1
-                # Aggregated sentence per region for this timestamp
-                tokens = []
-                union = None
+        def _ocr_region_results(idx: int, ts: float, region_name: str, roi: Tuple[int, int, int, int], sub: Any, results: List[Any]) -> None:
+            nonlocal events
+            rx, ry, rw, rh = roi
+            # Save one region screenshot per frame with descriptive name
+            fname = os.path.basename(seg.video_path)
+            base, _ = os.path.splitext(fname)
+            shot_name = f"{base}-seg_{idx}_{region_name}.jpg"
+            shot_path = os.path.join(screenshot_root, shot_name)
+            try:
+                import cv2
+                cv2.imwrite(shot_path, sub)
+            except Exception:
+                pass
+            if settings.ocr_write_raw:
                 for item in results:
-                    if not (isinstance(item, (list, tuple)) and len(item) >= 2 and str(item[1]).strip()):
+                    if isinstance(item, (list, tuple)) and len(item) >= 2:
+                        box = item[0]
+                        text = item[1]
+                        conf = (item[2] if len(item) >= 3 else None)
+                    else:
+                        continue
+                    if not text or not str(text).strip():
                         continue
-                    box = item[0]
-                    text = str(item[1]).strip()
                     xs = [p[0] for p in box]
                     ys = [p[1] for p in box]
                     x_min, y_min = float(max(0, min(xs))) + rx, float(max(0, min(ys))) + ry
                     x_max, y_max = float(min(rw, max(xs))) + rx, float(min(rh, max(ys))) + ry
-                    tb = [int(x_min), int(y_min), int(max(1, x_max - x_min)), int(max(1, y_max - y_min))]
-                    conf = float(item[2]) if (isinstance(item, (list, tuple)) and len(item) >= 3 and item[2] is not None) else None
-                    tokens.append({"text": text, "bbox": tb, "conf": conf})
-                    if union is None:
-                        union = tb.copy()
-                    else:
-                        ux, uy, uw, uh = union
-                        union = [min(ux, tb[0]), min(uy, tb[1]), max(ux+uw, tb[0]+tb[2]) - min(ux, tb[0]), max(uy+uh, tb[1]+tb[3]) - min(uy, tb[1])]
-                if tokens:
-                    tokens_sorted = sorted(tokens, key=lambda t: t["bbox"][0])
-                    aggregated_text = " ".join(t["text"] for t in tokens_sorted)
-                    font_px = max(t["bbox"][3] for t in tokens_sorted)
-                    aggregated_frames.append({
-                        "ts": float(ts),
-                        "region": region_name,
-                        "text": aggregated_text.strip(),
-                        "bbox": union if union is not None else [rx, ry, rw, rh],
-                        "font_px": int(font_px),
-                        "tokens": tokens_sorted,
-                        "shot": shot_path,
-                        "fname": fname,
-                    })
+                    bbox = [int(x_min), int(y_min), int(max(1, x_max - x_min)), int(max(1, y_max - y_min))]
+                    ve_rows.append(dict(
+                        segment_id=key.id,
+                        segment_started_at=key.started_at,
+                        channel_id=seg.channel_id,
+                        timestamp_offset=float(ts),
+                        event_type='ocr',
+                        bbox=bbox,
+                        confidence=float(conf) if conf is not None else None,
+                        data={"text": str(text).strip(), "lang": "ar", "region": region_name},
+                        video_path=seg.video_path,
+                        video_filename=fname,
+                        screenshot_path=shot_path,
+                        frame_timestamp_ms=int(ts*1000),
+                    ))
+                    if len(ve_rows) >= _COPY_BATCH:
+                        bulk_copy(db, VisualEvent, ve_rows)
+                        ve_rows.clear()
+                    events += 1
+            # Aggregated sentence per region for this timestamp
+            tokens = []
+            union = None
+            for item in results:
+                if not (isinstance(item, (list, tuple)) and len(item) >= 2 and str(item[1]).strip()):
+                    continue
+                box = item[0]
+                text = str(item[1]).strip()
+                xs = [p[0] for p in box]
+                ys = [p[1] for p in box]
+                x_min, y_min = float(max(0, min(xs))) + rx, float(max(0, min(ys))) + ry
+                x_max, y_max = float(min(rw, max(xs))) + rx, float(min(rh, max(ys))) + ry
+                tb = [int(x_min), int(y_min), int(max(1, x_max - x_min)), int(max(1, y_max - y_min))]
+                conf = float(item[2]) if (isinstance(item, (list, tuple)) and len(item) >= 3 and item[2] is not None) else None
+                tokens.append({"text": text, "bbox": tb, "conf": conf})
+                if union is None:
+                    union = tb.copy()
+                else:
+                    ux, uy, uw, uh = union
+                    union = [min(ux, tb[0]), min(uy, tb[1]), max(ux+uw, tb[0]+tb[2]) - min(ux, tb[0]), max(uy+uh, tb[1]+tb[3]) - min(uy, tb[1])]
+            if tokens:
+                tokens_sorted = sorted(tokens, key=lambda t: t["bbox"][0])
+                aggregated_text = " ".join(t["text"] for t in tokens_sorted)
+                font_px = max(t["bbox"][3] for t in tokens_sorted)
+                aggregated_frames.append({
+                    "ts": float(ts),
+                    "region": region_name,
+                    "text": aggregated_text.strip(),
+                    "bbox": union if union is not None else [rx, ry, rw, rh],
+                    "font_px": int(font_px),
+                    "tokens": tokens_sorted,
+                    "shot": shot_path,
+                    "fname": fname,
+                })
+
+        # Same region of same-sized frames -> same-shaped crops, so each region is batched
+        # across timestamps (no resize/padding) and the detector runs once per batch
+        pending: Dict[Tuple[str, Tuple[int, ...]], List[Tuple[int, float, Tuple[int, int, int, int], Any, Any]]] = {}
+
+        def _flush(batch_key: Tuple[str, Tuple[int, ...]]) -> None:
+            region_name = batch_key[0]
+            batch = pending.pop(batch_key, [])
+            if not batch:
+                return
+            # EasyOCR returns, per image, a list of [bbox, text, conf]
+            # Use slightly more permissive thresholds for overlays
+            with _ocr_autocast():
+                batch_results = ocr.readtext_batched(
+                    [pre for (_, _, _, _, pre) in batch],
+                    paragraph=False, detail=1, text_threshold=0.5, low_text=0.3,
+                    batch_size=settings.ocr_batch_size,
+                )
+            for (idx, ts, roi, sub, _), results in zip(batch, batch_results):
+                _ocr_region_results(idx, ts, region_name, roi, sub, results)
+
+        for idx, ts, frame, w, h in _iter_frames(seg.video_path, timestamps):
+            # Prepare ROIs including full frame as a fallback
+            rois = [("full", (0, 0, w, h))] + _compute_rois(w, h)
+            for region_name, (rx, ry, rw, rh) in rois:
+                sub = frame[ry:ry+rh, rx:rx+rw]
+                # Preprocess copy to help OCR on overlays; keep original for screenshot
+                pre = _preprocess_for_ocr(sub)
+                batch_key = (region_name, pre.shape)
+                pending.setdefault(batch_key, []).append((idx, ts, (rx, ry, rw, rh), sub, pre))
+                if len(pending[batch_key]) >= settings.ocr_batch_size:
+                    _flush(batch_key)
+        for batch_key in list(pending):
+            _flush(batch_key)
+
         # Deduplicate aggregated frames into spans
         def _iou(a: List[int], b: List[int]) -> float:
             ax, ay, aw, ah = a
@@ -464,10 +643,9 @@ def ocr_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[str,
             # aggregate confidence over tokens if available
             conf_values = [t.get("conf") for t in sp["tokens"] if isinstance(t.get("conf"), (int, float))]
             avg_conf = float(sum(conf_values) / len(conf_values)) if conf_values else None
-            ve_span = VisualEvent(
-                id=None,
-                segment_id=UUID(segment_id),
-                segment_started_at=datetime.fromisoformat(segment_started_at_iso),
+            ve_rows.append(dict(
+                segment_id=key.id,
+                segment_started_at=key.started_at,
                 channel_id=seg.channel_id,
                 timestamp_offset=float(sp["start"]),
                 event_type='ocr',
@@ -486,9 +664,12 @@ def ocr_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[str,
                 video_filename=sp["fname"],
                 screenshot_path=sp["shot"],
                 frame_timestamp_ms=int(sp["start"]*1000),
-            )
-            db.add(ve_span)
+            ))
+            if len(ve_rows) >= _COPY_BATCH:
+                bulk_copy(db, VisualEvent, ve_rows)
+                ve_rows.clear()
             events += 1
+        bulk_copy(db, VisualEvent, ve_rows)
         db.commit()
 
     return {"ok": True, "events": events, "elapsed_ms": int((perf_counter() - start) * 1000)}
@@ -497,39 +678,29 @@ def ocr_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[str,
 @app.task(name="vision.objects_segment", bind=True, max_retries=2, default_retry_delay=10)
 def objects_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[str, Any]:
     start = perf_counter()
-    from datetime import datetime
-    from uuid import UUID
     from mobasher.storage.db import get_session, init_engine
     from mobasher.storage.models import Segment, VisualEvent
-    import subprocess
+    from mobasher.storage.repositories import bulk_copy, seg_key
     import os
 
+    key = seg_key(segment_id, segment_started_at_iso)
     init_engine()
     with next(get_session()) as db:  # type: ignore
-        seg = db.get(Segment, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
+        seg = db.get(Segment, key)
         if seg is None or not seg.video_path:
             raise self.retry(exc=RuntimeError("segment_missing_or_no_video"))
 
         # Probe duration
-        try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nokey=1:noprint_wrappers=1', seg.video_path
-            ], capture_output=True, text=True)
-            duration_s = float(result.stdout.strip()) if result.returncode == 0 else 60.0
-        except Exception:
-            duration_s = 60.0
+        duration_s = _segment_duration_s(db, seg)
 
         timestamps = _sample_timestamps(duration_s, settings.objects_fps)
         yolo = _get_yolo()
         events = 0
+        ve_rows: List[Dict[str, Any]] = []
         screenshot_root = os.environ.get('MOBASHER_SCREENSHOT_ROOT', '/Volumes/ExternalDB/Media-View-Data/data/screenshot')
         os.makedirs(screenshot_root, exist_ok=True)
 
-        for idx, ts in enumerate(timestamps):
-            fr = _read_frame_at(seg.video_path, ts)
-            if fr is None:
-                continue
-            frame, w, h = fr
+        for idx, ts, frame, w, h in _iter_frames(seg.video_path, timestamps):
             detections = []
             if yolo is not None:
                 try:
@@ -564,10 +735,9 @@ def objects_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[
                 pass
 
             for det in detections:
-                ve = VisualEvent(
-                    id=None,
-                    segment_id=UUID(segment_id),
-                    segment_started_at=datetime.fromisoformat(segment_started_at_iso),
+                ve_rows.append(dict(
+                    segment_id=key.id,
+                    segment_started_at=key.started_at,
                     channel_id=seg.channel_id,
                     timestamp_offset=float(ts),
                     event_type='object',
@@ -578,9 +748,12 @@ def objects_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[
                     video_filename=fname,
                     screenshot_path=shot_path,
                     frame_timestamp_ms=int(ts*1000),
-                )
-                db.add(ve)
+                ))
+                if len(ve_rows) >= _COPY_BATCH:
+                    bulk_copy(db, VisualEvent, ve_rows)
+                    ve_rows.clear()
                 events += 1
+        bulk_copy(db, VisualEvent, ve_rows)
         db.commit()
     return {"ok": True, "events": events, "elapsed_ms": int((perf_counter() - start) * 1000)}
 
@@ -588,33 +761,27 @@ def objects_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[
 @app.task(name="vision.faces_segment", bind=True, max_retries=2, default_retry_delay=10)
 def faces_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[str, Any]:
     start = perf_counter()
-    from datetime import datetime
-    from uuid import UUID
     from mobasher.storage.db import get_session, init_engine
     from mobasher.storage.models import Segment, VisualEvent
-    import subprocess
+    from mobasher.storage.repositories import bulk_copy, seg_key
     import os
     import numpy as np  # type: ignore
 
+    key = seg_key(segment_id, segment_started_at_iso)
     init_engine()
     with next(get_session()) as db:  # type: ignore
-        seg = db.get(Segment, (UUID(segment_id), datetime.fromisoformat(segment_started_at_iso)))
+        seg = db.get(Segment, key)
         if seg is None or not seg.video_path:
             raise self.retry(exc=RuntimeError("segment_missing_or_no_video"))
 
         # Duration
-        try:
-            result = subprocess.run([
-                'ffprobe', '-v', 'error', '-show_entries', 'format=duration', '-of', 'default=nokey=1:noprint_wrappers=1', seg.video_path
-            ], capture_output=True, text=True)
-            duration_s = float(result.stdout.strip()) if result.returncode == 0 else 60.0
-        except Exception:
-            duration_s = 60.0
+        duration_s = _segment_duration_s(db, seg)
 
         timestamps = _sample_timestamps(duration_s, settings.faces_fps)
         fa = _get_face_analyzer()
         gallery = _load_face_gallery() or []
         events = 0
+        ve_rows: List[Dict[str, Any]] = []
         screenshot_root = os.environ.get('MOBASHER_SCREENSHOT_ROOT', '/Volumes/ExternalDB/Media-View-Data/data/screenshot')
         os.makedirs(screenshot_root, exist_ok=True)
 
@@ -623,11 +790,7 @@ def faces_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[st
             denom = (np.linalg.norm(a) * np.linalg.norm(b))
             return float(np.dot(a, b) / denom) if denom > 0 else 0.0
 
-        for idx, ts in enumerate(timestamps):
-            fr = _read_frame_at(seg.video_path, ts)
-            if fr is None:
-                continue
-            frame, w, h = fr
+        for idx, ts, frame, w, h in _iter_frames(seg.video_path, timestamps):
             fname = os.path.basename(seg.video_path)
             base, _ = os.path.splitext(fname)
             shot_name = f"{base}-seg_{idx}_faces.jpg"
@@ -654,10 +817,9 @@ def faces_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[st
                         best_score = s
                         best_ident = ident
                 if best_score >= settings.faces_rec_thresh:
-                    ve = VisualEvent(
-                        id=None,
-                        segment_id=UUID(segment_id),
-                        segment_started_at=datetime.fromisoformat(segment_started_at_iso),
+                    ve_rows.append(dict(
+                        segment_id=key.id,
+                        segment_started_at=key.started_at,
                         channel_id=seg.channel_id,
                         timestamp_offset=float(ts),
                         event_type='face',
@@ -668,8 +830,11 @@ def faces_segment(self, segment_id: str, segment_started_at_iso: str) -> Dict[st
                         video_filename=fname,
                         screenshot_path=shot_path,
                         frame_timestamp_ms=int(ts*1000),
-                    )
-                    db.add(ve)
+                    ))
+                    if len(ve_rows) >= _COPY_BATCH:
+                        bulk_copy(db, VisualEvent, ve_rows)
+                        ve_rows.clear()
                     events += 1
+        bulk_copy(db, VisualEvent, ve_rows)
         db.commit()
     return {"ok": True, "events": events, "elapsed_ms": int((perf_counter() - start) * 1000)}